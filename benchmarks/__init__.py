@@ -0,0 +1 @@
+"""Benchmarks of pmv2 pipelines against the local mock Urban API are located here."""
@@ -0,0 +1,104 @@
+"""Synthetic benchmark inputs generation is defined here."""
+
+import math
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import shapely
+import yaml
+
+from pmv2.mock_api import MockState
+
+FEATURE_SIZE = 0.0003
+"""Side of square input features (in degrees), about 20-30 meters."""
+
+BULK_FILES = 4
+"""Number of files input is split to for bulk uploads."""
+
+_LON_KM = 55.8  # length of a degree of longitude at 60 degrees of latitude
+_LAT_KM = 111.3
+
+
+def generate_features(  # pylint: disable=too-many-locals
+    size: int, density: float, duplicate_ratio: float = 0.1, seed: int = 0
+) -> gpd.GeoDataFrame:
+    """Generate `size` square features with attributes for all of the pipelines.
+
+    Features are placed uniformly over the square in the center of the mock API region sized to get `density`
+    features per square kilometer (as long as the region is large enough). `duplicate_ratio` of the features are
+    slightly shifted copies of the others, so uploaders would find them as existing objects.
+    """
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = MockState().get_roots()[0].geometry.bounds
+    side_km = math.sqrt(size / density)
+    width = min(side_km / _LON_KM, maxx - minx - 2 * FEATURE_SIZE)
+    height = min(side_km / _LAT_KM, maxy - miny - 2 * FEATURE_SIZE)
+    center_x, center_y = (minx + maxx) / 2, (miny + maxy) / 2
+    xs = rng.uniform(center_x - width / 2, center_x + width / 2 - FEATURE_SIZE, size)
+    ys = rng.uniform(center_y - height / 2, center_y + height / 2 - FEATURE_SIZE, size)
+    duplicates = np.flatnonzero(rng.random(size) < duplicate_ratio)
+    duplicates = duplicates[duplicates > 0]
+    originals = (rng.random(len(duplicates)) * duplicates).astype(int)
+    xs[duplicates] = xs[originals] + rng.uniform(-0.05, 0.05, len(duplicates)) * FEATURE_SIZE
+    ys[duplicates] = ys[originals] + rng.uniform(-0.05, 0.05, len(duplicates)) * FEATURE_SIZE
+    return gpd.GeoDataFrame(
+        {
+            "name": [f"Object {i}" for i in range(size)],
+            "address": [f"Benchmark street, {i}" if i % 3 != 0 else None for i in range(size)],
+            "capacity": np.where(np.arange(size) % 2 == 0, rng.integers(1, 500, size), None),
+            "is_living": np.arange(size) % 2 == 1,
+            "living_area": rng.uniform(50, 5000, size).round(1),
+            "zone_type": [f"zone_{i % 3 + 1}" for i in range(size)],
+        },
+        geometry=shapely.box(xs, ys, xs + FEATURE_SIZE, ys + FEATURE_SIZE),
+        crs=4326,
+    )
+
+
+def write_inputs(directory: Path, features: gpd.GeoDataFrame) -> None:
+    """Write input files for all of the pipelines to the directory.
+
+    `input.geojson` is used by single file uploads, `bulk/` contains the same features split to files with their
+    `services.yaml` and `physical_objects.yaml` configs and `zones_names.yaml` is an identity zones names mapping.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    features.to_file(directory / "input.geojson")
+    bulk_dir = directory / "bulk"
+    bulk_dir.mkdir(exist_ok=True)
+    state = MockState()
+    filenames = []
+    for i, part in enumerate(np.array_split(np.arange(features.shape[0]), BULK_FILES)):
+        filename = f"part_{i}.geojson"
+        features.iloc[part].to_file(bulk_dir / filename)
+        filenames.append(filename)
+    physical_object_types = list(state.physical_object_types.values())[2:]
+    service_types = list(state.service_types.values())
+    with (directory / "services.yaml").open("w", encoding="utf-8") as file:
+        yaml.dump(
+            {
+                "filenames": {
+                    filename: {
+                        "service_type": service_types[i % len(service_types)],
+                        "physical_object_type": physical_object_types[i % len(physical_object_types)],
+                        "default_capacity": 100,
+                    }
+                    for i, filename in enumerate(filenames)
+                }
+            },
+            file,
+            allow_unicode=True,
+        )
+    with (directory / "physical_objects.yaml").open("w", encoding="utf-8") as file:
+        yaml.dump(
+            {
+                "filenames": {
+                    filename: physical_object_types[i % len(physical_object_types)]
+                    for i, filename in enumerate(filenames)
+                }
+            },
+            file,
+            allow_unicode=True,
+        )
+    with (directory / "zones_names.yaml").open("w", encoding="utf-8") as file:
+        yaml.dump({}, file)
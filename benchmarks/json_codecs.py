@@ -0,0 +1,169 @@
+"""Benchmark of Urban API client JSON codecs against the local mock Urban API.
+
+Mock Urban API is launched in a separate process, so CPU time of the benchmark process is spent by the client only:
+serializing request bodies, reading and validating responses. Usage:
+
+    python -m benchmarks.json_codecs run -r 100 --existing-objects 20000 --zones 200
+"""
+
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import click
+import numpy as np
+import shapely
+import structlog
+
+from benchmarks.uploaders import _REPOSITORY_ROOT, _get_free_port, _wait_for
+from pmv2.mock_api import MockState
+from pmv2.mock_api._state import MockTerritory
+from pmv2.urban_client.http import HTTPUrbanClient
+from pmv2.urban_client.http.codecs import JSON_CODECS, get_available_codecs, get_json_codec
+from pmv2.urban_client.models import PostFunctionalZone, shapely_to_geometry
+
+QUERY_SIZE = 0.02
+"""Side of the square (in degrees) objects are requested around."""
+
+ZONE_RADIUS = 0.005
+"""Radius of circle functional zones (in degrees)."""
+
+ROUNDS = 5
+"""Number of rounds requests of each route are split to, median of the rounds CPU time is reported."""
+
+
+@click.group()
+def main():
+    """Urban API client JSON codecs benchmarks."""
+
+
+@main.command("run")
+@click.option(
+    "--codec",
+    "-c",
+    "codecs",
+    type=click.Choice(list(JSON_CODECS)),
+    multiple=True,
+    help="Codecs to benchmark, all of the installed by default",
+)
+@click.option("--requests", "-r", type=int, default=100, show_default=True, help="Requests of each route per codec")
+@click.option("--existing-objects", type=int, default=20000, show_default=True, help="Physical objects in mock API")
+@click.option("--zones", type=int, default=200, show_default=True, help="Functional zones in mock API")
+@click.option("--output", "-o", type=click.Path(dir_okay=False, path_type=Path), help="Path to save JSON results")
+def run(codecs: tuple[str, ...], requests: int, existing_objects: int, zones: int, output: Path | None):
+    """Measure client CPU time per request of each route for each of the codecs and print results table."""
+    codecs = codecs or tuple(get_available_codecs())
+    port = _get_free_port()
+    env = os.environ | {"PYTHONPATH": os.pathsep.join(filter(None, [str(_REPOSITORY_ROOT), os.getenv("PYTHONPATH")]))}
+    with subprocess.Popen(
+        [sys.executable, "-m", "pmv2.mock_api", "--port", str(port), "--existing-objects", str(existing_objects)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    ) as mock_api:
+        try:
+            host = f"http://127.0.0.1:{port}"
+            _wait_for(host)
+            results = asyncio.run(_measure(host, codecs, requests, zones))
+        finally:
+            mock_api.terminate()
+    _print_results(results)
+    if output is not None:
+        output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+async def _measure(  # pylint: disable=too-many-locals
+    host: str, codecs: tuple[str, ...], requests: int, zones: int
+) -> list[dict[str, Any]]:
+    logging.basicConfig(level=logging.WARNING)
+    logger = structlog.wrap_logger(logging.getLogger("json_codecs"), wrapper_class=structlog.stdlib.BoundLogger)
+    root = MockState().get_roots()[0]
+    center = root.geometry.centroid
+    query = shapely.box(
+        center.x - QUERY_SIZE / 2, center.y - QUERY_SIZE / 2, center.x + QUERY_SIZE / 2, center.y + QUERY_SIZE / 2
+    )
+    upload_zone = await _add_zones(HTTPUrbanClient(host, logger, json_codec=get_json_codec("json")), root, zones)
+    clients = {codec: HTTPUrbanClient(host, logger, json_codec=get_json_codec(codec)) for codec in codecs}
+    routes: dict[str, Callable[[HTTPUrbanClient], Awaitable[Any]]] = {
+        "objects_around": lambda client: client.get_objects_around(query, 1),
+        "functional_zones_list": lambda client: client.get_functional_zones(root.territory_id, 1),
+        "functional_zones": lambda client: client.upload_functional_zone(upload_zone),
+    }
+    results = []
+    try:
+        for route, request in routes.items():
+            entities = {codec: await request(client) for codec, client in clients.items()}  # warm up connections
+            cpu_seconds = {codec: [] for codec in codecs}
+            for _ in range(ROUNDS):  # codecs are interleaved so they are equally affected by the mock API state
+                for codec, client in clients.items():
+                    start = time.process_time()
+                    for _ in range(max(requests // ROUNDS, 1)):
+                        await request(client)
+                    cpu_seconds[codec].append((time.process_time() - start) / max(requests // ROUNDS, 1))
+            for codec in codecs:
+                result = entities[codec]
+                results.append(
+                    {
+                        "route": route,
+                        "codec": codec,
+                        "entities": len(result) if hasattr(result, "__len__") else 1,
+                        "cpu_ms_per_request": float(np.median(cpu_seconds[codec])) * 1000,
+                    }
+                )
+    finally:
+        for client in clients.values():
+            await client.close()
+    baselines = {result["route"]: result["cpu_ms_per_request"] for result in results if result["codec"] == "json"}
+    for result in results:
+        baseline = baselines.get(result["route"])
+        result["saved_ms_per_request"] = baseline - result["cpu_ms_per_request"] if baseline is not None else None
+    return results
+
+
+async def _add_zones(client: HTTPUrbanClient, root: MockTerritory, zones: int) -> PostFunctionalZone:
+    """Upload circle zones of type 1 around the root territory center, return a zone of type 2 to upload."""
+    center = root.geometry.centroid
+    rng = np.random.default_rng(0)
+    geometries = shapely.buffer(
+        shapely.points(
+            rng.uniform(center.x - QUERY_SIZE, center.x + QUERY_SIZE, zones),
+            rng.uniform(center.y - QUERY_SIZE, center.y + QUERY_SIZE, zones),
+        ),
+        ZONE_RADIUS,
+        quad_segs=32,
+    )
+    try:
+        for geometry in geometries:
+            await client.upload_functional_zone(_make_zone(geometry, root.territory_id, 1))
+    finally:
+        await client.close()
+    return _make_zone(geometries[0], root.territory_id, 2)
+
+
+def _make_zone(geometry: shapely.geometry.base.BaseGeometry, territory_id: int, type_id: int) -> PostFunctionalZone:
+    return PostFunctionalZone(
+        geometry=shapely_to_geometry(geometry),
+        territory_id=territory_id,
+        functional_zone_type_id=type_id,
+        properties={"source": "benchmark"},
+    )
+
+
+def _print_results(results: list[dict[str, Any]]) -> None:
+    print(f"{'route':<24}{'codec':<10}{'entities':>10}{'CPU, ms':>11}{'saved, ms':>11}")
+    for result in results:
+        saved = f"{result['saved_ms_per_request']:.3f}" if result["saved_ms_per_request"] is not None else "-"
+        print(
+            f"{result['route']:<24}{result['codec']:<10}{result['entities']:>10}"
+            f"{result['cpu_ms_per_request']:>11.3f}{saved:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
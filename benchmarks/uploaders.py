@@ -0,0 +1,255 @@
+"""End-to-end benchmark of upload pipelines against the local mock Urban API.
+
+Every pipeline is launched through the pmv2 command line interface in a separate process (so peak RSS is measured
+for a single run) against a fresh mock Urban API process. Usage:
+
+    python -m benchmarks.uploaders run -n 1000 -n 10000 -p services -p buildings -w 8 --latency lognormal:0.02,0.5
+"""
+
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+import click
+import numpy as np
+
+from benchmarks.inputs import generate_features, write_inputs
+
+PIPELINES = {
+    "services": ["services", "upload-file", "-i", "input.geojson", "-s", "1", "-p", "3", "-dc", "10"],
+    "physical_objects": ["physical-objects", "upload-file", "-i", "input.geojson", "-p", "3"],
+    "buildings": ["buildings", "upload-file", "-i", "input.geojson", "--is-living-field", "is_living"],
+    "functional_zones": [
+        "functional-zones",
+        "upload-file",
+        "-i",
+        "input.geojson",
+        "--names-config",
+        "zones_names.yaml",
+        "-y",
+        "2024",
+        "-s",
+        "benchmark",
+        "--functional-zone-type-field",
+        "zone_type",
+    ],
+    "services_bulk": ["services", "upload-bulk", "-d", "bulk", "-c", "services.yaml"],
+    "physical_objects_bulk": ["physical-objects", "upload-bulk", "-d", "bulk", "-c", "physical_objects.yaml"],
+}
+"""pmv2 command arguments of each pipeline, relative to the inputs directory."""
+
+_PREFETCH_PIPELINES = {"services", "physical_objects", "buildings", "services_bulk", "physical_objects_bulk"}
+_REPOSITORY_ROOT = Path(__file__).resolve().parents[1]
+
+
+class _RowTimer:  # pylint: disable=too-few-public-methods
+    """Per-row latency tracker fed with row results.
+
+    Workers take the next row as soon as they are done with the previous one, so latency of a row is the time
+    between two consecutive results of the same worker task. First row of each worker is not measured.
+    """
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.rows = 0
+        self.errors = 0
+        self._last: dict[int, float] = {}
+
+    def record(self, success: bool) -> None:
+        """Record result of a row of the current worker."""
+        now = time.monotonic()
+        task = asyncio.current_task()
+        key = id(task) if task is not None else 0
+        if key in self._last:
+            self.latencies.append(now - self._last[key])
+        self._last[key] = now
+        self.rows += 1
+        self.errors += not success
+
+
+@click.group()
+def main():
+    """Upload pipelines benchmarks."""
+
+
+@main.command("run")
+@click.option(
+    "--pipeline",
+    "-p",
+    "pipelines",
+    type=click.Choice(list(PIPELINES)),
+    multiple=True,
+    help="Pipelines to benchmark, all by default",
+)
+@click.option(
+    "--size", "-n", "sizes", type=int, multiple=True, help="Numbers of input features, 1000 and 10000 by default"
+)
+@click.option("--density", type=float, default=100, show_default=True, help="Input features per square kilometer")
+@click.option("--duplicate-ratio", type=float, default=0.1, show_default=True, help="Share of existing objects")
+@click.option("--parallel-workers", "-w", default="8", show_default=True, help="Workers number or 'auto'")
+@click.option("--prefetch-objects", is_flag=True, help="Use physical objects prefetching where available")
+@click.option("--latency", default="lognormal:0.01,0.5", show_default=True, help="Mock API latency")
+@click.option("--capacity", type=int, help="Mock API capacity (requests processed at the same time)")
+@click.option("--failure-rate", type=float, default=0.0, show_default=True, help="Mock API failure rate")
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option(
+    "--work-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Directory for inputs and outputs, temporary one by default",
+)
+@click.option("--output", "-o", type=click.Path(dir_okay=False, path_type=Path), help="Path to save JSON results")
+def run(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    pipelines: tuple[str, ...],
+    sizes: tuple[int, ...],
+    density: float,
+    duplicate_ratio: float,
+    parallel_workers: str,
+    prefetch_objects: bool,
+    latency: str,
+    capacity: int | None,
+    failure_rate: float,
+    seed: int,
+    work_dir: Path | None,
+    output: Path | None,
+):
+    """Run benchmarks of the given pipelines for each of the input sizes and print results table."""
+    pipelines = pipelines or tuple(PIPELINES)
+    sizes = sizes or (1000, 10000)
+    mock_args = ["--latency", latency, "--failure-rate", str(failure_rate), "--seed", str(seed)]
+    if capacity is not None:
+        mock_args += ["--capacity", str(capacity)]
+    with tempfile.TemporaryDirectory(prefix="pmv2_benchmark_") as tmp_dir:
+        work_dir = work_dir or Path(tmp_dir)
+        results = []
+        for size in sizes:
+            inputs_dir = work_dir / f"inputs_{size}_{density:g}_{seed}"
+            if not (inputs_dir / "input.geojson").exists():
+                print(f"Generating {size} features")
+                write_inputs(inputs_dir, generate_features(size, density, duplicate_ratio, seed))
+            for pipeline in pipelines:
+                args = PIPELINES[pipeline] + ["-w", parallel_workers, "-o", f"{pipeline}.pickle"]
+                if prefetch_objects and pipeline in _PREFETCH_PIPELINES:
+                    args.append("--prefetch-objects")
+                print(f"Running {pipeline} on {size} features", flush=True)
+                result = _run_case(inputs_dir, args, mock_args)
+                results.append({"pipeline": pipeline, "size": size} | result)
+                _print_results(results[-1:], header=len(results) == 1)
+    if output is not None:
+        with output.open("w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+@main.command("case", hidden=True, context_settings={"ignore_unknown_options": True})
+@click.option("--host", required=True)
+@click.argument("args", nargs=-1, type=click.UNPROCESSED)
+def case(host: str, args: tuple[str, ...]):
+    """Run a single pmv2 command in the current process and print its measurements as JSON."""
+    from pmv2.cli import main as pmv2_main  # pylint: disable=import-outside-toplevel
+    from pmv2.logic.upload_results import UploadJournal  # pylint: disable=import-outside-toplevel
+
+    timer = _RowTimer()
+    original_write = UploadJournal.write
+
+    def write(journal: UploadJournal, filename, result) -> None:
+        timer.record(result.success)
+        original_write(journal, filename, result)
+
+    start = time.monotonic()
+    with mock.patch.object(UploadJournal, "write", write):
+        pmv2_main(  # pylint: disable=no-value-for-parameter
+            ["--host", host, "--log-level", "WARNING", *args], standalone_mode=False
+        )
+    elapsed = time.monotonic() - start
+
+    with urllib.request.urlopen(f"{host}/mock/requests") as resp:
+        requests = json.load(resp)
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    latencies = np.array(timer.latencies) if len(timer.latencies) > 0 else np.zeros(1)
+    result = {
+        "rows": timer.rows,
+        "errors": timer.errors,
+        "seconds": elapsed,
+        "rows_per_second": timer.rows / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "http_calls": sum(requests.values()),
+        "http_calls_per_row": sum(requests.values()) / max(timer.rows, 1),
+        "http_calls_by_route": requests,
+        "peak_rss_mb": max_rss / 1024**2 if sys.platform == "darwin" else max_rss / 1024,
+    }
+    print(json.dumps(result))
+
+
+def _run_case(inputs_dir: Path, args: list[str], mock_args: list[str]) -> dict[str, Any]:
+    port = _get_free_port()
+    env = os.environ | {"PYTHONPATH": os.pathsep.join(filter(None, [str(_REPOSITORY_ROOT), os.getenv("PYTHONPATH")]))}
+    with subprocess.Popen(
+        [sys.executable, "-m", "pmv2.mock_api", "--port", str(port), *mock_args],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    ) as mock_api:
+        try:
+            host = f"http://127.0.0.1:{port}"
+            _wait_for(host)
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.uploaders", "case", "--host", host, *args],
+                cwd=inputs_dir,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+        finally:
+            mock_api.terminate()
+    if proc.returncode != 0:
+        raise click.ClickException(f"Benchmark case {' '.join(args)} failed:\n{proc.stderr[-5000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(host: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f"{host}/health_check/ping", timeout=1):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def _print_results(results: list[dict[str, Any]], header: bool = True) -> None:
+    columns = [
+        ("size", "size", "d"),
+        ("errors", "errors", "d"),
+        ("rows_per_second", "rows/s", ".1f"),
+        ("p50_ms", "p50, ms", ".1f"),
+        ("p99_ms", "p99, ms", ".1f"),
+        ("http_calls_per_row", "calls/row", ".2f"),
+        ("peak_rss_mb", "RSS, MB", ".1f"),
+    ]
+    if header:
+        print(f"{'pipeline':<22}" + "".join(f"{title:>11}" for _, title, _ in columns))
+    for result in results:
+        print(f"{result['pipeline']:<22}" + "".join(f"{result[name]:>11{fmt}}" for name, _, fmt in columns), flush=True)
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,30 @@
+"""Upload journal helpers for upload commands are defined here."""
+
+from pathlib import Path
+
+import structlog
+
+from pmv2.logic.upload_results import UploadJournal
+
+
+def open_journal(
+    output_file: Path, resume_journal: Path | None, logger: structlog.stdlib.BoundLogger
+) -> tuple[UploadJournal, dict[str, set[int]]]:
+    """Prepare upload journal and get indexes of rows uploaded before for each of the input files.
+
+    If `resume_journal` is set, it is continued and rows uploaded according to it are returned, otherwise a new
+    journal is created next to the output file.
+    """
+    if resume_journal is None:
+        journal = UploadJournal(output_file.with_suffix(".jsonl"))
+        uploaded_before = {}
+    else:
+        journal = UploadJournal(resume_journal)
+        uploaded_before = UploadJournal.read_uploaded(resume_journal)
+        logger.info(
+            "Resuming upload from journal",
+            journal=str(resume_journal),
+            uploaded_before=sum(len(indexes) for indexes in uploaded_before.values()),
+        )
+    logger.info("Writing upload journal", journal=str(journal.path))
+    return journal, uploaded_before
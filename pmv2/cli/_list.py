@@ -8,15 +8,12 @@ import click
 
 from pmv2.logic import list_territories as territories_logic
 
-from ._main import Config, main, pass_config
+from ._main import Config, main, pass_config, with_urban_client
 
 
 @main.group("list")
-@pass_config
-def list_group(config: Config):
+def list_group():
     """List entities values."""
-    if not asyncio.run(config.urban_client.is_alive()):
-        print("Urban API at is unavailable, exiting")
 
 
 @list_group.command("territories")
@@ -27,17 +24,44 @@ def list_group(config: Config):
     type=int,
     help="Maximum level of territories printed",
 )
+@click.option(
+    "--parallel-workers",
+    "-w",
+    type=int,
+    default=8,
+    show_default=True,
+    help="Number of inner territories requests executed in parallel",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Print territories level by level as soon as each of them is loaded instead of a hierarchy at the end",
+)
 def list_territories(
     config: Config,
     max_level: int | None,
+    parallel_workers: int,
+    stream: bool,
 ):
     """List territories available in Urban API in hierarchy format."""
     urban_client = config.urban_client
-    territories = asyncio.run(territories_logic.get_territories(urban_client, max_level))
+    urban_client.set_concurrency_limit(parallel_workers)
+    territories = asyncio.run(
+        with_urban_client(
+            config,
+            lambda: territories_logic.get_territories(
+                urban_client,
+                max_level,
+                parallel_workers,
+                territories_logic.print_territories_level if stream else None,
+            ),
+        )
+    )
     if len(territories) == 0:
         print("There are no territories available")
         return
-    territories_logic.print_terrirories(territories)
+    if not stream:
+        territories_logic.print_terrirories(territories)
 
 
 @list_group.command("service-types")
@@ -65,7 +89,7 @@ def list_service_types(
 ):
     """List service types available in Urban API."""
     urban_client = config.urban_client
-    service_types = asyncio.run(urban_client.get_service_types())
+    service_types = asyncio.run(with_urban_client(config, urban_client.get_service_types))
     if len(service_types) == 0:
         print("There are no service_types available")
         return
@@ -105,7 +129,7 @@ def list_physical_object_types(
 ):
     """List physical_object types available in Urban API."""
     urban_client = config.urban_client
-    physical_object_types = asyncio.run(urban_client.get_physical_object_types())
+    physical_object_types = asyncio.run(with_urban_client(config, urban_client.get_physical_object_types))
     if len(physical_object_types) == 0:
         print("There are no physical_object_types available")
         return
@@ -146,7 +170,7 @@ def list_functional_zone_types(
 ):
     """List functional_zone types available in Urban API."""
     urban_client = config.urban_client
-    functional_zone_types = asyncio.run(urban_client.get_functional_zone_types())
+    functional_zone_types = asyncio.run(with_urban_client(config, urban_client.get_functional_zone_types))
     if len(functional_zone_types) == 0:
         print("There are no functional_zone available")
         return
@@ -1,18 +1,31 @@
 """Click entrypoint is defined here."""
 
-import asyncio
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 from dataclasses import dataclass
-from typing import Literal
+from pathlib import Path
+from typing import Awaitable, Callable, Literal, TypeVar
 
 import click
 import structlog
 from dotenv import load_dotenv
 
 from pmv2._version import VERSION
-from pmv2.urban_client import UrbanClient, make_http_client
+from pmv2.urban_client import (
+    CachedTypesUrbanClient,
+    InstrumentedUrbanClient,
+    LocalTerritoriesUrbanClient,
+    Metrics,
+    UrbanClient,
+    make_http_client,
+)
+from pmv2.urban_client.http.codecs import JSON_CODECS
+from pmv2.urban_client.http.rate_limits import parse_rate_limit
+from pmv2.urban_client.metrics import set_current_metrics
 
 load_dotenv(os.environ.get("ENVFILE", ".env"))
 
@@ -23,14 +36,88 @@ class Config:
 
     urban_client: UrbanClient
     logger: structlog.stdlib.BoundLogger
+    host: str
 
 
 pass_config = click.make_pass_decorator(Config)
 
+_T = TypeVar("_T")
+
+
+async def with_urban_client(config: Config, func: Callable[[], Awaitable[_T]]) -> _T:
+    """Open Urban API client of the config, check that API is available and execute the given function in the same
+    session.
+
+    Exit the program if Urban API is unavailable.
+    """
+    async with config.urban_client:
+        if not await config.urban_client.is_alive():
+            config.logger.error("Urban API is unavailable, exiting", host=config.host)
+            sys.exit(1)
+        return await func()
+
+
+class ParallelWorkersType(click.ParamType):
+    """Number of parallel workers or "auto" to adjust requests concurrency by Urban API responsiveness."""
+
+    name = "integer|auto"
+
+    def convert(self, value, param, ctx) -> int | Literal["auto"]:
+        if isinstance(value, int) or value == "auto":
+            return value
+        try:
+            return int(value)
+        except ValueError:
+            self.fail(f"{value!r} is neither an integer nor 'auto'", param, ctx)
+
+
+PARALLEL_WORKERS = ParallelWorkersType()
+
+
+class RateLimitType(click.ParamType):
+    """Route rate limit in format "<route>=<requests per second>[:<burst>]"."""
+
+    name = "route=rate[:burst]"
+
+    def convert(self, value, param, ctx) -> tuple[str, float, float | None]:
+        if isinstance(value, tuple):
+            return value
+        try:
+            return parse_rate_limit(value)
+        except ValueError as exc:
+            self.fail(str(exc), param, ctx)
+
+
+AUTO_MAX_WORKERS = 64
+"""Number of workers started in `--parallel-workers auto` mode, requests concurrency is limited adaptively."""
+
+
+def apply_parallel_workers(urban_client: UrbanClient, parallel_workers: int | Literal["auto"]) -> int:
+    """Set Urban API client concurrency for the given `--parallel-workers` option value and return number of
+    workers to start.
+    """
+    if parallel_workers == "auto":
+        urban_client.set_adaptive_concurrency(AUTO_MAX_WORKERS)
+        return AUTO_MAX_WORKERS
+    urban_client.set_concurrency_limit(parallel_workers)
+    return parallel_workers
+
+
 _LogLevel = Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
 
 
-def _configure_logging(log_level: _LogLevel, files: dict[str, _LogLevel] | None = None) -> structlog.stdlib.BoundLogger:
+def _configure_logging(
+    log_level: _LogLevel,
+    files: dict[str, _LogLevel] | None = None,
+    max_file_size: int = 100 * 1024 * 1024,
+    file_backups: int = 5,
+) -> structlog.stdlib.BoundLogger:
+    """Configure logging to stderr with `log_level` and to JSON lines files with their levels.
+
+    Records are formatted in the calling thread, only file writing is done by a background listener thread, so
+    uploading does not wait for disk. Files are rotated when they reach `max_file_size` bytes, `file_backups`
+    previous files are kept.
+    """
     level_name_mapping = {
         "DEBUG": logging.DEBUG,
         "INFO": logging.INFO,
@@ -42,6 +129,7 @@ def _configure_logging(log_level: _LogLevel, files: dict[str, _LogLevel] | None
         files = {}
     structlog.configure(
         processors=[
+            structlog.stdlib.filter_by_level,
             structlog.contextvars.merge_contextvars,
             structlog.stdlib.add_log_level,
             structlog.stdlib.add_logger_name,
@@ -56,21 +144,33 @@ def _configure_logging(log_level: _LogLevel, files: dict[str, _LogLevel] | None
     )
 
     logger: structlog.stdlib.BoundLogger = structlog.get_logger()
-    logger.setLevel(level_name_mapping[log_level])
+    logger.setLevel(min(level_name_mapping[level] for level in [log_level, *files.values()]))
 
     console_handler = logging.StreamHandler(sys.stderr)
     console_handler.setFormatter(
         structlog.stdlib.ProcessorFormatter(processor=structlog.dev.ConsoleRenderer(colors=True))
     )
+    console_handler.setLevel(level_name_mapping[log_level])
 
     root_logger = logging.getLogger()
     root_logger.addHandler(console_handler)
 
-    for filename, level in files.items():
-        file_handler = logging.FileHandler(filename=filename, encoding="utf-8")
-        file_handler.setFormatter(structlog.stdlib.ProcessorFormatter(processor=structlog.processors.JSONRenderer()))
-        file_handler.setLevel(level_name_mapping[level])
-        root_logger.addHandler(file_handler)
+    if len(files) > 0:
+        file_handlers = []
+        for filename, level in files.items():
+            file_handler = logging.handlers.RotatingFileHandler(
+                filename, maxBytes=max_file_size, backupCount=file_backups, encoding="utf-8", delay=True
+            )
+            file_handler.setLevel(level_name_mapping[level])
+            file_handlers.append(file_handler)
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setFormatter(structlog.stdlib.ProcessorFormatter(processor=structlog.processors.JSONRenderer()))
+        queue_handler.setLevel(min(handler.level for handler in file_handlers))
+        root_logger.addHandler(queue_handler)
+        listener = logging.handlers.QueueListener(log_queue, *file_handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
 
     root_logger.setLevel("INFO")
 
@@ -91,17 +191,205 @@ def _configure_logging(log_level: _LogLevel, files: dict[str, _LogLevel] | None
 @click.option(
     "--log-level",
     type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], case_sensitive=False),
-    default="DEBUG",
+    default="INFO",
     envvar="LOG_LEVEL",
     show_envvar=True,
     show_default=True,
     help="Level for logging",
 )
-def main(ctx: click.Context, host: str, log_level):
+@click.option(
+    "--log-file",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default="pmv2.log",
+    envvar="LOG_FILE",
+    show_envvar=True,
+    show_default=True,
+    help="Path to JSON lines log file",
+)
+@click.option(
+    "--log-file-level",
+    type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL", "OFF"], case_sensitive=False),
+    default="INFO",
+    envvar="LOG_FILE_LEVEL",
+    show_envvar=True,
+    show_default=True,
+    help="Level for logging to file, OFF to disable log file",
+)
+@click.option(
+    "--log-file-max-size",
+    type=click.IntRange(min=1),
+    default=100,
+    envvar="LOG_FILE_MAX_SIZE",
+    show_envvar=True,
+    show_default=True,
+    help="Size (in megabytes) of log file to rotate it at",
+)
+@click.option(
+    "--log-file-backups",
+    type=click.IntRange(min=0),
+    default=5,
+    envvar="LOG_FILE_BACKUPS",
+    show_envvar=True,
+    show_default=True,
+    help="Number of rotated log files to keep",
+)
+@click.option(
+    "--log-bodies-every",
+    type=click.IntRange(min=0),
+    default=100,
+    envvar="LOG_BODIES_EVERY",
+    show_envvar=True,
+    show_default=True,
+    help="Log body of every n-th Urban API request at DEBUG level, 0 to never log bodies",
+)
+@click.option(
+    "--log-body-max-length",
+    type=click.IntRange(min=0),
+    default=1000,
+    envvar="LOG_BODY_MAX_LENGTH",
+    show_envvar=True,
+    show_default=True,
+    help="Number of characters to truncate logged Urban API request bodies to",
+)
+@click.option(
+    "--json-codec",
+    type=click.Choice(["auto", *JSON_CODECS]),
+    default="auto",
+    envvar="JSON_CODEC",
+    show_envvar=True,
+    show_default=True,
+    help="JSON library for Urban API bodies, the fastest installed one (orjson, msgspec, json) for auto",
+)
+@click.option(
+    "--region-id",
+    type=int,
+    envvar="REGION_ID",
+    show_envvar=True,
+    help="Identifier of a territory to load territories geometries of, so common territories of uploaded objects"
+    " would be resolved locally when possible",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    envvar="CACHE_DIR",
+    show_envvar=True,
+    help="Directory to save service, physical object and functional zone types lists to between launches",
+)
+@click.option(
+    "--cache-ttl",
+    type=int,
+    default=24 * 60 * 60,
+    envvar="CACHE_TTL",
+    show_envvar=True,
+    show_default=True,
+    help="Time (in seconds) for cached types lists to be considered valid",
+)
+@click.option(
+    "--refresh-cache",
+    is_flag=True,
+    help="Ignore existing cached types lists and request them again",
+)
+@click.option(
+    "--max-retries",
+    type=click.IntRange(min=0),
+    default=3,
+    envvar="MAX_RETRIES",
+    show_envvar=True,
+    show_default=True,
+    help="Number of times failed Urban API request is repeated (creating requests are repeated only if it is safe)",
+)
+@click.option(
+    "--circuit-breaker-threshold",
+    type=click.IntRange(min=0),
+    default=10,
+    envvar="CIRCUIT_BREAKER_THRESHOLD",
+    show_envvar=True,
+    show_default=True,
+    help="Number of consecutive failed requests after which all requests are paused, 0 to never pause",
+)
+@click.option(
+    "--circuit-breaker-pause",
+    type=float,
+    default=30.0,
+    envvar="CIRCUIT_BREAKER_PAUSE",
+    show_envvar=True,
+    show_default=True,
+    help="Time (in seconds) to pause requests for before checking if Urban API is back",
+)
+@click.option(
+    "--rate-limit",
+    type=RateLimitType(),
+    multiple=True,
+    envvar="RATE_LIMITS",
+    show_envvar=True,
+    help="Limit of requests per second for Urban API route (path, path template like"
+    " /api/v1/physical_objects/{id}/geometries or * for all requests), can be set multiple times",
+)
+@click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    envvar="METRICS_FILE",
+    show_envvar=True,
+    help="Path to save Urban API calls and uploading stages metrics to, in Prometheus text format for .prom files"
+    " and as JSON summary otherwise",
+)
+@click.option(
+    "--metrics-interval",
+    type=click.FloatRange(min=0),
+    default=30.0,
+    envvar="METRICS_INTERVAL",
+    show_envvar=True,
+    show_default=True,
+    help="Time (in seconds) between metrics file updates during the run, 0 to save metrics only at the end",
+)
+def main(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    ctx: click.Context,
+    host: str,
+    log_level,
+    log_file: Path,
+    log_file_level: str,
+    log_file_max_size: int,
+    log_file_backups: int,
+    log_bodies_every: int,
+    log_body_max_length: int,
+    json_codec: str,
+    region_id: int | None,
+    cache_dir: Path | None,
+    cache_ttl: int,
+    refresh_cache: bool,
+    max_retries: int,
+    circuit_breaker_threshold: int,
+    circuit_breaker_pause: float,
+    rate_limit: tuple[tuple[str, float, float | None], ...],
+    metrics_file: Path | None,
+    metrics_interval: float,
+):
     """Platform manipulation command line script."""
-    logger = _configure_logging(log_level, {"./pmv2.log": "DEBUG"})
+    logger = _configure_logging(
+        log_level,
+        {str(log_file): log_file_level} if log_file_level != "OFF" else {},
+        log_file_max_size * 1024 * 1024,
+        log_file_backups,
+    )
 
-    urban_client = make_http_client(host, logger)
-    if not asyncio.run(urban_client.is_alive()):
-        logger.warning("urban_api unavailable", host=host)
-    ctx.obj = Config(urban_client, logger)
+    urban_client = make_http_client(
+        host,
+        logger,
+        max_retries=max_retries,
+        circuit_breaker_threshold=circuit_breaker_threshold,
+        circuit_breaker_pause=circuit_breaker_pause,
+        rate_limits=rate_limit,
+        log_bodies_every=log_bodies_every,
+        log_body_max_length=log_body_max_length,
+        json_codec=json_codec,
+    )
+    urban_client = CachedTypesUrbanClient(
+        urban_client, host, cache_dir, ttl=cache_ttl, refresh=refresh_cache, logger=logger
+    )
+    if region_id is not None:
+        urban_client = LocalTerritoriesUrbanClient(urban_client, region_id, logger)
+    if metrics_file is not None:
+        metrics = Metrics()
+        set_current_metrics(metrics)
+        urban_client = InstrumentedUrbanClient(urban_client, metrics, metrics_file, metrics_interval, logger)
+    ctx.obj = Config(urban_client, logger, host)
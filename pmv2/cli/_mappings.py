@@ -0,0 +1,72 @@
+"""CLI mappings of input files columns to uploaded entities fields are defined here.
+
+This mappings should be used like an example to create a custom mapping for a given input file structure
+(see `pmv2.logic.mapping`).
+"""
+
+from pmv2.logic.mapping import EntityMapping, FieldMapping, PropertiesMapping
+
+DEFAULT_SERVICE_NAME = "(Сервис без названия)"
+DEFAULT_PHYSICAL_OBJECT_NAME = "(Безымянный физический объект)"
+DEFAULT_NAME_ATTRIBUTES = ["name", "name:ru", "name:en", "description"]
+
+PHYSICAL_OBJECT_MAPPING = EntityMapping()
+"""Physical object without address and name with all of the input columns as properties."""
+
+PHYSICAL_OBJECT_BULK_MAPPING = EntityMapping(
+    fields={"address": FieldMapping(columns=["address"]), "name": FieldMapping(columns=["name"])}
+)
+"""Physical object with address and name taken from the same columns and the rest of columns as properties."""
+
+SERVICE_PHYSICAL_OBJECT_MAPPING = EntityMapping(
+    fields={
+        "address": FieldMapping(columns=["address"]),
+        "name": FieldMapping(
+            columns=DEFAULT_NAME_ATTRIBUTES,
+            check="string",
+            template="(Физический объект для сервиса {})",
+            default=DEFAULT_PHYSICAL_OBJECT_NAME,
+        ),
+    },
+    properties=PropertiesMapping(mode="columns", columns=[DEFAULT_NAME_ATTRIBUTES]),
+)
+"""Physical object of a service named after the service and the service name as the only property."""
+
+BUILDING_PHYSICAL_OBJECT_MAPPING = EntityMapping(
+    fields={"name": FieldMapping(default=DEFAULT_PHYSICAL_OBJECT_NAME)}, properties=PropertiesMapping(mode="none")
+)
+"""Physical object of a building without address and properties, building data is set to the living building."""
+
+LIVING_BUILDING_MAPPING = EntityMapping(
+    fields={"residents_number": FieldMapping(), "living_area": FieldMapping(columns=["living_area"])}
+)
+"""Living building with living area from the same column and the rest of columns as properties."""
+
+
+def get_service_mapping(default_capacity: int) -> EntityMapping:
+    """Get service mapping with name and capacity from the commonly used columns, services without capacity get
+    `default_capacity` and "is_capacity_real" property set to false.
+    """
+    return EntityMapping(
+        fields={
+            "name": FieldMapping(columns=DEFAULT_NAME_ATTRIBUTES, default=DEFAULT_SERVICE_NAME),
+            "capacity_real": FieldMapping(
+                columns=["capacity", "мощность"],
+                check="integer",
+                default=default_capacity,
+                properties_if_default={"is_capacity_real": False},
+            ),
+        }
+    )
+
+
+def get_functional_zone_mapping(functional_zone_type_column: str, year: int, source: str) -> EntityMapping:
+    """Get functional zone mapping with type taken from the given column and the rest of columns with `year`
+    and `source` as properties.
+    """
+    return EntityMapping(
+        fields={"functional_zone_type": FieldMapping(columns=[functional_zone_type_column], check="present")},
+        properties=PropertiesMapping(
+            mode="rest", exclude=[functional_zone_type_column], constants={"year": year, "source": source}
+        ),
+    )
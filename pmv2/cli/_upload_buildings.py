@@ -6,15 +6,17 @@ import pickle
 import sys
 import time
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Literal
 
 import click
 import geopandas as gpd
 
 from pmv2.logic import upload_buildings as logic
+from pmv2.logic.geojson_reader import GeoJSONReader
 
-from . import _mappers
-from ._main import Config, main, pass_config
+from . import _mappings
+from ._journal import open_journal
+from ._main import PARALLEL_WORKERS, Config, apply_parallel_workers, main, pass_config, with_urban_client
 
 
 @main.group("buildings")
@@ -46,10 +48,28 @@ NON_LIVING_BUILDING_NAME = "Здание"
 @click.option(
     "--parallel-workers",
     "-w",
-    type=int,
+    type=PARALLEL_WORKERS,
     default=1,
     show_default=True,
-    help="Number of workers to upload buildings in parallel",
+    help="Number of workers to upload buildings in parallel, 'auto' to adjust it by Urban API responsiveness",
+)
+@click.option(
+    "--prefetch-objects",
+    is_flag=True,
+    help="Download existing physical objects around input geometries once and match them locally",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=10_000,
+    show_default=True,
+    help="Number of features read from input file at once",
+)
+@click.option(
+    "--resume",
+    "resume_journal",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Path to upload journal of an interrupted run to skip already uploaded objects and continue the journal",
 )
 @click.option(
     "--output-pickle",
@@ -59,13 +79,16 @@ NON_LIVING_BUILDING_NAME = "Здание"
     show_default="uploaded_one_<timestamp>.pickle",
     help="Output path for uploaded buildings data",
 )
-def upload_file(  # pylint: disable=too-many-locals
+def upload_file(  # pylint: disable=too-many-arguments,too-many-locals
     config: Config,
     *,
     input_file: Path,
     is_living_field: str,
-    parallel_workers: int,
+    parallel_workers: int | Literal["auto"],
+    prefetch_objects: bool,
+    chunk_size: int,
     output_file: Path | None,
+    resume_journal: Path | None,
 ):
     """Upload a single geojson of buildings data.
 
@@ -76,26 +99,9 @@ def upload_file(  # pylint: disable=too-many-locals
     if output_file.is_dir():
         output_file = output_file / f"uploaded_one_{int(time.time())}.pickle"
     urban_client = config.urban_client
+    parallel_workers = apply_parallel_workers(urban_client, parallel_workers)
+    journal, uploaded_before = open_journal(output_file, resume_journal, config.logger)
     logger = config.logger
-    if not asyncio.run(urban_client.is_alive()):
-        print("Urban API at is unavailable, exiting")
-        sys.exit(1)
-    physical_object_types = asyncio.run(urban_client.get_physical_object_types())
-    try:
-        living_type_id = next(filter(lambda x: x.name == LIVING_BUILDING_NAME, physical_object_types))
-        non_living_type_id = next(filter(lambda x: x.name == NON_LIVING_BUILDING_NAME, physical_object_types))
-    except Exception:  # pylint: disable=broad-except
-        logger.exception(
-            "Error on getting living and non-living buildings physical objects types",
-            living_name=LIVING_BUILDING_NAME,
-            non_living_name=NON_LIVING_BUILDING_NAME,
-        )
-        sys.exit(1)
-    physical_object_type_mapper = _get_physical_object_type_mapping_function(
-        field_to_check=is_living_field,
-        living_type_id=living_type_id.physical_object_type_id,
-        non_living_type_id=non_living_type_id.physical_object_type_id,
-    )
     results: dict[str, Any] = {
         "type": "upload_buildings",
         "time_start": datetime.datetime.now(),
@@ -104,48 +110,69 @@ def upload_file(  # pylint: disable=too-many-locals
             "is_living_field": is_living_field,
         },
     }
-    gdf: gpd.GeoDataFrame = gpd.read_file(input_file)
-    gdf = gdf.drop_duplicates().dropna(subset="geometry").to_crs(4326)
-    print(f"Read file {input_file.name} - {gdf.shape[0]} objects after filtering")
     po_uploader = logic.PhysicalObjectsUploader(
         urban_client,
-        po_address_mapper=_mappers.get_attribute_mapper(["address"]),
-        po_name_mapper=_mappers.get_func_mapper(
-            ["osm_data"],
-            _mappers.get_string_checker_func(lambda name: f"(Физический объект для здания {name})"),
-            "(Безымянный физический объект)",
-        ),
-        po_properties_mapper=_mappers.full_dictionary_mapper,
+        mapping=_mappings.BUILDING_PHYSICAL_OBJECT_MAPPING,
         logger=config.logger,
     )
     uploader = logic.BuildingsUploader(
         urban_client,
         po_uploader=po_uploader,
-        residents_number_mapper=_mappers.none_mapper,
-        living_area_mapper=_mappers.get_attribute_mapper(["living_area"]),
-        living_building_properties_mapper=_mappers.full_dictionary_mapper,
-        po_data_mapper=_mappers.empty_dict_mapper,
+        mapping=_mappings.LIVING_BUILDING_MAPPING,
         logger=logger,
     )
-    try:
-        uploaded, errors = asyncio.run(
-            uploader.upload_buildings(
-                gdf,
-                physical_object_type_mapper=physical_object_type_mapper,
-                parallel_workers=parallel_workers,
+    prefetch_type_ids: list[int] = []
+
+    async def prefetch(chunk: gpd.GeoDataFrame) -> None:
+        for physical_object_type_id in prefetch_type_ids:
+            await po_uploader.prefetch_objects(chunk.geometry, physical_object_type_id, parallel_workers)
+
+    reader = GeoJSONReader(input_file, chunk_size, on_chunk=prefetch if prefetch_objects else None)
+    print(f"Reading file {input_file.name} by chunks of {chunk_size} objects")
+
+    async def upload() -> tuple[int, gpd.GeoDataFrame | None]:
+        physical_object_types = await urban_client.get_physical_object_types()
+        try:
+            living_type_id = next(filter(lambda x: x.name == LIVING_BUILDING_NAME, physical_object_types))
+            non_living_type_id = next(filter(lambda x: x.name == NON_LIVING_BUILDING_NAME, physical_object_types))
+        except Exception:  # pylint: disable=broad-except
+            logger.exception(
+                "Error on getting living and non-living buildings physical objects types",
+                living_name=LIVING_BUILDING_NAME,
+                non_living_name=NON_LIVING_BUILDING_NAME,
             )
+            sys.exit(1)
+        physical_object_type_mapper = _get_physical_object_type_mapping_function(
+            field_to_check=is_living_field,
+            living_type_id=living_type_id.physical_object_type_id,
+            non_living_type_id=non_living_type_id.physical_object_type_id,
+        )
+        prefetch_type_ids.extend(
+            physical_object_type.physical_object_type_id
+            for physical_object_type in (living_type_id, non_living_type_id)
+        )
+        return await uploader.upload_buildings(
+            reader,
+            physical_object_type_mapper=physical_object_type_mapper,
+            parallel_workers=parallel_workers,
+            result_sink=journal.get_sink(input_file.name),
+            skip_indexes=uploaded_before.get(input_file.name),
         )
+
+    try:
+        with journal:
+            uploaded, errors = asyncio.run(with_urban_client(config, upload))
     except KeyboardInterrupt:
-        config.logger.error("Got interruption signal, impossible to save results")
+        config.logger.error("Got interruption signal, uploaded objects are saved in journal", journal=str(journal.path))
         sys.exit(1)
 
-    results["uploaded"] = [u.model_dump() for u in uploaded]
     results["errors"] = errors.to_geo_dict() if errors is not None else None
-    results["metadata"] = {"total": gdf.shape[0], "uploaded": len(uploaded)}
+    results["metadata"] = {"total": reader.total, "uploaded": uploaded}
     config.logger.info("Finished", log_filename=output_file.name)
     results["time_finish"] = datetime.datetime.now()
+    results["journal"] = str(journal.path)
     with open(output_file, "wb") as file:
-        pickle.dump(uploaded, file)
+        pickle.dump(results, file)
 
 
 def _get_physical_object_type_mapping_function(
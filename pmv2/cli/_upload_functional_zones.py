@@ -6,16 +6,19 @@ import pickle
 import sys
 import time
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Literal
 
 import click
 import geopandas as gpd
 import structlog
 import yaml
 
+from pmv2.logic.geojson_reader import GeoJSONReader, read_column
 from pmv2.logic.upload_functional_zones import FunctionalZonesUploader
 
-from ._main import Config, main, pass_config
+from . import _mappings
+from ._journal import open_journal
+from ._main import PARALLEL_WORKERS, Config, apply_parallel_workers, main, pass_config, with_urban_client
 
 
 @main.group("functional-zones")
@@ -65,9 +68,22 @@ DEFAULT_NAME_ATTRIBUTES = ["name", "name:ru", "name:en", "description"]
 @click.option(
     "--parallel-workers",
     "-w",
-    type=int,
+    type=PARALLEL_WORKERS,
     default=1,
-    help="Number of workers to upload services in parallel",
+    help="Number of workers to upload services in parallel, 'auto' to adjust it by Urban API responsiveness",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=10_000,
+    show_default=True,
+    help="Number of features read from input file at once",
+)
+@click.option(
+    "--resume",
+    "resume_journal",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Path to upload journal of an interrupted run to skip already uploaded objects and continue the journal",
 )
 @click.option(
     "--output-pickle",
@@ -84,9 +100,11 @@ def upload_file(  # pylint: disable=too-many-arguments,too-many-locals
     input_file: Path,
     year: int,
     source: str,
-    parallel_workers: int,
+    parallel_workers: int | Literal["auto"],
     functional_zone_type_field: str,
+    chunk_size: int,
     output_file: Path | None,
+    resume_journal: Path | None,
 ):
     """Upload a single geojson of services data.
 
@@ -97,9 +115,8 @@ def upload_file(  # pylint: disable=too-many-arguments,too-many-locals
     if output_file.is_dir():
         output_file = output_file / f"uploaded_one_{int(time.time())}.pickle"
     urban_client = config.urban_client
-    if not asyncio.run(urban_client.is_alive()):
-        print("Urban API at is unavailable, exiting")
-        sys.exit(1)
+    parallel_workers = apply_parallel_workers(urban_client, parallel_workers)
+    journal, uploaded_before = open_journal(output_file, resume_journal, config.logger)
 
     with names_config.open("r", encoding="utf-8") as file:
         fzt_names_mapping = yaml.safe_load(file)
@@ -109,9 +126,6 @@ def upload_file(  # pylint: disable=too-many-arguments,too-many-locals
             return fzt_names_mapping[s]
         return str(s)
 
-    functional_zone_types = asyncio.run(urban_client.get_functional_zone_types())
-    fz_types = {fzt.name: fzt.functional_zone_type_id for fzt in functional_zone_types}
-
     results: dict[str, Any] = {
         "type": "upload_functional_zones",
         "time_start": datetime.datetime.now(),
@@ -122,40 +136,48 @@ def upload_file(  # pylint: disable=too-many-arguments,too-many-locals
         },
     }
 
-    gdf: gpd.GeoDataFrame = gpd.read_file(input_file)
-    gdf = gdf.drop_duplicates().dropna(subset="geometry").to_crs(4326)
-    print(f"Read file {input_file.name} - {gdf.shape[0]} objects after filtering")
-
-    if functional_zone_type_field not in gdf.columns:
-        print(f"Missing functional_zone_type field: '{functional_zone_type_field}'")
-        sys.exit(1)
-    fzt_file = set(map(map_fzt_name, gdf[functional_zone_type_field]))
-    if len(fzt_file - set(fz_types)) > 0:
-        print("Following functional_zone_type values cannot be mapped:", ", ".join(sorted(fzt_file - set(fz_types))))
-        sys.exit(1)
-
     uploader = FunctionalZonesUploader(
         urban_client,
-        properties_mapper=_get_additionals_properties_mapper({"year": year, "source": source}),
+        mapping=_mappings.get_functional_zone_mapping(functional_zone_type_field, year, source),
         logger=config.logger,
     )
-    try:
-        uploaded, errors = asyncio.run(
-            uploader.upload_functional_zones(
-                gdf,
-                functional_zone_type_mapper=lambda d: fz_types[map_fzt_name(d.pop(functional_zone_type_field, None))],
-                parallel_workers=parallel_workers,
+
+    file_types = read_column(input_file, functional_zone_type_field)
+    if file_types is None:
+        print(f"Missing functional_zone_type field: '{functional_zone_type_field}'")
+        sys.exit(1)
+    reader = GeoJSONReader(input_file, chunk_size)
+
+    async def upload() -> tuple[int, gpd.GeoDataFrame | None]:
+        functional_zone_types = await urban_client.get_functional_zone_types()
+        fz_types = {fzt.name: fzt.functional_zone_type_id for fzt in functional_zone_types}
+        fzt_file = set(map(map_fzt_name, file_types))
+        if len(fzt_file - set(fz_types)) > 0:
+            print(
+                "Following functional_zone_type values cannot be mapped:", ", ".join(sorted(fzt_file - set(fz_types)))
             )
+            sys.exit(1)
+        print(f"Reading file {input_file.name} by chunks of {chunk_size} objects")
+        return await uploader.upload_functional_zones(
+            reader,
+            functional_zone_type_mapper=lambda value: fz_types[map_fzt_name(value)],
+            parallel_workers=parallel_workers,
+            result_sink=journal.get_sink(input_file.name),
+            skip_indexes=uploaded_before.get(input_file.name),
         )
+
+    try:
+        with journal:
+            uploaded, errors = asyncio.run(with_urban_client(config, upload))
     except KeyboardInterrupt:
-        config.logger.error("Got interruption signal, impossible to save results")
+        config.logger.error("Got interruption signal, uploaded objects are saved in journal", journal=str(journal.path))
         sys.exit(1)
 
-    results["uploaded"] = [u.model_dump() for u in uploaded]
     results["errors"] = errors.to_geo_dict() if errors is not None else None
-    results["metadata"] = {"total": gdf.shape[0], "uploaded": len(uploaded)}
+    results["metadata"] = {"total": reader.total, "uploaded": uploaded}
     config.logger.info("Finished", log_filename=output_file.name)
     results["time_finish"] = datetime.datetime.now()
+    results["journal"] = str(journal.path)
     with open(output_file, "wb") as file:
         pickle.dump(results, file)
 
@@ -199,9 +221,22 @@ def upload_file(  # pylint: disable=too-many-arguments,too-many-locals
 @click.option(
     "--parallel-workers",
     "-w",
-    type=int,
+    type=PARALLEL_WORKERS,
     default=1,
-    help="Number of workers to upload services in parallel",
+    help="Number of workers to upload services in parallel, 'auto' to adjust it by Urban API responsiveness",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=10_000,
+    show_default=True,
+    help="Number of features read from input file at once",
+)
+@click.option(
+    "--resume",
+    "resume_journal",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Path to upload journal of an interrupted run to skip already uploaded objects and continue the journal",
 )
 @click.option(
     "--output-pickle",
@@ -211,16 +246,18 @@ def upload_file(  # pylint: disable=too-many-arguments,too-many-locals
     show_default="uploaded_one_<timestamp>.pickle",
     help="Output path for uploaded services data",
 )
-def upload_bulk(  # pylint: disable=too-many-arguments,too-many-locals
+def upload_bulk(  # pylint: disable=too-many-arguments,too-many-locals,too-many-statements
     config: Config,
     *,
     names_config: Path,
     input_dir: Path,
     year: int,
     source: str,
-    parallel_workers: int,
+    parallel_workers: int | Literal["auto"],
     functional_zone_type_field: str,
+    chunk_size: int,
     output_file: Path | None,
+    resume_journal: Path | None,
 ):
     """Upload a single geojson of services data.
 
@@ -231,10 +268,9 @@ def upload_bulk(  # pylint: disable=too-many-arguments,too-many-locals
     if output_file.is_dir():
         output_file = output_file / f"uploaded_one_{int(time.time())}.pickle"
     urban_client = config.urban_client
+    parallel_workers = apply_parallel_workers(urban_client, parallel_workers)
+    journal, uploaded_before = open_journal(output_file, resume_journal, config.logger)
     logger = config.logger
-    if not asyncio.run(urban_client.is_alive()):
-        print("Urban API at is unavailable, exiting")
-        sys.exit(1)
 
     with names_config.open("r", encoding="utf-8") as file:
         fzt_names_mapping = yaml.safe_load(file)
@@ -244,9 +280,6 @@ def upload_bulk(  # pylint: disable=too-many-arguments,too-many-locals
             return fzt_names_mapping[s]
         return str(s)
 
-    functional_zone_types = asyncio.run(urban_client.get_functional_zone_types())
-    fz_types = {fzt.name: fzt.functional_zone_type_id for fzt in functional_zone_types}
-
     results: dict[str, Any] = {
         "type": "upload_functional_zones_bulk",
         "time_start": datetime.datetime.now(),
@@ -255,7 +288,6 @@ def upload_bulk(  # pylint: disable=too-many-arguments,too-many-locals
             "year": year,
             "source": source,
         },
-        "uploaded": {},
         "errors": {},
         "skipped": [],
         "metadata": {},
@@ -263,57 +295,64 @@ def upload_bulk(  # pylint: disable=too-many-arguments,too-many-locals
 
     uploader = FunctionalZonesUploader(
         urban_client,
-        properties_mapper=_get_additionals_properties_mapper({"year": year, "source": source}),
+        mapping=_mappings.get_functional_zone_mapping(functional_zone_type_field, year, source),
         logger=logger,
     )
 
-    for file in sorted(input_dir.glob("*.geojson")):
-        structlog.contextvars.bind_contextvars(file=file.name)
-        logger.info("Reading file")
-        gdf: gpd.GeoDataFrame = gpd.read_file(file)
-        gdf = gdf.drop_duplicates().dropna(subset="geometry").to_crs(4326)
-        print(f"Read file {file.name} - {gdf.shape[0]} objects after filtering")
-
-        if functional_zone_type_field not in gdf.columns:
-            print(f"Missing functional_zone_type field: '{functional_zone_type_field}'")
-            sys.exit(1)
-        fzt_file = set(map(map_fzt_name, gdf[functional_zone_type_field]))
-        if len(fzt_file - set(fz_types)) > 0:
-            logger.error(
-                "Some functional_zone_type values cannot be mapped skipping file",
-                functional_zones=sorted(fzt_file - set(fz_types)),
-            )
-            results["skipped"].append(file.name)
-            continue
-
-        try:
-            uploaded, errors = asyncio.run(
-                uploader.upload_functional_zones(
-                    gdf,
-                    functional_zone_type_mapper=lambda d: fz_types[
-                        map_fzt_name(d.pop(functional_zone_type_field, None))
-                    ],
+    async def upload() -> None:
+        functional_zone_types = await urban_client.get_functional_zone_types()
+        fz_types = {fzt.name: fzt.functional_zone_type_id for fzt in functional_zone_types}
+
+        for file in sorted(input_dir.glob("*.geojson")):
+            structlog.contextvars.bind_contextvars(file=file.name)
+            logger.info("Reading file")
+            file_types = await asyncio.to_thread(read_column, file, functional_zone_type_field)
+            if file_types is None:
+                print(f"Missing functional_zone_type field: '{functional_zone_type_field}'")
+                sys.exit(1)
+            fzt_file = set(map(map_fzt_name, file_types))
+            if len(fzt_file - set(fz_types)) > 0:
+                logger.error(
+                    "Some functional_zone_type values cannot be mapped skipping file",
+                    functional_zones=sorted(fzt_file - set(fz_types)),
+                )
+                results["skipped"].append(file.name)
+                continue
+
+            reader = GeoJSONReader(file, chunk_size)
+            try:
+                uploaded, errors = await uploader.upload_functional_zones(
+                    reader,
+                    functional_zone_type_mapper=lambda value: fz_types[map_fzt_name(value)],
                     parallel_workers=parallel_workers,
+                    result_sink=journal.get_sink(file.name),
+                    skip_indexes=uploaded_before.get(file.name),
                 )
-            )
-        except KeyboardInterrupt:
-            logger.error("Got interruption signal, impossible to save part of results")
-            break
-        except Exception:  # pylint: disable=broad-except
-            results["skipped"].append(file.name)
-            logger.exception("Got exception on processing file, ignoring")
-            continue
-
-        results["uploaded"][file.name] = [u.model_dump() for u in uploaded]
-        if errors is not None:
-            results["errors"][file.name] = errors.to_geo_dict()
-        results["metadata"][file.name] = {"total": gdf.shape[0], "uploaded": len(uploaded)}
+            except Exception:  # pylint: disable=broad-except
+                results["skipped"].append(file.name)
+                logger.exception("Got exception on processing file, ignoring")
+                continue
+
+            if errors is not None:
+                results["errors"][file.name] = errors.to_geo_dict()
+            results["metadata"][file.name] = {"total": reader.total, "uploaded": uploaded}
+
+    interrupted = False
+    try:
+        with journal:
+            asyncio.run(with_urban_client(config, upload))
+    except KeyboardInterrupt:
+        logger.error("Got interruption signal, saving part of results", journal=str(journal.path))
+        interrupted = True
     structlog.contextvars.unbind_contextvars("file")
 
     logger.info("Finished", log_filename=output_file.name)
     results["time_finish"] = datetime.datetime.now()
+    results["journal"] = str(journal.path)
     with open(output_file, "wb") as file:
         pickle.dump(results, file)
+    if interrupted:
+        sys.exit(1)
 
 
 @functional_zones_group.command("prepare-names-config")
@@ -329,23 +368,8 @@ def prepare_names_config(config: Config, names_config: Path):
     """Get functional zone types mapper config template."""
     urban_client = config.urban_client
 
-    if not asyncio.run(urban_client.is_alive()):
-        print("Urban API at is unavailable, exiting")
-        sys.exit(1)
-
-    functional_zone_types = asyncio.run(urban_client.get_functional_zone_types())
+    functional_zone_types = asyncio.run(with_urban_client(config, urban_client.get_functional_zone_types))
     fz_types_names = {fzt.name for fzt in functional_zone_types}
 
     with names_config.open("w", encoding="utf-8") as file:
         yaml.safe_dump({fzt: fzt for fzt in fz_types_names}, file)
-
-
-def _get_additionals_properties_mapper(
-    additionals: dict[str, Any]
-) -> Callable[[dict[str, Any]], tuple[dict[str, Any], Callable[[dict[str, Any]], None]]]:
-    def mapper(data: dict[str, Any]) -> dict[str, Any]:
-        result = data.copy()
-        result.update(additionals)
-        return result, lambda _: None
-
-    return mapper
@@ -6,7 +6,7 @@ import pickle
 import sys
 import time
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 
 import click
 import geopandas as gpd
@@ -14,10 +14,12 @@ import structlog
 import yaml
 
 from pmv2.logic import upload_physical_objects as logic
+from pmv2.logic.geojson_reader import GeoJSONReader
 from pmv2.logic.upload_physical_objects_bulk import UploadConfig
 
-from . import _mappers
-from ._main import Config, main, pass_config
+from . import _mappings
+from ._journal import open_journal
+from ._main import PARALLEL_WORKERS, Config, apply_parallel_workers, main, pass_config, with_urban_client
 
 
 @main.group("physical-objects")
@@ -44,10 +46,28 @@ def physical_objects_group():
 @click.option(
     "--parallel-workers",
     "-w",
-    type=int,
+    type=PARALLEL_WORKERS,
     default=1,
     show_default=True,
-    help="Number of workers to upload physical objects in parallel",
+    help="Number of workers to upload physical objects in parallel, 'auto' to adjust it by Urban API responsiveness",
+)
+@click.option(
+    "--prefetch-objects",
+    is_flag=True,
+    help="Download existing physical objects around input geometries once and match them locally",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=10_000,
+    show_default=True,
+    help="Number of features read from input file at once",
+)
+@click.option(
+    "--resume",
+    "resume_journal",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Path to upload journal of an interrupted run to skip already uploaded objects and continue the journal",
 )
 @click.option(
     "--output-pickle",
@@ -57,13 +77,16 @@ def physical_objects_group():
     show_default="uploaded_one_<timestamp>.pickle",
     help="Output path for uploaded physical objects data",
 )
-def upload_file(
+def upload_file(  # pylint: disable=too-many-arguments,too-many-locals
     config: Config,
     *,
     input_file: Path,
     physical_object_type_id: int,
-    parallel_workers: int,
+    parallel_workers: int | Literal["auto"],
+    prefetch_objects: bool,
+    chunk_size: int,
     output_file: Path | None,
+    resume_journal: Path | None,
 ):
     """Upload a single geojson of physical objects data."""
     if output_file is None:
@@ -71,9 +94,8 @@ def upload_file(
     if output_file.is_dir():
         output_file = output_file / f"uploaded_one_{int(time.time())}.pickle"
     urban_client = config.urban_client
-    if not asyncio.run(urban_client.is_alive()):
-        print("Urban API at is unavailable, exiting")
-        sys.exit(1)
+    parallel_workers = apply_parallel_workers(urban_client, parallel_workers)
+    journal, uploaded_before = open_journal(output_file, resume_journal, config.logger)
     results: dict[str, Any] = {
         "type": "upload_physical_objects",
         "time_start": datetime.datetime.now(),
@@ -82,27 +104,39 @@ def upload_file(
             "physical_object_type_id": physical_object_type_id,
         },
     }
-    gdf: gpd.GeoDataFrame = gpd.read_file(input_file)
-    gdf = gdf.drop_duplicates().dropna(subset="geometry").to_crs(4326)
-    print(f"Read file {input_file.name} - {gdf.shape[0]} objects after filtering")
     uploader = logic.PhysicalObjectsUploader(
         urban_client,
-        po_address_mapper=_mappers.none_mapper,
-        po_name_mapper=_mappers.none_mapper,
-        po_properties_mapper=_mappers.full_dictionary_mapper,
+        mapping=_mappings.PHYSICAL_OBJECT_MAPPING,
         logger=config.logger,
     )
+
+    async def prefetch(chunk: gpd.GeoDataFrame) -> None:
+        await uploader.prefetch_objects(chunk.geometry, physical_object_type_id, parallel_workers)
+
+    reader = GeoJSONReader(input_file, chunk_size, on_chunk=prefetch if prefetch_objects else None)
+    print(f"Reading file {input_file.name} by chunks of {chunk_size} objects")
+
+    async def upload() -> tuple[int, gpd.GeoDataFrame | None]:
+        return await uploader.upload_physical_objects(
+            reader,
+            physical_object_type_id,
+            parallel_workers,
+            result_sink=journal.get_sink(input_file.name),
+            skip_indexes=uploaded_before.get(input_file.name),
+        )
+
     try:
-        uploaded, errors = asyncio.run(uploader.upload_physical_objects(gdf, physical_object_type_id, parallel_workers))
+        with journal:
+            uploaded, errors = asyncio.run(with_urban_client(config, upload))
     except KeyboardInterrupt:
-        config.logger.error("Got interruption signal, impossible to save results")
-        raise
+        config.logger.error("Got interruption signal, uploaded objects are saved in journal", journal=str(journal.path))
+        sys.exit(1)
 
-    results["uploaded"] = [u.model_dump() for u in uploaded]
     results["errors"] = errors.to_geo_dict() if errors is not None else None
-    results["metadata"] = {"total": gdf.shape[0], "uploaded": len(uploaded)}
+    results["metadata"] = {"total": reader.total, "uploaded": uploaded}
     config.logger.info("Finished", log_filename=output_file.name)
     results["time_finish"] = datetime.datetime.now()
+    results["journal"] = str(journal.path)
     with open(output_file, "wb") as file:
         pickle.dump(results, file)
 
@@ -128,10 +162,28 @@ def upload_file(
 @click.option(
     "--parallel-workers",
     "-w",
-    type=int,
+    type=PARALLEL_WORKERS,
     default=1,
     show_default=True,
-    help="Number of workers to upload physical objects in parallel",
+    help="Number of workers to upload physical objects in parallel, 'auto' to adjust it by Urban API responsiveness",
+)
+@click.option(
+    "--prefetch-objects",
+    is_flag=True,
+    help="Download existing physical objects around input geometries once and match them locally",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=10_000,
+    show_default=True,
+    help="Number of features read from input file at once",
+)
+@click.option(
+    "--resume",
+    "resume_journal",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Path to upload journal of an interrupted run to skip already uploaded objects and continue the journal",
 )
 @click.option(
     "--output-pickle",
@@ -141,87 +193,102 @@ def upload_file(
     show_default="uploaded_<timestamp>.pickle",
     help="Output path for uploaded physical objects data",
 )
-def upload_bulk(  # pylint: disable=too-many-arguments,too-many-locals
+def upload_bulk(  # pylint: disable=too-many-arguments,too-many-locals,too-many-statements
     config: Config,
     *,
     input_dir: Path,
     upload_config_file: Path,
-    parallel_workers: int,
+    parallel_workers: int | Literal["auto"],
+    prefetch_objects: bool,
+    chunk_size: int,
     output_file: Path | None,
+    resume_journal: Path | None,
 ):
     """Execute a bulk upload of geojsons of physical objects data."""
     if output_file is None:
         output_file = Path(f"uploaded_{int(time.time())}.pickle")
-    if not asyncio.run(config.urban_client.is_alive()):
-        print("Urban API at is unavailable, exiting")
-        sys.exit(1)
     urban_client = config.urban_client
+    parallel_workers = apply_parallel_workers(urban_client, parallel_workers)
+    journal, uploaded_before = open_journal(output_file, resume_journal, config.logger)
     logger = config.logger
 
-    physical_object_types = asyncio.run(urban_client.get_physical_object_types())
-
-    with upload_config_file.open(encoding="utf-8") as file:
-        upload_config = UploadConfig.model_validate(yaml.safe_load(file)).transform_to_ids(physical_object_types)
-
-    logger.info("Prepared upload config", config=upload_config)
     results: dict[str, Any] = {
         "type": "upload_physical_objects_bulk",
         "date": datetime.datetime.now(),
         "input_dir": str(input_dir.resolve()),
-        "config": upload_config.model_dump(),
-        "uploaded": {},
+        "config": None,
         "errors": {},
         "skipped": [],
         "metadata": {},
     }
     skipped = []
-    for file in sorted(input_dir.glob("*.geojson")):
-        if file.name not in upload_config.filenames:
-            skipped.append(file.name)
-            continue
-        logger.info("Reading file", filename=file.name)
-        gdf: gpd.GeoDataFrame = gpd.read_file(file)
-        gdf = gdf.drop_duplicates().dropna(subset="geometry").to_crs(4326)
-        physical_object_type_id = upload_config.filenames[file.name]
-        structlog.contextvars.bind_contextvars(file=file.name)
-        logger.info("Read file", objects=gdf.shape[0])
-        if gdf.shape[0] == 0:
-            logger.warning("Empty geojson file, skipping")
-            continue
+
+    async def upload() -> None:
+        physical_object_types = await urban_client.get_physical_object_types()
+
+        with upload_config_file.open(encoding="utf-8") as file:
+            upload_config = UploadConfig.model_validate(yaml.safe_load(file)).transform_to_ids(physical_object_types)
+
+        logger.info("Prepared upload config", config=upload_config)
+        results["config"] = upload_config.model_dump()
+
         uploader = logic.PhysicalObjectsUploader(
             urban_client,
-            po_address_mapper=_mappers.get_attribute_mapper(["address"]),
-            po_name_mapper=_mappers.get_attribute_mapper(["name"]),
-            po_properties_mapper=_mappers.full_dictionary_mapper,
+            mapping=_mappings.PHYSICAL_OBJECT_BULK_MAPPING,
             logger=config.logger,
         )
-        try:
-            uploaded, errors = asyncio.run(
-                uploader.upload_physical_objects(gdf, physical_object_type_id, parallel_workers)
-            )
-        except KeyboardInterrupt:
-            logger.error("Got interruption signal, impossible to save part of results")
-            break
-        except Exception:  # pylint: disable=broad-except
-            logger.exception("Got exception on processing file, ignoring")
-            results["skipped"].append(file.name)
-            continue
+        for file in sorted(input_dir.glob("*.geojson")):
+            if file.name not in upload_config.filenames:
+                skipped.append(file.name)
+                continue
+            physical_object_type_id = upload_config.filenames[file.name]
+            structlog.contextvars.bind_contextvars(file=file.name)
+            logger.info("Reading file", filename=file.name)
+
+            async def prefetch(chunk: gpd.GeoDataFrame, physical_object_type_id: int = physical_object_type_id) -> None:
+                await uploader.prefetch_objects(chunk.geometry, physical_object_type_id, parallel_workers)
 
-        results["uploaded"][file.name] = [s.model_dump() for s in uploaded]
-        if errors is not None:
-            results["errors"][file.name] = errors.to_geo_dict()
-        results["metadata"][file.name] = {
-            "total": gdf.shape[0],
-            "uploaded": len(uploaded),
-        }
+            reader = GeoJSONReader(file, chunk_size, on_chunk=prefetch if prefetch_objects else None)
+            try:
+                uploaded, errors = await uploader.upload_physical_objects(
+                    reader,
+                    physical_object_type_id,
+                    parallel_workers,
+                    result_sink=journal.get_sink(file.name),
+                    skip_indexes=uploaded_before.get(file.name),
+                )
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Got exception on processing file, ignoring")
+                results["skipped"].append(file.name)
+                continue
+
+            if errors is not None:
+                results["errors"][file.name] = errors.to_geo_dict()
+            if reader.total == 0:
+                logger.warning("Empty geojson file")
+            results["metadata"][file.name] = {
+                "total": reader.total,
+                "uploaded": uploaded,
+            }
+
+    interrupted = False
+    try:
+        with journal:
+            asyncio.run(with_urban_client(config, upload))
+    except KeyboardInterrupt:
+        logger.error("Got interruption signal, saving part of results", journal=str(journal.path))
+        interrupted = True
     structlog.contextvars.unbind_contextvars("file")
 
     if len(skipped) > 0:
         logger.warning("Skipped some files", filenames=skipped)
     logger.info("Finished", log_filename=output_file.name)
     results["time_finish"] = datetime.datetime.now()
+    results["journal"] = str(journal.path)
     with open(output_file, "wb") as file:
         pickle.dump(results, file)
+    if interrupted:
+        sys.exit(1)
 
 
 @physical_objects_group.command("prepare-bulk-config")
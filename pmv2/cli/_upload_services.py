@@ -6,19 +6,21 @@ import pickle
 import sys
 import time
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 
 import click
 import geopandas as gpd
 import structlog
 import yaml
 
+from pmv2.logic.geojson_reader import GeoJSONReader
 from pmv2.logic.upload_physical_objects import PhysicalObjectsUploader
 from pmv2.logic.upload_services import ServicesUploader
 from pmv2.logic.upload_services_bulk import UploadConfig, UploadFileConfig
 
-from . import _mappers
-from ._main import Config, main, pass_config
+from . import _mappings
+from ._journal import open_journal
+from ._main import PARALLEL_WORKERS, Config, apply_parallel_workers, main, pass_config, with_urban_client
 
 
 @main.group("services")
@@ -26,10 +28,6 @@ def services_group():
     """Operations with services."""
 
 
-DEFAULT_SERVICE_NAME = "(Сервис без названия)"
-DEFAULT_NAME_ATTRIBUTES = ["name", "name:ru", "name:en", "description"]
-
-
 @services_group.command("upload-file")
 @pass_config
 @click.option(
@@ -63,9 +61,27 @@ DEFAULT_NAME_ATTRIBUTES = ["name", "name:ru", "name:en", "description"]
 @click.option(
     "--parallel-workers",
     "-w",
-    type=int,
+    type=PARALLEL_WORKERS,
     default=1,
-    help="Number of workers to upload services in parallel",
+    help="Number of workers to upload services in parallel, 'auto' to adjust it by Urban API responsiveness",
+)
+@click.option(
+    "--prefetch-objects",
+    is_flag=True,
+    help="Download existing physical objects around input geometries once and match them locally",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=10_000,
+    show_default=True,
+    help="Number of features read from input file at once",
+)
+@click.option(
+    "--resume",
+    "resume_journal",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Path to upload journal of an interrupted run to skip already uploaded objects and continue the journal",
 )
 @click.option(
     "--output-pickle",
@@ -75,15 +91,18 @@ DEFAULT_NAME_ATTRIBUTES = ["name", "name:ru", "name:en", "description"]
     show_default="uploaded_one_<timestamp>.pickle",
     help="Output path for uploaded services data",
 )
-def upload_file(  # pylint: disable=too-many-arguments
+def upload_file(  # pylint: disable=too-many-arguments,too-many-locals
     config: Config,
     *,
     input_file: Path,
     service_type_id: int,
     physical_object_type_id: int,
     default_capacity: int,
-    parallel_workers: int,
+    parallel_workers: int | Literal["auto"],
+    prefetch_objects: bool,
+    chunk_size: int,
     output_file: Path | None,
+    resume_journal: Path | None,
 ):
     """Upload a single geojson of services data.
 
@@ -94,9 +113,8 @@ def upload_file(  # pylint: disable=too-many-arguments
     if output_file.is_dir():
         output_file = output_file / f"uploaded_one_{int(time.time())}.pickle"
     urban_client = config.urban_client
-    if not asyncio.run(urban_client.is_alive()):
-        print("Urban API at is unavailable, exiting")
-        sys.exit(1)
+    parallel_workers = apply_parallel_workers(urban_client, parallel_workers)
+    journal, uploaded_before = open_journal(output_file, resume_journal, config.logger)
 
     results: dict[str, Any] = {
         "type": "upload_services",
@@ -108,41 +126,46 @@ def upload_file(  # pylint: disable=too-many-arguments
             "default_capacity": default_capacity,
         },
     }
-    gdf: gpd.GeoDataFrame = gpd.read_file(input_file)
-    gdf = gdf.drop_duplicates().dropna(subset="geometry").to_crs(4326)
-    print(f"Read file {input_file.name} - {gdf.shape[0]} objects after filtering")
     po_uploader = PhysicalObjectsUploader(
         urban_client,
-        po_address_mapper=_mappers.get_attribute_mapper(["address"]),
-        po_name_mapper=_mappers.get_func_mapper(
-            DEFAULT_NAME_ATTRIBUTES,
-            _mappers.get_string_checker_func(lambda name: f"(Физический объект для сервиса {name})"),
-            "(Безымянный физический объект)",
-        ),
-        po_properties_mapper=_mappers.get_first_occurance_filter_dict_mapper([DEFAULT_NAME_ATTRIBUTES]),
+        mapping=_mappings.SERVICE_PHYSICAL_OBJECT_MAPPING,
         logger=config.logger,
     )
     uploader = ServicesUploader(
         urban_client,
         po_uploader=po_uploader,
-        service_name_mapper=_mappers.get_attribute_mapper(DEFAULT_NAME_ATTRIBUTES, DEFAULT_SERVICE_NAME),
-        service_properties_mapper=_mappers.full_dictionary_mapper,
-        service_capacity_mapper=_mappers.get_service_capacity_mapper(default_capacity),
+        mapping=_mappings.get_service_mapping(default_capacity),
         logger=config.logger,
     )
-    try:
-        uploaded, errors = asyncio.run(
-            uploader.upload_services(gdf, service_type_id, physical_object_type_id, parallel_workers)
+
+    async def prefetch(chunk: gpd.GeoDataFrame) -> None:
+        await po_uploader.prefetch_objects(chunk.geometry, physical_object_type_id, parallel_workers)
+
+    reader = GeoJSONReader(input_file, chunk_size, on_chunk=prefetch if prefetch_objects else None)
+    print(f"Reading file {input_file.name} by chunks of {chunk_size} objects")
+
+    async def upload() -> tuple[int, gpd.GeoDataFrame | None]:
+        return await uploader.upload_services(
+            reader,
+            service_type_id,
+            physical_object_type_id,
+            parallel_workers,
+            result_sink=journal.get_sink(input_file.name),
+            skip_indexes=uploaded_before.get(input_file.name),
         )
+
+    try:
+        with journal:
+            uploaded, errors = asyncio.run(with_urban_client(config, upload))
     except KeyboardInterrupt:
-        config.logger.error("Got interruption signal, impossible to save results")
+        config.logger.error("Got interruption signal, uploaded objects are saved in journal", journal=str(journal.path))
         sys.exit(1)
 
-    results["uploaded"] = [u.model_dump() for u in uploaded]
     results["errors"] = errors.to_geo_dict() if errors is not None else None
-    results["metadata"] = {"total": gdf.shape[0], "uploaded": len(uploaded)}
+    results["metadata"] = {"total": reader.total, "uploaded": uploaded}
     config.logger.info("Finished", log_filename=output_file.name)
     results["time_finish"] = datetime.datetime.now()
+    results["journal"] = str(journal.path)
     with open(output_file, "wb") as file:
         pickle.dump(results, file)
 
@@ -168,10 +191,28 @@ def upload_file(  # pylint: disable=too-many-arguments
 @click.option(
     "--parallel-workers",
     "-w",
-    type=int,
+    type=PARALLEL_WORKERS,
     default=1,
     show_default=True,
-    help="Number of workers to upload services in parallel",
+    help="Number of workers to upload services in parallel, 'auto' to adjust it by Urban API responsiveness",
+)
+@click.option(
+    "--prefetch-objects",
+    is_flag=True,
+    help="Download existing physical objects around input geometries once and match them locally",
+)
+@click.option(
+    "--chunk-size",
+    type=int,
+    default=10_000,
+    show_default=True,
+    help="Number of features read from input file at once",
+)
+@click.option(
+    "--resume",
+    "resume_journal",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Path to upload journal of an interrupted run to skip already uploaded objects and continue the journal",
 )
 @click.option(
     "--output-pickle",
@@ -186,8 +227,11 @@ def upload_bulk(  # pylint: disable=too-many-arguments,too-many-locals,too-many-
     *,
     input_dir: Path,
     upload_config_file: Path,
-    parallel_workers: int,
+    parallel_workers: int | Literal["auto"],
+    prefetch_objects: bool,
+    chunk_size: int,
     output_file: Path | None,
+    resume_journal: Path | None,
 ):
     """Execute a bulk upload of geojsons of services data.
 
@@ -197,93 +241,99 @@ def upload_bulk(  # pylint: disable=too-many-arguments,too-many-locals,too-many-
         output_file = Path(f"uploaded_{int(time.time())}.pickle")
     if output_file.is_dir():
         output_file = output_file / f"uploaded_{int(time.time())}.pickle"
-    if not asyncio.run(config.urban_client.is_alive()):
-        print("Urban API at is unavailable, exiting")
-        sys.exit(1)
     urban_client = config.urban_client
+    parallel_workers = apply_parallel_workers(urban_client, parallel_workers)
+    journal, uploaded_before = open_journal(output_file, resume_journal, config.logger)
     logger = config.logger
 
-    service_types = asyncio.run(urban_client.get_service_types())
-    physical_object_types = asyncio.run(urban_client.get_physical_object_types())
-
-    with upload_config_file.open(encoding="utf-8") as file:
-        upload_config = UploadConfig.model_validate(yaml.safe_load(file)).transform_to_ids(
-            service_types, physical_object_types
-        )
-    capacity_dict = {data.service_type_id: data.default_capacity for data in upload_config.filenames.values()}
-    logger.info("Prepared upload config", config=upload_config)
-
     results: dict[str, Any] = {
         "type": "upload_services_bulk",
         "time_start": datetime.datetime.now(),
         "input_dir": str(input_dir.resolve()),
-        "config": upload_config.model_dump(),
-        "uploaded": {},
+        "config": None,
         "errors": {},
         "skipped": [],
         "metadata": {},
     }
     skipped = []
-    for file in sorted(input_dir.glob("*.geojson")):
-        if file.name not in upload_config.filenames:
-            skipped.append(file.name)
-            continue
-        structlog.contextvars.bind_contextvars(file=file.name)
-        logger.info("Reading file")
-        gdf: gpd.GeoDataFrame = gpd.read_file(file)
-        gdf = gdf.drop_duplicates().dropna(subset="geometry").to_crs(4326)
-        service_type_id = upload_config.filenames[file.name].service_type_id
-        physical_object_type_id = upload_config.filenames[file.name].physical_object_type_id
-        logger.info("Read file", objects=gdf.shape[0])
-        if gdf.shape[0] == 0:
-            logger.warning("Empty geojson file, skipping")
-            continue
-        if service_type_id not in capacity_dict:
-            logger.critical("Default capacity is not set, skipping")
-            skipped.append(file.name)
-            continue
+
+    async def upload() -> None:
+        service_types = await urban_client.get_service_types()
+        physical_object_types = await urban_client.get_physical_object_types()
+
+        with upload_config_file.open(encoding="utf-8") as file:
+            upload_config = UploadConfig.model_validate(yaml.safe_load(file)).transform_to_ids(
+                service_types, physical_object_types
+            )
+        capacity_dict = {data.service_type_id: data.default_capacity for data in upload_config.filenames.values()}
+        logger.info("Prepared upload config", config=upload_config)
+        results["config"] = upload_config.model_dump()
+
         po_uploader = PhysicalObjectsUploader(
             urban_client,
-            po_address_mapper=_mappers.get_attribute_mapper(["address"]),
-            po_name_mapper=_mappers.get_func_mapper(
-                DEFAULT_NAME_ATTRIBUTES,
-                _mappers.get_string_checker_func(lambda name: f"(Физический объект для сервиса {name})"),
-                "(Безымянный физический объект)",
-            ),
-            po_properties_mapper=_mappers.get_first_occurance_filter_dict_mapper([DEFAULT_NAME_ATTRIBUTES]),
+            mapping=_mappings.SERVICE_PHYSICAL_OBJECT_MAPPING,
             logger=config.logger,
         )
-        uploader = ServicesUploader(
-            urban_client,
-            po_uploader=po_uploader,
-            service_name_mapper=_mappers.get_attribute_mapper(DEFAULT_NAME_ATTRIBUTES, DEFAULT_SERVICE_NAME),
-            service_properties_mapper=_mappers.full_dictionary_mapper,
-            service_capacity_mapper=_mappers.get_service_capacity_mapper(capacity_dict[service_type_id]),
-            logger=logger,
-        )
-        try:
-            uploaded, errors = asyncio.run(
-                uploader.upload_services(gdf, service_type_id, physical_object_type_id, parallel_workers)
+        for file in sorted(input_dir.glob("*.geojson")):
+            if file.name not in upload_config.filenames:
+                skipped.append(file.name)
+                continue
+            structlog.contextvars.bind_contextvars(file=file.name)
+            logger.info("Reading file")
+            service_type_id = upload_config.filenames[file.name].service_type_id
+            physical_object_type_id = upload_config.filenames[file.name].physical_object_type_id
+            if service_type_id not in capacity_dict:
+                logger.critical("Default capacity is not set, skipping")
+                skipped.append(file.name)
+                continue
+            uploader = ServicesUploader(
+                urban_client,
+                po_uploader=po_uploader,
+                mapping=_mappings.get_service_mapping(capacity_dict[service_type_id]),
+                logger=logger,
             )
-        except KeyboardInterrupt:
-            logger.error("Got interruption signal, impossible to save part of results")
-            break
-        except Exception:  # pylint: disable=broad-except
-            logger.exception("Got exception on processing file, ignoring")
-            results["skipped"].append(file.name)
-            continue
-        results["uploaded"][file.name] = [u.model_dump() for u in uploaded]
-        if errors is not None:
-            results["errors"][file.name] = errors.to_geo_dict()
-        results["metadata"][file.name] = {"total": gdf.shape[0], "uploaded": len(uploaded)}
+
+            async def prefetch(chunk: gpd.GeoDataFrame, physical_object_type_id: int = physical_object_type_id) -> None:
+                await po_uploader.prefetch_objects(chunk.geometry, physical_object_type_id, parallel_workers)
+
+            reader = GeoJSONReader(file, chunk_size, on_chunk=prefetch if prefetch_objects else None)
+            try:
+                uploaded, errors = await uploader.upload_services(
+                    reader,
+                    service_type_id,
+                    physical_object_type_id,
+                    parallel_workers,
+                    result_sink=journal.get_sink(file.name),
+                    skip_indexes=uploaded_before.get(file.name),
+                )
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Got exception on processing file, ignoring")
+                results["skipped"].append(file.name)
+                continue
+            if errors is not None:
+                results["errors"][file.name] = errors.to_geo_dict()
+            if reader.total == 0:
+                logger.warning("Empty geojson file")
+            results["metadata"][file.name] = {"total": reader.total, "uploaded": uploaded}
+
+    interrupted = False
+    try:
+        with journal:
+            asyncio.run(with_urban_client(config, upload))
+    except KeyboardInterrupt:
+        logger.error("Got interruption signal, saving part of results", journal=str(journal.path))
+        interrupted = True
     structlog.contextvars.unbind_contextvars("file")
 
     if len(skipped) > 0:
         logger.warning("Skipped some files", filenames=skipped)
     logger.info("Finished", log_filename=output_file.name)
     results["time_finish"] = datetime.datetime.now()
+    results["journal"] = str(journal.path)
     with open(output_file, "wb") as file:
         pickle.dump(results, file)
+    if interrupted:
+        sys.exit(1)
 
 
 @services_group.command("prepare-bulk-config")
@@ -0,0 +1,118 @@
+"""Grouping of duplicate input geometries and sharing of their resolution results are defined here."""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+import numpy as np
+import shapely
+
+from pmv2.logic.geometry_matching import INTERSECTION_BOUNDARY, get_pairs_intersection_ratios
+
+_T = TypeVar("_T")
+
+
+@dataclass(frozen=True, eq=False)
+class DuplicatesGroup:
+    """Group of input rows which geometries match each other, so the rows resolve to the same physical object.
+
+    Groups are compared by identity, `first_index` is the index of the first of the group rows.
+    """
+
+    first_index: Any
+    size: int
+
+
+def group_duplicates(
+    matching_geometries: np.ndarray, intersection_boundary: float = INTERSECTION_BOUNDARY
+) -> np.ndarray:
+    """Group prepared (projected and buffered) geometries matching each other by the same intersection ratio rule
+    as geometries are matched with the existing objects. Geometries are grouped transitively.
+
+    Return position of the first geometry of the group for each of the geometries.
+    """
+    geometries = np.asarray(matching_geometries, dtype=object)
+    left, right = _get_matching_pairs(geometries, intersection_boundary)
+    parent = np.arange(geometries.shape[0])
+    while left.shape[0] > 0:
+        left_roots, right_roots = parent[left], parent[right]
+        if np.array_equal(left_roots, right_roots):
+            break
+        lower = np.minimum(left_roots, right_roots)
+        np.minimum.at(parent, left_roots, lower)
+        np.minimum.at(parent, right_roots, lower)
+        while not np.array_equal(grandparent := parent[parent], parent):
+            parent = grandparent
+    return parent
+
+
+def _get_matching_pairs(geometries: np.ndarray, intersection_boundary: float) -> tuple[np.ndarray, np.ndarray]:
+    """Get positions of the matching geometries pairs, the first position of each pair is lower."""
+    left, right = shapely.STRtree(geometries).query(geometries)
+    pairs = left < right
+    left, right = left[pairs], right[pairs]
+    # intersection of bounding boxes limits the intersection ratio, so only the pairs which can match are intersected
+    areas = shapely.area(geometries)
+    bounds = shapely.bounds(geometries)
+    overlap = np.clip(
+        np.minimum(bounds[left, 2:], bounds[right, 2:]) - np.maximum(bounds[left, :2], bounds[right, :2]), 0, None
+    )
+    candidates = overlap[:, 0] * overlap[:, 1] > intersection_boundary * np.maximum(areas[left], areas[right])
+    left, right = left[candidates], right[candidates]
+    matching = get_pairs_intersection_ratios(geometries[left], geometries[right]) > intersection_boundary
+    return left[matching], right[matching]
+
+
+def get_duplicates_groups(indexes: np.ndarray, matching_geometries: np.ndarray) -> list[DuplicatesGroup | None]:
+    """Get duplicates group for each of the rows with the given indexes and prepared geometries (see
+    `group_duplicates`), None for rows without duplicates.
+    """
+    indexes = np.asarray(indexes).tolist()
+    firsts = group_duplicates(matching_geometries)
+    sizes = np.bincount(firsts, minlength=firsts.shape[0])
+    groups: dict[int, DuplicatesGroup] = {
+        first: DuplicatesGroup(indexes[first], int(sizes[first])) for first in np.flatnonzero(sizes > 1).tolist()
+    }
+    return [groups.get(first) for first in firsts.tolist()]
+
+
+class DuplicatesResolver:
+    """Resolver which runs resolution only for the first row of each duplicates group and shares its result (or
+    exception) with the other rows of the group.
+
+    Results are kept by group and key (i.e. physical object type) until every row of the group is released.
+    """
+
+    def __init__(self):
+        self._results: dict[DuplicatesGroup, dict[Hashable, asyncio.Future]] = {}
+        self._remaining: dict[DuplicatesGroup, int] = {}
+
+    async def resolve(self, group: DuplicatesGroup | None, key: Hashable, resolve: Callable[[], Awaitable[_T]]) -> _T:
+        """Resolve the row of the given group, rows without group are always resolved."""
+        if group is None:
+            return await resolve()
+        results = self._results.setdefault(group, {})
+        if key in results:
+            return await asyncio.shield(results[key])
+        future = results[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await resolve()
+        except BaseException as exc:
+            future.set_exception(exc if isinstance(exc, Exception) else RuntimeError("Resolution was interrupted"))
+            future.exception()
+            raise
+        future.set_result(result)
+        return result
+
+    def release(self, group: DuplicatesGroup | None) -> None:
+        """Mark the row of the given group as processed, it must be called once for every row of the group whether
+        it was resolved or failed before. Results of the group are dropped when all of its rows are released.
+        """
+        if group is None:
+            return
+        remaining = self._remaining.get(group, group.size) - 1
+        if remaining > 0:
+            self._remaining[group] = remaining
+        else:
+            self._remaining.pop(group, None)
+            self._results.pop(group, None)
@@ -0,0 +1,145 @@
+"""Local cache of existing functional zones is defined here."""
+
+import asyncio
+
+import numpy as np
+import shapely
+import structlog
+
+from pmv2.urban_client import UrbanClient
+from pmv2.urban_client.models import FunctionalZone
+
+ZONE_INTERSECTION_BOUNDARY = 0.8
+"""Part of both input geometry and existing zone areas which must be covered by their intersection to treat them
+as the same functional zone."""
+
+
+class _ZonesIndex:
+    """Spatial index of functional zones of a single territory (with its children) and type.
+
+    STRtree can not be updated, so newly added zones are kept in a pending list checked by a full scan and are moved
+    to the tree when the list becomes big enough.
+    """
+
+    def __init__(self):
+        self._ids: set[int] = set()
+        self._zones: list[FunctionalZone] = []
+        self._geometries: list[shapely.geometry.base.BaseGeometry] = []
+        self._areas = np.empty(0)
+        self._tree = shapely.STRtree([])
+        self._indexed = 0
+
+    def __len__(self) -> int:
+        return len(self._zones)
+
+    def extend(self, zones: list[FunctionalZone]) -> None:
+        """Add zones to the index if they are not there yet."""
+        zones = [zone for zone in zones if zone.functional_zone_id not in self._ids]
+        if len(zones) == 0:
+            return
+        self._ids.update(zone.functional_zone_id for zone in zones)
+        geometries = shapely.from_wkt([zone.geometry.wkt for zone in zones])
+        self._zones.extend(zones)
+        self._geometries.extend(geometries.tolist())
+        self._areas = np.concatenate([self._areas, shapely.area(geometries)])
+        if len(self._geometries) - self._indexed > max(256, self._indexed // 4):
+            self._tree = shapely.STRtree(self._geometries)
+            self._indexed = len(self._geometries)
+
+    def find_matching(
+        self, geometry: shapely.geometry.base.BaseGeometry, intersection_boundary: float
+    ) -> FunctionalZone | None:
+        """Get the first of the zones which intersection with the given geometry covers more than
+        `intersection_boundary` of both geometry and zone areas.
+        """
+        found = self._tree.query(geometry)
+        if self._indexed < len(self._geometries):
+            pending = np.array(self._geometries[self._indexed :], dtype=object)
+            found = np.concatenate([found, np.flatnonzero(shapely.intersects(pending, geometry)) + self._indexed])
+        if len(found) == 0:
+            return None
+        found.sort()
+        candidates = np.array([self._geometries[i] for i in found], dtype=object)
+        intersection_areas = shapely.area(shapely.intersection(candidates, geometry))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            matching = (intersection_areas / geometry.area > intersection_boundary) & (
+                intersection_areas / self._areas[found] > intersection_boundary
+            )
+        if not matching.any():
+            return None
+        return self._zones[found[np.argmax(matching)]]
+
+
+class FunctionalZonesCache:
+    """Local cache of existing functional zones used instead of `get_functional_zones` request for each input zone.
+
+    Zones are downloaded once per pair of territory (including its child territories) and functional zone type,
+    concurrent requests of the same pair wait for a single download.
+    """
+
+    def __init__(self, logger: structlog.stdlib.BoundLogger = ...):
+        self._indexes: dict[tuple[int, int], asyncio.Future[_ZonesIndex]] = {}
+        if logger is ...:
+            self._logger = structlog.get_logger("functional_zones_cache")
+        else:
+            self._logger = logger
+
+    async def find_matching(
+        self,
+        urban_client: UrbanClient,
+        territory_id: int,
+        geometry: shapely.geometry.base.BaseGeometry,
+        functional_zone_type_id: int,
+        intersection_boundary: float = ZONE_INTERSECTION_BOUNDARY,
+    ) -> FunctionalZone | None:
+        """Get existing functional zone of a given type in a given territory matching the geometry (see
+        `_ZonesIndex.find_matching`), zones of the territory are downloaded on the first call.
+        """
+        index = await self._get_index(urban_client, territory_id, functional_zone_type_id)
+        return index.find_matching(geometry, intersection_boundary)
+
+    def add(self, functional_zone: FunctionalZone) -> None:
+        """Add newly uploaded zone to the cache.
+
+        Zone is added to every downloaded territory of its type as territory zones include zones of child territories,
+        zones of unrelated territories do not overlap the geometries looked for there.
+        """
+        functional_zone_type_id = functional_zone.functional_zone_type.id
+        for (_, type_id), index in self._indexes.items():
+            if (
+                type_id == functional_zone_type_id
+                and index.done()
+                and not index.cancelled()
+                and index.exception() is None
+            ):
+                index.result().extend([functional_zone])
+
+    async def _get_index(
+        self, urban_client: UrbanClient, territory_id: int, functional_zone_type_id: int
+    ) -> _ZonesIndex:
+        key = (territory_id, functional_zone_type_id)
+        if key not in self._indexes:
+            self._indexes[key] = asyncio.ensure_future(
+                self._download(urban_client, territory_id, functional_zone_type_id)
+            )
+        download = self._indexes[key]
+        try:
+            return await asyncio.shield(download)
+        except Exception:
+            if download.done() and self._indexes.get(key) is download:
+                del self._indexes[key]  # failed download is repeated on the next call
+            raise
+
+    async def _download(
+        self, urban_client: UrbanClient, territory_id: int, functional_zone_type_id: int
+    ) -> _ZonesIndex:
+        zones = await urban_client.get_functional_zones(territory_id, functional_zone_type_id)
+        index = _ZonesIndex()
+        index.extend(zones)
+        await self._logger.ainfo(
+            "Downloaded functional zones",
+            territory_id=territory_id,
+            functional_zone_type_id=functional_zone_type_id,
+            zones=len(index),
+        )
+        return index
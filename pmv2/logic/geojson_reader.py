@@ -0,0 +1,142 @@
+"""Streaming reader of input geojson files is defined here."""
+
+import asyncio
+import itertools
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Container, Iterator
+
+import geopandas as gpd
+import pandas as pd
+import pyogrio
+import shapely
+
+from pmv2.urban_client.metrics import measure_stage
+
+
+class GeoJSONReader:  # pylint: disable=too-few-public-methods
+    """Reader of geojson (or any other GDAL-supported) file by chunks of features.
+
+    Each chunk is cleaned (duplicates inside the chunk and features without geometry are dropped) and reprojected
+    to EPSG:4326 on its own in a separate thread, so memory usage is bounded by the chunk size and the first rows
+    can be uploaded right after the first chunk is read. Index of the rows is continuous across the chunks.
+
+    Features are read by Arrow batches from a single open file, so the file is scanned only once.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        chunk_size: int = 10_000,
+        on_chunk: Callable[[gpd.GeoDataFrame], Awaitable[None]] | None = None,
+    ):
+        self.path = path
+        self.chunk_size = max(chunk_size, 1)
+        self.total = 0
+        """Number of features read so far after filtering."""
+        self._on_chunk = on_chunk
+
+    async def __aiter__(self) -> AsyncIterator[gpd.GeoDataFrame]:
+        chunks = self._read_chunks()
+        try:
+            while True:
+                with measure_stage("read"):
+                    chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                if chunk.shape[0] == 0:
+                    continue
+                self.total += chunk.shape[0]
+                if self._on_chunk is not None:
+                    await self._on_chunk(chunk)
+                yield chunk
+        finally:
+            chunks.close()
+
+    def _read_chunks(self) -> Iterator[gpd.GeoDataFrame]:
+        offset = 0
+        for batch in self._read_arrow_batches():
+            batch.index = pd.RangeIndex(offset, offset + batch.shape[0])
+            offset += batch.shape[0]
+            yield batch.drop_duplicates().dropna(subset="geometry").to_crs(4326)
+
+    def _read_arrow_batches(self) -> Iterator[gpd.GeoDataFrame]:
+        with pyogrio.raw.open_arrow(self.path, batch_size=self.chunk_size, use_pyarrow=True) as (meta, reader):
+            geometry_name = meta["geometry_name"] or "wkb_geometry"
+            for batch in reader:
+                df = batch.to_pandas()
+                geometry = shapely.from_wkb(df.pop(geometry_name))
+                yield gpd.GeoDataFrame(df, geometry=geometry, crs=meta["crs"])
+
+
+def read_column(path: Path, column: str) -> pd.Series | None:
+    """Read values of a single attribute column of all of the file features without geometries (i.e. to validate
+    them before reading the file by chunks), return None if the file has no such column.
+    """
+    if column not in pyogrio.read_info(path)["fields"]:
+        return None
+    return pyogrio.read_dataframe(path, columns=[column], read_geometry=False)[column]
+
+
+InputData = gpd.GeoDataFrame | GeoJSONReader
+"""Uploaders input: a whole GeoDataFrame or a reader of a file by chunks."""
+
+
+def get_total(data: InputData) -> int:
+    """Get number of input rows (read so far if input is being read by chunks)."""
+    if isinstance(data, gpd.GeoDataFrame):
+        return data.shape[0]
+    return data.total
+
+
+async def iterate_chunks(
+    data: InputData, skip_indexes: Container[int] | None = None
+) -> AsyncIterator[gpd.GeoDataFrame]:
+    """Iterate over the input chunks (a single one for GeoDataFrame input), omitting rows with indexes from
+    `skip_indexes`.
+    """
+    if isinstance(data, gpd.GeoDataFrame):
+        yield _filter_rows(data, skip_indexes)
+        return
+    async for chunk in data:
+        yield _filter_rows(chunk, skip_indexes)
+
+
+def to_records(chunk: pd.DataFrame) -> list[dict[str, Any]]:
+    """Convert rows to dictionaries without null values (as `row.dropna().to_dict()` does), nulls are found
+    for the whole chunk at once.
+    """
+    columns = chunk.columns.tolist()
+    values = chunk.to_numpy(dtype=object).tolist()
+    not_null = chunk.notna().to_numpy()
+    if not_null.all():
+        return [dict(zip(columns, row)) for row in values]
+    return [dict(itertools.compress(zip(columns, row), mask)) for row, mask in zip(values, not_null.tolist())]
+
+
+async def iterate_records(
+    data: InputData, skip_indexes: Container[int] | None = None
+) -> AsyncIterator[tuple[Any, dict[str, Any]]]:
+    """Iterate over (index, record) pairs of the input rows (see `to_records`), omitting rows with indexes from
+    `skip_indexes`.
+    """
+    async for chunk in iterate_chunks(data, skip_indexes):
+        for row in zip(chunk.index, to_records(chunk)):
+            yield row
+
+
+def _filter_rows(chunk: gpd.GeoDataFrame, skip_indexes: Container[int] | None) -> gpd.GeoDataFrame:
+    if skip_indexes:
+        chunk = chunk[~chunk.index.isin(list(skip_indexes))]
+    return chunk
+
+
+def rows_to_geodataframe(rows: list[tuple[Any, dict[str, Any]]]) -> gpd.GeoDataFrame | None:
+    """Collect (index, record) pairs of input rows (i.e. rows which failed to upload) back to a GeoDataFrame,
+    return None if there are none.
+    """
+    if len(rows) == 0:
+        return None
+    indexes, records = zip(*rows)
+    return gpd.GeoDataFrame(
+        pd.DataFrame.from_records(list(records), index=list(indexes)).infer_objects(), geometry="geometry", crs=4326
+    )
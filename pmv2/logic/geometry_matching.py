@@ -0,0 +1,70 @@
+"""Vectorized geometries matching logic is defined here.
+
+Geometries are matched in EPSG:3857 after buffering by a few meters, intersection ratio of two geometries is the
+intersection area divided by the area of the bigger one of them.
+"""
+
+import numpy as np
+import pyproj
+import shapely
+
+_crs_transformer = pyproj.Transformer.from_crs(4326, 3857, always_xy=True)
+
+MATCH_BUFFER = 5
+"""Buffer (in meters) applied to both of the geometries before matching."""
+
+INTERSECTION_BOUNDARY = 0.6
+"""Minimal intersection ratio for geometries to be considered the same object."""
+
+
+def to_metric(geometries: np.ndarray) -> np.ndarray:
+    """Project array of EPSG:4326 geometries to EPSG:3857 in a single vectorized call."""
+
+    def transform(coords: np.ndarray) -> np.ndarray:
+        return np.column_stack(_crs_transformer.transform(coords[:, 0], coords[:, 1]))
+
+    return shapely.transform(np.asarray(geometries, dtype=object), transform)
+
+
+def to_matching_geometries(geometries: np.ndarray, buffer: float = MATCH_BUFFER) -> np.ndarray:
+    """Project array of EPSG:4326 geometries to EPSG:3857 and buffer them for matching."""
+    return shapely.buffer(to_metric(geometries), buffer, quad_segs=16)
+
+
+def get_pairs_intersection_ratios(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Get intersection ratios of each pair of the same-sized (or broadcastable, i.e. a single geometry against
+    an array of candidates) arrays of projected and buffered geometries.
+    """
+    intersection_area = shapely.area(shapely.intersection(left, right))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = np.minimum(intersection_area / shapely.area(left), intersection_area / shapely.area(right))
+    return np.nan_to_num(ratios)
+
+
+def match_geometries(
+    geometries: np.ndarray,
+    candidates: np.ndarray,
+    intersection_boundary: float = INTERSECTION_BOUNDARY,
+    tree: shapely.STRtree | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Find the best matching candidate for each of N input geometries among M candidates (both projected
+    and buffered, see `to_matching_geometries`) by a single STRtree query, `tree` is the already built tree
+    of `candidates`.
+
+    Return array of candidate indexes (-1 for geometries without a match) and array of corresponding ratios.
+    """
+    best = np.full(len(geometries), -1, dtype=int)
+    best_ratios = np.zeros(len(geometries), dtype=float)
+    if len(geometries) == 0 or len(candidates) == 0:
+        return best, best_ratios
+    if tree is None:
+        tree = shapely.STRtree(candidates)
+    geometries_idx, candidates_idx = tree.query(geometries, predicate="intersects")
+    ratios = get_pairs_intersection_ratios(geometries[geometries_idx], candidates[candidates_idx])
+    matching = ratios > intersection_boundary
+    geometries_idx, candidates_idx, ratios = geometries_idx[matching], candidates_idx[matching], ratios[matching]
+    order = np.lexsort((-ratios, geometries_idx))
+    matched, first = np.unique(geometries_idx[order], return_index=True)
+    best[matched] = candidates_idx[order][first]
+    best_ratios[matched] = ratios[order][first]
+    return best, best_ratios
@@ -0,0 +1,157 @@
+"""Input geometries preparation stage is defined here."""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Container, NamedTuple
+
+import geopandas as gpd
+import numpy as np
+import shapely
+import structlog
+
+from pmv2.logic.deduplication import DuplicatesGroup, get_duplicates_groups
+from pmv2.logic.geojson_reader import InputData, iterate_chunks, to_records
+from pmv2.logic.geometry_matching import to_matching_geometries
+from pmv2.logic.mapping import EntityMapping
+from pmv2.urban_client.metrics import measure_stage
+
+_STOP = object()
+
+
+class PreparedRow(NamedTuple):
+    """Input row record (see `to_records`) with a valid geometry, the same geometry projected and buffered for
+    matching, entities fields mapped from the row (see `EntityMapping.apply`) by entity name and group of
+    the input rows duplicating each other (None if row has no duplicates or they were not searched for).
+    """
+
+    index: Any
+    data: dict[str, Any]
+    matching_geometry: shapely.geometry.base.BaseGeometry | None
+    mapped: dict[str, dict[str, Any]]
+    duplicates_group: DuplicatesGroup | None
+
+
+def prepare_geometries(geometries: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Repair invalid EPSG:4326 geometries and get geometries for matching (see `to_matching_geometries`).
+
+    Return repaired geometries, matching geometries and mask of geometries which were invalid.
+    """
+    geometries = np.asarray(geometries, dtype=object)
+    invalid = ~shapely.is_valid(geometries) & ~shapely.is_missing(geometries)
+    if invalid.any():
+        geometries = geometries.copy()
+        geometries[invalid] = shapely.buffer(geometries[invalid], 0)
+    return geometries, to_matching_geometries(geometries), invalid
+
+
+def _prepare_chunk(
+    chunk: gpd.GeoDataFrame, deduplicate: bool
+) -> tuple[gpd.GeoDataFrame, np.ndarray, list[DuplicatesGroup | None], np.ndarray]:
+    geometries, matching, invalid = prepare_geometries(chunk.geometry.values)
+    if invalid.any():
+        chunk = chunk.copy()
+        chunk[chunk.geometry.name] = gpd.GeoSeries(geometries, index=chunk.index, crs=chunk.crs)
+    if deduplicate:
+        groups = get_duplicates_groups(chunk.index.values, matching)
+    else:
+        groups = [None] * chunk.shape[0]
+    return chunk, matching, groups, invalid
+
+
+def _prepare_batch(
+    batch: gpd.GeoDataFrame, mappings: dict[str, EntityMapping]
+) -> tuple[list[dict[str, Any]], list[dict[str, dict[str, Any]]]]:
+    mapped = {name: mapping.apply(batch) for name, mapping in mappings.items()}
+    if len(mapped) > 0:
+        rows_mapped = [dict(zip(mapped, row)) for row in zip(*mapped.values())]
+    else:
+        rows_mapped = [{} for _ in range(batch.shape[0])]
+    return to_records(batch), rows_mapped
+
+
+async def iterate_prepared_batches(  # pylint: disable=too-many-arguments,too-many-locals
+    data: InputData,
+    skip_indexes: Container[int] | None = None,
+    mappings: dict[str, EntityMapping] | None = None,
+    *,
+    deduplicate: bool = False,
+    batch_size: int = 500,
+    prepared_batches: int = 4,
+    executor: Executor | None = None,
+    logger: structlog.stdlib.BoundLogger = ...,
+) -> AsyncIterator[list[PreparedRow]]:
+    """Iterate over batches of the input rows (omitting rows with indexes from `skip_indexes`) with prepared geometries
+    and entities fields mapped by the given `mappings`. If `deduplicate` is set, rows of each input chunk are
+    grouped by matching geometries (see `group_duplicates`).
+
+    Geometries are prepared for the whole chunk and rows are converted to records (see `to_records`) and mapped
+    by batches of `batch_size` rows in `executor` (default thread pool, shapely releases GIL on vectorized
+    operations) by a separate task running ahead of the consumer by up to `prepared_batches` batches, so preparation
+    does not block the event loop.
+    """
+    if logger is ...:
+        logger = structlog.get_logger("geometry_preparation")
+    loop = asyncio.get_running_loop()
+    batches: asyncio.Queue = asyncio.Queue(maxsize=max(prepared_batches, 1))
+
+    async def prepare() -> None:
+        try:
+            async for chunk in iterate_chunks(data, skip_indexes):
+                with measure_stage("prepare"):
+                    chunk, matching, groups, invalid = await loop.run_in_executor(
+                        executor, _prepare_chunk, chunk, deduplicate
+                    )
+                if invalid.any():
+                    logger.warning("Invalid geometries in file, fixing", indexes=chunk.index[invalid].tolist())
+                if deduplicate and (duplicates := sum(group is not None for group in groups)) > 0:
+                    logger.info(
+                        "Found duplicate geometries in file",
+                        rows=duplicates,
+                        groups=len(set(group for group in groups if group is not None)),
+                    )
+                for start in range(0, chunk.shape[0], batch_size):
+                    batch = chunk.iloc[start : start + batch_size]
+                    with measure_stage("prepare"):
+                        records, mapped = await loop.run_in_executor(executor, _prepare_batch, batch, mappings or {})
+                    end = start + batch.shape[0]
+                    await batches.put((batch.index, records, matching[start:end], mapped, groups[start:end]))
+        except Exception as exc:  # pylint: disable=broad-except
+            await batches.put(exc)
+        else:
+            await batches.put(_STOP)
+
+    task = asyncio.create_task(prepare())
+    try:
+        while (item := await batches.get()) is not _STOP:
+            if isinstance(item, Exception):
+                raise item
+            yield [PreparedRow(*row) for row in zip(*item)]
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+async def iterate_prepared_rows(  # pylint: disable=too-many-arguments
+    data: InputData,
+    skip_indexes: Container[int] | None = None,
+    mappings: dict[str, EntityMapping] | None = None,
+    *,
+    deduplicate: bool = False,
+    batch_size: int = 500,
+    prepared_batches: int = 4,
+    executor: Executor | None = None,
+    logger: structlog.stdlib.BoundLogger = ...,
+) -> AsyncIterator[PreparedRow]:
+    """Iterate over the input rows one by one, see `iterate_prepared_batches`."""
+    async for batch in iterate_prepared_batches(
+        data,
+        skip_indexes,
+        mappings,
+        deduplicate=deduplicate,
+        batch_size=batch_size,
+        prepared_batches=prepared_batches,
+        executor=executor,
+        logger=logger,
+    ):
+        for row in batch:
+            yield row
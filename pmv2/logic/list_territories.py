@@ -1,7 +1,9 @@
 """Territories listing logic is located here."""
 
 from dataclasses import dataclass, field
+from typing import Callable
 
+from pmv2.logic.workers import process_in_workers
 from pmv2.urban_client import UrbanClient
 from pmv2.urban_client.models import TerritoryWithoutGeometry
 
@@ -14,27 +16,51 @@ class TerritoryInfo:
     inner: list["TerritoryInfo"] = field(default_factory=list)
 
 
-async def get_territories(urban_client: UrbanClient, max_level: int) -> list[TerritoryInfo]:
-    """Get territories list in hierarchy form."""
-    return await _get_inner(urban_client, None, max_level)
+async def get_territories(
+    urban_client: UrbanClient,
+    max_level: int | None,
+    parallel_workers: int = 1,
+    on_level_loaded: Callable[[list[TerritoryInfo]], None] | None = None,
+) -> list[TerritoryInfo]:
+    """Get territories list in hierarchy form.
+
+    Hierarchy is traversed level by level, inner territories of all of the territories of a level are requested
+    concurrently by `parallel_workers` workers. If `on_level_loaded` is set, it is called with territories of each
+    level as soon as the level is loaded.
+    """
+
+    async def load_inner(parent: TerritoryInfo) -> None:
+        parent.inner = await _get_inner(urban_client, parent.territory.territory_id)
+
+    result = await _get_inner(urban_client, None)
+    level = result
+    while len(level) > 0:
+        if on_level_loaded is not None:
+            on_level_loaded(level)
+        parents = [t for t in level if max_level is None or max_level > t.territory.level]
+        await process_in_workers(parents, load_inner, parallel_workers)
+        level = [inner for parent in parents for inner in parent.inner]
+    return result
 
 
 def print_terrirories(territories: list[TerritoryInfo], indent: int = 2) -> None:
     """Print territories list in hierarchy form."""
     for t in territories:
-        print(
-            f"{' ' * (indent) * (t.territory.level-1)}{t.territory.territory_id:5}"
-            f" {'>' * t.territory.level} {t.territory.name}"
-        )
-        print_terrirories(t.inner)
+        _print_territory(t.territory, indent)
+        print_terrirories(t.inner, indent)
+
+
+def print_territories_level(territories: list[TerritoryInfo], indent: int = 2) -> None:
+    """Print territories of a single level of hierarchy without their inner territories."""
+    for t in territories:
+        _print_territory(t.territory, indent)
+
 
+def _print_territory(territory: TerritoryWithoutGeometry, indent: int) -> None:
+    print(f"{' ' * (indent) * (territory.level-1)}{territory.territory_id:5} {'>' * territory.level} {territory.name}")
 
-async def _get_inner(urban_client: UrbanClient, parent_id: int | None, max_level: int | None) -> list[TerritoryInfo]:
+
+async def _get_inner(urban_client: UrbanClient, parent_id: int | None) -> list[TerritoryInfo]:
     res = await urban_client.get_inner_territories(parent_id)
     res.sort(key=lambda el: el.territory_id)
-    result: list[TerritoryInfo] = []
-    for territory in res:
-        result.append(TerritoryInfo(territory))
-        if max_level is None or max_level > territory.level:
-            result[-1].inner = await _get_inner(urban_client, territory.territory_id, max_level)
-    return result
+    return [TerritoryInfo(territory) for territory in res]
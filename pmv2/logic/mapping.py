@@ -0,0 +1,149 @@
+"""Declarative mapping of input columns to uploaded entities fields is defined here.
+
+Mapping is described once (in Python or loaded from YAML as any other pydantic model) and applied to a whole chunk
+of input rows by columns, so no per-row mapping functions and callbacks are called. Example of a service mapping:
+
+    fields:
+      name: {columns: [name, "name:ru", description], default: "(Сервис без названия)"}
+      capacity_real:
+        columns: [capacity, мощность]
+        check: integer
+        default: 100
+        properties_if_default: {is_capacity_real: false}
+    properties: {mode: rest}
+"""
+
+import itertools
+from typing import Any, Literal
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field
+
+
+class FieldMapping(BaseModel):
+    """Value of a single entity field taken from the first of `columns` with a suitable value in a row.
+
+    Value is suitable depending on `check`: "truthy" - non-null value which is true in Python terms (non-empty
+    string, non-zero number), "present" - any non-null value, "string" - non-empty string, "integer" - value
+    convertible to integer number (converted value is used). Values are formatted with `template` (by "{}"
+    placeholder) if it is set. If no column has a suitable value, `default` is used and `properties_if_default`
+    are added to entity properties.
+    """
+
+    columns: list[str] = Field(default_factory=list)
+    check: Literal["truthy", "present", "string", "integer"] = "truthy"
+    template: str | None = None
+    default: Any = None
+    properties_if_default: dict[str, Any] = Field(default_factory=dict)
+
+    def apply(self, chunk: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, dict[str, np.ndarray]]:
+        """Get field values for each row of the chunk, mask of rows where default value is used and masks of rows
+        where the value was taken from each of the columns.
+        """
+        values = np.full(chunk.shape[0], self.default, dtype=object)
+        is_default = np.ones(chunk.shape[0], dtype=bool)
+        used: dict[str, np.ndarray] = {}
+        for column in self.columns:
+            if column not in chunk.columns or not is_default.any():
+                continue
+            column_values, suitable = self._check_values(chunk[column])
+            suitable = suitable & is_default
+            if not suitable.any():
+                continue
+            selected = column_values[suitable]
+            if self.template is not None:
+                selected = np.array([self.template.format(value) for value in selected], dtype=object)
+            values[suitable] = selected
+            is_default &= ~suitable
+            used[column] = suitable
+        return values, is_default, used
+
+    def _check_values(self, series: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+        values = series.to_numpy(dtype=object)
+        present = series.notna().to_numpy()
+        if self.check == "present":
+            return values, present
+        if self.check == "integer":
+            numbers = pd.to_numeric(series, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+            suitable = np.isfinite(numbers)
+            integers = np.full(values.shape[0], None, dtype=object)
+            integers[suitable] = numbers[suitable].astype(np.int64).astype(object)
+            return integers, suitable
+        truthy = present.copy()  # nullable dtypes missing values (pd.NA) can not be converted to bool
+        truthy[present] = np.fromiter(map(bool, values[present]), dtype=bool, count=int(present.sum()))
+        if self.check == "string":
+            return values, truthy & (np.fromiter(map(type, values), dtype=object, count=values.shape[0]) == str)
+        return values, truthy
+
+
+class PropertiesMapping(BaseModel):
+    """Entity properties built from row columns.
+
+    Mode "rest" takes all of the non-null row values except geometry, `exclude` columns and values used by entity
+    fields, mode "columns" takes non-null value of the first present column of each of the `columns` lists and
+    mode "none" takes no values from the row. `constants` are added to properties of each row.
+    """
+
+    mode: Literal["rest", "columns", "none"] = "rest"
+    columns: list[list[str]] = Field(default_factory=list)
+    exclude: list[str] = Field(default_factory=list)
+    constants: dict[str, Any] = Field(default_factory=dict)
+
+    def apply(self, chunk: pd.DataFrame, used: dict[str, np.ndarray]) -> list[dict[str, Any]]:
+        """Get properties for each row of the chunk, `used` are masks of rows where column values were taken
+        by the entity fields.
+        """
+        geometry_column = chunk.geometry.name if hasattr(chunk, "geometry") else "geometry"
+        if self.mode == "none":
+            return [dict(self.constants) for _ in range(chunk.shape[0])]
+        if self.mode == "columns":
+            columns = [column for group in self.columns for column in group if column in chunk.columns]
+        else:
+            excluded = {geometry_column, *self.exclude}
+            columns = [column for column in chunk.columns if column not in excluded]
+        keep = chunk[columns].notna().to_numpy(copy=True)
+        if self.mode == "columns":
+            for group in self.columns:
+                taken = np.zeros(chunk.shape[0], dtype=bool)
+                for column in group:
+                    if column in chunk.columns:
+                        j = columns.index(column)
+                        keep[:, j] &= ~taken
+                        taken |= keep[:, j]
+        else:
+            for column, mask in used.items():
+                if column in columns:
+                    keep[:, columns.index(column)] &= ~mask
+        values = chunk[columns].to_numpy(dtype=object).tolist()
+        properties = [dict(itertools.compress(zip(columns, row), mask)) for row, mask in zip(values, keep.tolist())]
+        if len(self.constants) > 0:
+            for row_properties in properties:
+                row_properties.update(self.constants)
+        return properties
+
+
+class EntityMapping(BaseModel):
+    """Mapping of input rows to fields of an uploaded entity (i.e. name, address, capacity) and its properties."""
+
+    fields: dict[str, FieldMapping] = Field(default_factory=dict)
+    properties: PropertiesMapping = Field(default_factory=PropertiesMapping)
+
+    def apply(self, chunk: pd.DataFrame) -> list[dict[str, Any]]:  # pylint: disable=too-many-locals
+        """Map rows of the chunk to entity fields, each row gets a dictionary of all of the fields and "properties"."""
+        fields: dict[str, np.ndarray] = {}
+        used: dict[str, np.ndarray] = {}
+        defaulted: list[tuple[dict[str, Any], np.ndarray]] = []
+        for name, field in self.fields.items():
+            fields[name], is_default, field_used = field.apply(chunk)
+            for column, mask in field_used.items():
+                used[column] = used[column] | mask if column in used else mask
+            if field.properties_if_default:
+                defaulted.append((field.properties_if_default, is_default))
+        properties = self.properties.apply(chunk, used)
+        for extra_properties, is_default in defaulted:
+            for i in np.flatnonzero(is_default):
+                properties[i].update(extra_properties)
+        names = list(fields)
+        rows = zip(*(values.tolist() for values in fields.values())) if len(names) > 0 else itertools.repeat(())
+        return [dict(zip(names, row), properties=row_properties) for row, row_properties in zip(rows, properties)]
@@ -0,0 +1,284 @@
+"""Local spatial cache of existing physical objects is defined here."""
+
+from typing import Any, NamedTuple
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+import structlog
+
+from pmv2.logic.geometry_matching import (
+    INTERSECTION_BOUNDARY,
+    get_pairs_intersection_ratios,
+    match_geometries,
+    to_matching_geometries,
+)
+from pmv2.logic.workers import process_in_workers
+from pmv2.urban_client import UrbanClient
+
+SEARCH_RADIUS = 0.0005
+"""Distance (in degrees) around the geometry to look for candidate objects, it covers matching buffers with a margin."""
+
+
+class ObjectsMatch(NamedTuple):
+    """Best matching cached object of a prepared geometry found by batch matching (`PhysicalObjectsCache.match`):
+    its position in the index (-1 if there is none) and intersection ratio. `objects` is the number of cached
+    objects at the time of matching, objects added later are checked on use (see `PhysicalObjectsCache.get_match`).
+    """
+
+    position: int
+    ratio: float
+    objects: int
+
+
+class _ObjectsIndex:  # pylint: disable=too-many-instance-attributes
+    """Spatial index of physical objects of a single type, geometries for matching (see `to_matching_geometries`)
+    are kept along with the objects, so they are prepared once per object instead of once per input row.
+
+    STRtree can not be updated, so newly added objects are kept in a pending list checked by a full scan and are moved
+    to the tree when the list becomes big enough.
+    """
+
+    def __init__(self):
+        self._keys: set[tuple[Any, ...]] = set()
+        self._physical_object_ids: list[int] = []
+        self._object_geometry_ids: list[int | None] = []
+        self._geometries: list[shapely.geometry.base.BaseGeometry] = []
+        self._matching_geometries: list[shapely.geometry.base.BaseGeometry] = []
+        self._tree = shapely.STRtree([])
+        self._matching_tree = shapely.STRtree([])
+        self._indexed_matching = np.empty(0, dtype=object)
+        self._indexed = 0
+
+    def __len__(self) -> int:
+        return len(self._geometries)
+
+    def add(
+        self,
+        physical_object_id: int,
+        object_geometry_id: int | None,
+        geometry: shapely.geometry.base.BaseGeometry,
+        matching_geometry: shapely.geometry.base.BaseGeometry,
+    ) -> None:
+        """Add object to the index if it is not there yet."""
+        key = (physical_object_id, object_geometry_id if object_geometry_id is not None else geometry.wkb)
+        if key in self._keys:
+            return
+        self._keys.add(key)
+        self._physical_object_ids.append(physical_object_id)
+        self._object_geometry_ids.append(object_geometry_id)
+        self._geometries.append(geometry)
+        self._matching_geometries.append(matching_geometry)
+        if len(self._geometries) - self._indexed > max(256, self._indexed // 4):
+            self._tree = shapely.STRtree(self._geometries)
+            self._indexed_matching = np.array(self._matching_geometries, dtype=object)
+            self._matching_tree = shapely.STRtree(self._indexed_matching)
+            self._indexed = len(self._geometries)
+
+    def get_physical_object_id(self, position: int) -> int:
+        """Get identifier of physical object at the given position of the index."""
+        return self._physical_object_ids[position]
+
+    def match(self, matching_geometries: np.ndarray, intersection_boundary: float) -> list[ObjectsMatch]:
+        """Find the best matching object for each of the prepared geometries (see `match_geometries`) by a single
+        query of the tree and a full scan of the pending objects.
+        """
+        best, ratios = match_geometries(
+            matching_geometries, self._indexed_matching, intersection_boundary, tree=self._matching_tree
+        )
+        if self._indexed < len(self._geometries):
+            pending_best, pending_ratios = match_geometries(
+                matching_geometries,
+                np.array(self._matching_geometries[self._indexed :], dtype=object),
+                intersection_boundary,
+            )
+            better = (pending_best >= 0) & (pending_ratios > ratios)
+            best[better] = pending_best[better] + self._indexed
+            ratios[better] = pending_ratios[better]
+        return [ObjectsMatch(position, ratio, len(self)) for position, ratio in zip(best.tolist(), ratios.tolist())]
+
+    def match_added(
+        self, matching_geometry: shapely.geometry.base.BaseGeometry, match: ObjectsMatch, intersection_boundary: float
+    ) -> ObjectsMatch:
+        """Update the match of the prepared geometry with objects added to the index after it was found."""
+        if match.objects >= len(self):
+            return match
+        ratios = get_pairs_intersection_ratios(
+            np.array([matching_geometry]), np.array(self._matching_geometries[match.objects :], dtype=object)
+        )
+        i = int(np.argmax(ratios))
+        if ratios[i] > intersection_boundary and ratios[i] > match.ratio:
+            return ObjectsMatch(match.objects + i, float(ratios[i]), len(self))
+        return match._replace(objects=len(self))
+
+    def query(self, area: shapely.geometry.base.BaseGeometry) -> gpd.GeoDataFrame:
+        """Get objects intersecting the given area with their geometries for matching in "matching_geometry"."""
+        found = self._tree.query(area)
+        if self._indexed < len(self._geometries):
+            pending = np.array(self._geometries[self._indexed :], dtype=object)
+            found = np.concatenate([found, np.flatnonzero(shapely.intersects(pending, area)) + self._indexed])
+        if len(found) == 0:
+            return gpd.GeoDataFrame(columns=["geometry"], geometry="geometry", crs=4326)
+        found.sort()
+        return gpd.GeoDataFrame(
+            {
+                "physical_object_id": [self._physical_object_ids[i] for i in found],
+                "object_geometry_id": [self._object_geometry_ids[i] for i in found],
+                "geometry": [self._geometries[i] for i in found],
+                "matching_geometry": [self._matching_geometries[i] for i in found],
+            },
+            geometry="geometry",
+            crs=4326,
+        )
+
+
+class PhysicalObjectsCache:
+    """Local cache of existing physical objects used instead of `get_objects_around` requests.
+
+    Objects are downloaded by square tiles (in EPSG:4326 degrees) aligned to a global grid, only tiles touched by
+    input geometries are requested, each of them once per cache lifetime.
+    """
+
+    def __init__(self, tile_size: float = 0.02, logger: structlog.stdlib.BoundLogger = ...):
+        self._tile_size = tile_size
+        self._indexes: dict[int, _ObjectsIndex] = {}
+        self._fetched_tiles: dict[int, set[tuple[int, int]]] = {}
+        if logger is ...:
+            self._logger = structlog.get_logger("physical_objects_cache")
+        else:
+            self._logger = logger
+
+    async def prefetch(
+        self,
+        urban_client: UrbanClient,
+        geometries: gpd.GeoSeries,
+        physical_object_type_id: int,
+        parallel_workers: int = 1,
+    ) -> None:
+        """Download physical objects of a given type around the given geometries (in EPSG:4326)."""
+        fetched = self._fetched_tiles.setdefault(physical_object_type_id, set())
+        index = self._indexes.setdefault(physical_object_type_id, _ObjectsIndex())
+        tiles = self._get_tiles(shapely.bounds(np.asarray(geometries))) - fetched
+        if len(tiles) == 0:
+            return
+        await self._logger.ainfo(
+            "Prefetching physical objects", physical_object_type_id=physical_object_type_id, tiles=len(tiles)
+        )
+
+        async def fetch_tile(tile: tuple[int, int]) -> None:
+            x, y = tile
+            tile_geometry = shapely.box(
+                x * self._tile_size, y * self._tile_size, (x + 1) * self._tile_size, (y + 1) * self._tile_size
+            )
+            try:
+                objects = await urban_client.get_objects_around(tile_geometry, physical_object_type_id)
+            except Exception:  # pylint: disable=broad-except
+                await self._logger.aexception("Error on prefetching physical objects tile, it will not be cached")
+                return
+            self._add_objects(index, objects)
+            fetched.add(tile)
+
+        await process_in_workers(sorted(tiles), fetch_tile, parallel_workers)
+        await self._logger.ainfo(
+            "Prefetched physical objects", physical_object_type_id=physical_object_type_id, objects=len(index)
+        )
+
+    def covers(self, geometry: shapely.geometry.base.BaseGeometry, physical_object_type_id: int) -> bool:
+        """Check if objects of a given type around the geometry were prefetched so the cache can be used."""
+        fetched = self._fetched_tiles.get(physical_object_type_id)
+        if not fetched:
+            return False
+        return self._get_tiles(np.array([geometry.bounds])) <= fetched
+
+    def get_objects_around(
+        self, geometry: shapely.geometry.base.BaseGeometry, physical_object_type_id: int
+    ) -> gpd.GeoDataFrame:
+        """Get cached physical objects located near the given geometry (see `_ObjectsIndex.query`)."""
+        minx, miny, maxx, maxy = geometry.bounds
+        return self._indexes[physical_object_type_id].query(
+            shapely.box(minx - SEARCH_RADIUS, miny - SEARCH_RADIUS, maxx + SEARCH_RADIUS, maxy + SEARCH_RADIUS)
+        )
+
+    def match(
+        self,
+        physical_object_type_id: int,
+        geometries: np.ndarray,
+        matching_geometries: np.ndarray,
+        intersection_boundary: float = INTERSECTION_BOUNDARY,
+    ) -> list[ObjectsMatch | None]:
+        """Match a batch of EPSG:4326 geometries prepared for matching (`matching_geometries`) against cached
+        objects of a given type at once, geometries which are not covered by the cache (see `covers`) get None.
+        """
+        if physical_object_type_id not in self._indexes:
+            return [None] * len(geometries)
+        covered = np.array([self.covers(geometry, physical_object_type_id) for geometry in geometries], dtype=bool)
+        matches: list[ObjectsMatch | None] = [None] * len(geometries)
+        if covered.any():
+            found = self._indexes[physical_object_type_id].match(
+                np.asarray(matching_geometries, dtype=object)[covered], intersection_boundary
+            )
+            for i, match in zip(np.flatnonzero(covered).tolist(), found):
+                matches[i] = match
+        return matches
+
+    def get_match(
+        self,
+        physical_object_type_id: int,
+        matching_geometry: shapely.geometry.base.BaseGeometry,
+        match: ObjectsMatch,
+        intersection_boundary: float = INTERSECTION_BOUNDARY,
+    ) -> int | None:
+        """Get identifier of the best matching physical object of a batch match (see `match`) taking into account
+        objects added to the cache since the match was found, None if there is no matching object.
+        """
+        index = self._indexes[physical_object_type_id]
+        match = index.match_added(matching_geometry, match, intersection_boundary)
+        return index.get_physical_object_id(match.position) if match.position >= 0 else None
+
+    def add(
+        self,
+        physical_object_type_id: int,
+        physical_object_id: int,
+        object_geometry_id: int | None,
+        geometry: shapely.geometry.base.BaseGeometry,
+        matching_geometry: shapely.geometry.base.BaseGeometry | None = None,
+    ) -> None:
+        """Add newly uploaded object to the cache if objects of its type are cached."""
+        if physical_object_type_id not in self._indexes:
+            return
+        if matching_geometry is None:
+            matching_geometry = to_matching_geometries(np.array([geometry]))[0]
+        self._indexes[physical_object_type_id].add(physical_object_id, object_geometry_id, geometry, matching_geometry)
+
+    def _get_tiles(self, bounds: np.ndarray) -> set[tuple[int, int]]:
+        tiles = set()
+        bounds = bounds[np.isfinite(bounds).all(axis=1)]
+        bounds = np.floor(
+            (bounds + np.array([-SEARCH_RADIUS, -SEARCH_RADIUS, SEARCH_RADIUS, SEARCH_RADIUS])) / self._tile_size
+        ).astype(int)
+        for minx, miny, maxx, maxy in np.unique(bounds, axis=0):
+            tiles.update((x, y) for x in range(minx, maxx + 1) for y in range(miny, maxy + 1))
+        return tiles
+
+    @staticmethod
+    def _add_objects(index: _ObjectsIndex, objects: gpd.GeoDataFrame) -> None:
+        if objects.shape[0] == 0:
+            return
+        object_geometry_ids = (
+            objects["object_geometry_id"] if "object_geometry_id" in objects.columns else [None] * objects.shape[0]
+        )
+        if not all(objects["geometry"].is_valid):
+            objects["geometry"] = objects["geometry"].buffer(0)
+        for physical_object_id, object_geometry_id, geometry, matching_geometry in zip(
+            objects["physical_object_id"],
+            object_geometry_ids,
+            objects["geometry"],
+            to_matching_geometries(objects["geometry"].values),
+        ):
+            index.add(
+                int(physical_object_id),
+                int(object_geometry_id) if not pd.isna(object_geometry_id) else None,
+                geometry,
+                matching_geometry,
+            )
@@ -0,0 +1,71 @@
+"""Periodic progress logging of rows processing is defined here."""
+
+import time
+
+import geopandas as gpd
+import structlog
+
+from pmv2.logic.geojson_reader import InputData, get_total
+from pmv2.logic.upload_results import ResultSink, UploadResult
+
+
+class ProgressMeter:  # pylint: disable=too-many-instance-attributes
+    """Progress meter of input rows processing which logs a single line once in `interval` seconds instead of
+    a line for every row.
+
+    Line contains number of processed rows and errors, number of input rows (read so far if input is read by
+    chunks), processing rate and estimated time left when the total number of rows is known.
+    """
+
+    def __init__(self, data: InputData, name: str, interval: float = 10.0, logger: structlog.stdlib.BoundLogger = ...):
+        self._data = data
+        self._name = name
+        self._interval = interval
+        self.processed = 0
+        self.errors = 0
+        self._started_at = time.monotonic()
+        self._logged_at = self._started_at
+        if logger is ...:
+            self._logger = structlog.get_logger("progress")
+        else:
+            self._logger = logger
+
+    def track(self, result_sink: ResultSink) -> ResultSink:
+        """Get result sink which counts results and passes them to the given sink."""
+
+        def sink(result: UploadResult) -> None:
+            self.update(result.success)
+            result_sink(result)
+
+        return sink
+
+    def update(self, success: bool = True) -> None:
+        """Count processed row, log progress if `interval` seconds have passed since the last progress line."""
+        self.processed += 1
+        self.errors += not success
+        now = time.monotonic()
+        if now - self._logged_at >= self._interval:
+            self._logged_at = now
+            self._log("Upload progress", now)
+
+    def finish(self) -> None:
+        """Log the final progress line."""
+        self._log("Upload finished", time.monotonic())
+
+    def _log(self, event: str, now: float) -> None:
+        elapsed = now - self._started_at
+        rate = self.processed / elapsed if elapsed > 0 else 0.0
+        total = get_total(self._data)
+        extra = {}
+        if isinstance(self._data, gpd.GeoDataFrame) and rate > 0:
+            extra["eta_seconds"] = round((total - self.processed) / rate)
+        self._logger.info(
+            event,
+            entities=self._name,
+            processed=self.processed,
+            errors=self.errors,
+            total=total,
+            rows_per_second=round(rate, 1),
+            elapsed_seconds=round(elapsed),
+            **extra,
+        )
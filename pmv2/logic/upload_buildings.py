@@ -1,47 +1,43 @@
 """Buildings upload logic is defined here."""
 
-import asyncio
-import itertools
-import math
-from typing import Any, Awaitable, Callable
+from typing import Any, Callable, Container
 
 import geopandas as gpd
-import pandas as pd
 import shapely
 import structlog
 
+from pmv2.logic.deduplication import DuplicatesGroup
+from pmv2.logic.geojson_reader import InputData, get_total, rows_to_geodataframe
+from pmv2.logic.geometry_preparation import PreparedRow
+from pmv2.logic.mapping import EntityMapping
+from pmv2.logic.physical_objects_cache import ObjectsMatch
+from pmv2.logic.progress import ProgressMeter
 from pmv2.logic.upload_physical_objects import PhysicalObjectsUploader
+from pmv2.logic.upload_results import ResultSink, UploadResult, ignore_result
+from pmv2.logic.workers import process_in_workers
 from pmv2.urban_client import UrbanClient
+from pmv2.urban_client.metrics import measure_stage
 from pmv2.urban_client.models import UrbanObject
 
 
 class BuildingsUploader:
-    """Buildings uploader."""
+    """Buildings uploader.
 
-    def __init__(  # pylint: disable=too-many-arguments
+    `mapping` maps input rows to living buildings "residents_number", "living_area" and "properties" fields,
+    physical objects are mapped by the mapping of `po_uploader`.
+    """
+
+    def __init__(
         self,
         urban_client: UrbanClient,
         *,
         po_uploader: PhysicalObjectsUploader,
-        residents_number_mapper: Callable[[dict[str, Any]], tuple[int | None, Callable[[dict[str, Any]], None]]],
-        living_area_mapper: Callable[[dict[str, Any]], tuple[float | None, Callable[[dict[str, Any]], None]]],
-        living_building_properties_mapper: Callable[
-            [dict[str, Any]], tuple[dict[str, Any], Callable[[dict[str, Any]], None]]
-        ],
-        po_data_mapper: (
-            Callable[[dict[str, Any]], tuple[dict[str, Any], Callable[[dict[str, Any]], None]]] | None
-        ) = None,
+        mapping: EntityMapping,
         logger: structlog.stdlib.BoundLogger = ...,
     ):
         self._urban_client = urban_client
         self._po_uploader = po_uploader
-        self._residents_number_mapper = residents_number_mapper
-        self._living_area_mapper = living_area_mapper
-        self._lb_properties_mapper = living_building_properties_mapper
-        if po_data_mapper is None:
-            self._po_data_mapper = lambda x: x
-        else:
-            self._po_data_mapper = po_data_mapper
+        self.mapping = mapping
         if logger is ...:
             self._logger = structlog.get_logger("upload_buildings")
         else:
@@ -49,100 +45,109 @@ class BuildingsUploader:
 
     async def upload_buildings(  # pylint: disable=too-many-arguments
         self,
-        gdf: gpd.GeoDataFrame,
+        gdf: InputData,
         physical_object_type_mapper: Callable[[dict[str, Any]], tuple[int, bool | None]],
         parallel_workers: int = 1,
-    ) -> tuple[list[UrbanObject], gpd.GeoDataFrame | None]:
-        """Upload GeoDataFrame of buildings with physical object type decided by mapper function."""
-        counter = 0
-
-        def logging_wrapper(func: Awaitable[Callable[..., Any]]):
-            async def wrapped(*args, **kwargs) -> Any:
-                nonlocal counter
-                counter += 1
-                await self._logger.adebug("Preparing to upload building", current=counter, total=gdf.shape[0])
-                return await func(*args, **kwargs)
-
-            return wrapped
-
-        part_size = math.ceil(gdf.shape[0] / parallel_workers)
-        gdfs = [gdf.iloc[i : i + part_size] for i in range(0, gdf.shape[0], part_size)]
-        workers = [
-            self._upload_buildings_batch(part, physical_object_type_mapper, logging_wrapper(self.upload_building))
-            for part in gdfs
-        ]
-
-        results = await asyncio.gather(*workers)
-        uploaded_buildings = list(itertools.chain.from_iterable(t[0] for t in results))
-        error_gdfs = [t[1] for t in results if t[1] is not None]
-        if len(error_gdfs) > 0:
-            errors = pd.concat(error_gdfs)
-        else:
-            errors = None
-        await self._logger.ainfo("Finished buildings upload", total=gdf.shape[0], successful=len(uploaded_buildings))
-        return uploaded_buildings, errors
+        *,
+        result_sink: ResultSink = ignore_result,
+        skip_indexes: Container[int] | None = None,
+    ) -> tuple[int, gpd.GeoDataFrame | None]:
+        """Upload GeoDataFrame of buildings with physical object type decided by mapper function.
+
+        Result of each row is passed to `result_sink` as soon as it is processed, rows with indexes from
+        `skip_indexes` (i.e. uploaded on a previous run) are not processed at all.
+        """
+        progress = ProgressMeter(gdf, "buildings", logger=self._logger)
+        result_sink = progress.track(result_sink)
+        uploaded_buildings = 0
+        errors: list[tuple[Any, dict[str, Any]]] = []
+
+        def get_physical_object_type_id(row: PreparedRow) -> int | None:
+            try:
+                return physical_object_type_mapper(row.data)[0]
+            except Exception:  # pylint: disable=broad-except
+                return None  # error is logged when the row is uploaded
 
-    async def upload_building(self, full_data: dict[str, Any], physical_object_type_id: int, is_living: bool):
-        """Upload a single building of a given physical_object_type and livinglesness."""
-        geometry: shapely.geometry.base.BaseGeometry = full_data.pop("geometry")
-        callbacks = []
+        async def upload_row(item: tuple[PreparedRow, ObjectsMatch | None]) -> None:
+            nonlocal uploaded_buildings
+            (idx, record, matching_geometry, mapped, duplicates_group), batch_match = item
+            try:
+                physical_object_type_id, is_living = physical_object_type_mapper(record)
+                uploaded = await self.upload_building(
+                    record["geometry"],
+                    physical_object_fields=mapped["physical_object"],
+                    living_building_fields=mapped["living_building"],
+                    physical_object_type_id=physical_object_type_id,
+                    is_living=is_living,
+                    matching_geometry=matching_geometry,
+                    duplicates_group=duplicates_group,
+                    batch_match=batch_match,
+                )
+                if uploaded is not None:
+                    uploaded_buildings += 1
+                    result_sink(UploadResult.from_urban_object(idx, uploaded))
+                else:
+                    result_sink(UploadResult.error(idx))
+            except Exception:  # pylint: disable=broad-except
+                await self._logger.aexception(
+                    "Error on building upload", physical_object_data=mapped["physical_object"]
+                )
+                errors.append((idx, record))
+                result_sink(UploadResult.error(idx))
+            finally:
+                self._po_uploader.release_duplicates_group(duplicates_group)
+
+        await process_in_workers(
+            self._po_uploader.iterate_matched_rows(
+                gdf,
+                skip_indexes,
+                {"physical_object": self._po_uploader.mapping, "living_building": self.mapping},
+                get_physical_object_type_id,
+            ),
+            upload_row,
+            parallel_workers,
+        )
+        progress.finish()
 
-        resident_numer, cb = self._residents_number_mapper(full_data)
-        callbacks.append(cb)
-        living_area, cb = self._living_area_mapper(full_data)
-        callbacks.append(cb)
-        lb_properties, cb = self._lb_properties_mapper(full_data)
-        callbacks.append(cb)
-        physical_object_data, cb = self._po_data_mapper(full_data)
-        callbacks.append(cb)
+        errors_gdf = rows_to_geodataframe(errors)
+        await self._logger.ainfo("Finished buildings upload", total=get_total(gdf), successful=uploaded_buildings)
+        return uploaded_buildings, errors_gdf
 
+    async def upload_building(  # pylint: disable=too-many-arguments
+        self,
+        geometry: shapely.geometry.base.BaseGeometry,
+        *,
+        physical_object_fields: dict[str, Any],
+        living_building_fields: dict[str, Any],
+        physical_object_type_id: int,
+        is_living: bool,
+        matching_geometry: shapely.geometry.base.BaseGeometry | None = None,
+        duplicates_group: DuplicatesGroup | None = None,
+        batch_match: ObjectsMatch | None = None,
+    ) -> UrbanObject | None:
+        """Upload a single building of a given physical_object_type and livinglesness, fields are mapped from input
+        row (see `EntityMapping.apply`), `matching_geometry` is the prepared geometry, `duplicates_group` is
+        the group of input rows duplicating each other and `batch_match` is the match of prefetched physical objects
+        (see `PhysicalObjectsUploader.upload_physical_object_if_not_exists`).
+        """
         result = await self._po_uploader.upload_physical_object_if_not_exists(
             geometry=geometry,
             physical_object_type_id=physical_object_type_id,
-            physical_object_data=physical_object_data,
+            physical_object_fields=physical_object_fields,
+            matching_geometry=matching_geometry,
+            duplicates_group=duplicates_group,
+            batch_match=batch_match,
         )
         if result is None:
-            self._logger.warning("Building has no territory parent. Skipping...", data=full_data)
+            self._logger.warning("Building has no territory parent. Skipping...", data=living_building_fields)
             return None
 
-        for cb in callbacks:
-            cb(full_data)
-
         if is_living:
-            await self._urban_client.add_living_building(
-                result.physical_object.physical_object_id,
-                residents_number=resident_numer,
-                living_area=living_area,
-                properties=lb_properties,
-            )
+            with measure_stage("upload"):
+                await self._urban_client.add_living_building(
+                    result.physical_object.physical_object_id,
+                    residents_number=living_building_fields.get("residents_number"),
+                    living_area=living_building_fields.get("living_area"),
+                    properties=living_building_fields.get("properties", {}),
+                )
         return result
-
-    async def _upload_buildings_batch(
-        self,
-        gdf: gpd.GeoDataFrame,
-        physical_object_type_mapper: Callable[[dict[str, Any]], tuple[int, bool | None]],
-        upload_building: Awaitable[Callable[[dict[str, Any], int, bool], UrbanObject | None]] = ...,
-        max_errors: int | None = None,
-    ) -> tuple[list[UrbanObject], gpd.GeoDataFrame | None]:
-        if upload_building is ...:
-            upload_building = self.upload_building
-        uploaded_buildings = []
-        errors = []
-        for idx, data_series in gdf.iterrows():
-            try:
-                full_data = data_series.dropna().to_dict()
-                physical_object_type_id, is_living = physical_object_type_mapper(full_data)
-                uploaded = await upload_building(data_series.dropna().to_dict(), physical_object_type_id, is_living)
-                if uploaded is not None:
-                    uploaded_buildings.append(uploaded)
-            except Exception:  # pylint: disable=broad-except
-                self._logger.exception("Error on building upload", physical_object_data=full_data)
-                errors.append(idx)
-                if max_errors is not None and len(errors) >= max_errors:
-                    self._logger.error("Finishing uploading worker because or errors rate", errors=len(errors))
-                    break
-            except KeyboardInterrupt:
-                await self._logger.awarning("Got interruption signal, finising")
-                break
-        errors_gdf = gdf.loc[errors] if len(errors) > 0 else None
-        return uploaded_buildings, errors_gdf
@@ -1,86 +1,123 @@
 """Functional zones upload logic is defined here."""
 
-import asyncio
-import itertools
-import math
-from typing import Any, Awaitable, Callable
+from typing import Any, Callable, Container
 
 import geopandas as gpd
-import pandas as pd
 import shapely
 import structlog
 
+from pmv2.logic.functional_zones_cache import FunctionalZonesCache
+from pmv2.logic.geojson_reader import InputData, get_total, rows_to_geodataframe
+from pmv2.logic.geometry_preparation import PreparedRow, iterate_prepared_rows
+from pmv2.logic.mapping import EntityMapping
+from pmv2.logic.progress import ProgressMeter
+from pmv2.logic.upload_results import ResultSink, UploadResult, ignore_result
+from pmv2.logic.workers import process_in_workers
 from pmv2.urban_client import UrbanClient
+from pmv2.urban_client.metrics import measure_stage
 from pmv2.urban_client.models import FunctionalZone, PostFunctionalZone, shapely_to_geometry
 
 
 class FunctionalZonesUploader:
-    """Functional zones uploader."""
+    """Functional zones uploader.
+
+    `mapping` maps input rows to functional zones "functional_zone_type" (raw input value which is converted to
+    functional zone type identifier on upload) and "properties" fields.
+    """
 
     def __init__(
         self,
         urban_client: UrbanClient,
-        properties_mapper: Callable[[dict[str, Any]], tuple[dict[str, Any], Callable[[dict[str, Any]], None]]],
+        *,
+        mapping: EntityMapping,
         logger: structlog.stdlib.BoundLogger = ...,
     ):
         self._urban_client = urban_client
-        self._properties_mapper = properties_mapper
+        self.mapping = mapping
         if logger is ...:
             self._logger = structlog.get_logger("upload_functional_zones")
         else:
             self._logger = logger
+        self._zones_cache = FunctionalZonesCache(logger=self._logger)
 
     async def upload_functional_zones(
         self,
-        gdf: gpd.GeoDataFrame,
-        functional_zone_type_mapper: Callable[[dict[str, Any]], int],
+        gdf: InputData,
+        functional_zone_type_mapper: Callable[[Any], int],
         parallel_workers: int = 1,
-    ) -> tuple[list[FunctionalZone], gpd.GeoDataFrame | None]:
-        """Upload GeoDataFrame of functional_zones with existing checking."""
-        counter = 0
-
-        def logging_wrapper(func: Awaitable[Callable[..., Any]]):
-            async def wrapped(*args, **kwargs) -> Any:
-                nonlocal counter
-                counter += 1
-                await self._logger.adebug("Preparing to upload functional zone", current=counter, total=gdf.shape[0])
-                return await func(*args, **kwargs)
-
-            return wrapped
-
-        part_size = math.ceil(gdf.shape[0] / parallel_workers)
-        gdfs = [gdf.iloc[i : i + part_size] for i in range(0, gdf.shape[0], part_size)]
-        workers = [
-            self._upload_functional_zones_batch(
-                part, functional_zone_type_mapper, logging_wrapper(self.upload_functional_zone)
-            )
-            for part in gdfs
-        ]
-
-        results = await asyncio.gather(*workers)
-        uploaded_functional_zones = list(itertools.chain.from_iterable(t[0] for t in results))
-        error_gdfs = [t[1] for t in results if t[1] is not None]
-        if len(error_gdfs) > 0:
-            errors = pd.concat(error_gdfs)
-        else:
-            errors = None
-        await self._logger.ainfo(
-            "Finished functional_zones upload", total=gdf.shape[0], successful=len(uploaded_functional_zones)
+        *,
+        result_sink: ResultSink = ignore_result,
+        skip_indexes: Container[int] | None = None,
+    ) -> tuple[int, gpd.GeoDataFrame | None]:
+        """Upload GeoDataFrame of functional_zones with existing checking, `functional_zone_type_mapper` converts
+        mapped "functional_zone_type" field value to functional zone type identifier.
+
+        Result of each row is passed to `result_sink` as soon as it is processed, rows with indexes from
+        `skip_indexes` (i.e. uploaded on a previous run) are not processed at all.
+        """
+        progress = ProgressMeter(gdf, "functional_zones", logger=self._logger)
+        result_sink = progress.track(result_sink)
+        uploaded_functional_zones = 0
+        errors: list[tuple[Any, dict[str, Any]]] = []
+
+        async def upload_row(row: PreparedRow) -> None:
+            nonlocal uploaded_functional_zones
+            idx, record, _, mapped, _ = row
+            functional_zone_fields = mapped["functional_zone"]
+            try:
+                uploaded = await self.upload_functional_zone(
+                    record["geometry"],
+                    functional_zone_type_mapper(functional_zone_fields.get("functional_zone_type")),
+                    functional_zone_fields.get("properties", {}),
+                )
+                if uploaded is None:
+                    await self._logger.awarning("Functional zone has no territory parent. Skipping...", idx=idx)
+                    errors.append((idx, record))
+                    result_sink(UploadResult.error(idx))
+                else:
+                    uploaded_functional_zones += 1
+                    result_sink(UploadResult.from_functional_zone(idx, uploaded))
+            except Exception:  # pylint: disable=broad-except
+                await self._logger.aexception(
+                    "Error on functional zone upload", functional_zone_data=functional_zone_fields
+                )
+                errors.append((idx, record))
+                result_sink(UploadResult.error(idx))
+
+        await process_in_workers(
+            iterate_prepared_rows(gdf, skip_indexes, {"functional_zone": self.mapping}, logger=self._logger),
+            upload_row,
+            parallel_workers,
         )
-        return uploaded_functional_zones, errors
-
-    async def upload_functional_zone(self, data: dict[str, Any], functional_zone_type_id: int) -> FunctionalZone | None:
-        """Upload a single functional_zone of a given type."""
-        geometry: shapely.geometry.base.BaseGeometry = data.pop("geometry")
+        progress.finish()
 
-        properties, cb = self._properties_mapper(data)
-        cb(data)
+        errors_gdf = rows_to_geodataframe(errors)
+        await self._logger.ainfo(
+            "Finished functional_zones upload", total=get_total(gdf), successful=uploaded_functional_zones
+        )
+        return uploaded_functional_zones, errors_gdf
 
-        territory_id = await self._urban_client.get_common_territory_id(geometry)
+    async def upload_functional_zone(
+        self,
+        geometry: shapely.geometry.base.BaseGeometry,
+        functional_zone_type_id: int,
+        properties: dict[str, Any],
+    ) -> FunctionalZone | None:
+        """Upload a single functional_zone of a given type, `properties` are mapped from input row
+        (see `EntityMapping.apply`).
+
+        Existing zones are looked up in the local cache and uploaded zones are added to it, so duplicates inside
+        the input are also caught.
+        """
+        with measure_stage("territory"):
+            territory_id = await self._urban_client.get_common_territory_id(geometry)
         if territory_id is None:
             return None
 
-        existing = await self._get_functional_zone(territory_id, geometry, functional_zone_type_id)
+        with measure_stage("match"):
+            existing = await self._zones_cache.find_matching(
+                self._urban_client, territory_id, geometry, functional_zone_type_id
+            )
         if existing is not None:
             self._logger.warning(
                 "Return existing functional zone instead of uploading",
@@ -96,51 +133,7 @@ class FunctionalZonesUploader:
             functional_zone_type_id=functional_zone_type_id,
             properties=properties,
         )
-        return await self._urban_client.upload_functional_zone(functional_zone)
-
-    async def _get_functional_zone(
-        self, territory_id: int, geometry: shapely.geometry.base.BaseGeometry, functional_zone_type_id: int
-    ) -> FunctionalZone | None:
-        existing = await self._urban_client.get_functional_zones(
-            territory_id,
-            functional_zone_type_id,
-        )
-        for zone in existing:
-            zone_geometry = shapely.from_wkt(zone.geometry.wkt)
-            intersection = zone_geometry.intersection(geometry)
-            if intersection.area / geometry.area > 0.8 and intersection.area / zone_geometry.area > 0.8:
-                return zone
-        return None
-
-    async def _upload_functional_zones_batch(
-        self,
-        gdf: gpd.GeoDataFrame,
-        functional_zone_type_mapper: Callable[[dict[str, Any]], tuple[int, bool | None]],
-        upload_functional_zone: Awaitable[Callable[[dict[str, Any], int], FunctionalZone | None]] = ...,
-        max_errors: int | None = None,
-    ) -> tuple[list[FunctionalZone], gpd.GeoDataFrame | None]:
-        if upload_functional_zone is ...:
-            upload_functional_zone = self.upload_functional_zone
-        uploaded_functional_zones = []
-        errors = []
-        for idx, data_series in gdf.iterrows():
-            try:
-                full_data = data_series.dropna().to_dict()
-                functional_zone_type_id = functional_zone_type_mapper(full_data)
-                uploaded = await upload_functional_zone(data_series.dropna().to_dict(), functional_zone_type_id)
-                if uploaded is None:
-                    self._logger.warning("Functional zone has no territory parent. Skipping...", idx=idx)
-                    errors.append(idx)
-                else:
-                    uploaded_functional_zones.append(uploaded)
-            except Exception:  # pylint: disable=broad-except
-                self._logger.exception("Error on functional zone upload", physical_object_data=full_data)
-                errors.append(idx)
-                if max_errors is not None and len(errors) >= max_errors:
-                    self._logger.error("Finishing uploading worker because or errors rate", errors=len(errors))
-                    break
-            except KeyboardInterrupt:
-                await self._logger.awarning("Got interruption signal, finising")
-                break
-        errors_gdf = gdf.loc[errors] if len(errors) > 0 else None
-        return uploaded_functional_zones, errors_gdf
+        with measure_stage("upload"):
+            uploaded = await self._urban_client.upload_functional_zone(functional_zone)
+        self._zones_cache.add(uploaded)
+        return uploaded
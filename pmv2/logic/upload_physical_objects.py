@@ -1,202 +1,301 @@
 """Physical objects upload logic is defined here."""
 
-import asyncio
-import itertools
-import math
 from functools import partial
-from typing import Any, Awaitable, Callable
+from typing import Any, AsyncIterator, Callable, Container
 
 import geopandas as gpd
 import numpy as np
-import pandas as pd
-import pyproj
 import shapely
-import shapely.ops
 import structlog
 
+from pmv2.logic.deduplication import DuplicatesGroup, DuplicatesResolver
+from pmv2.logic.geojson_reader import InputData, get_total, rows_to_geodataframe
+from pmv2.logic.geometry_matching import INTERSECTION_BOUNDARY, get_pairs_intersection_ratios, to_matching_geometries
+from pmv2.logic.geometry_preparation import PreparedRow, iterate_prepared_batches
+from pmv2.logic.mapping import EntityMapping
+from pmv2.logic.physical_objects_cache import ObjectsMatch, PhysicalObjectsCache
+from pmv2.logic.progress import ProgressMeter
+from pmv2.logic.upload_results import ResultSink, UploadResult, ignore_result
+from pmv2.logic.workers import process_in_workers
 from pmv2.urban_client import UrbanClient
+from pmv2.urban_client.metrics import measure_stage
 from pmv2.urban_client.models import PostPhysicalObject, UrbanObject, shapely_to_geometry
 
-_crs_transformer = pyproj.Transformer.from_crs(4326, 3857, always_xy=True)
-
 
 class PhysicalObjectsUploader:
-    """Physical objects uploader."""
+    """Physical objects uploader.
+
+    `mapping` maps input rows to physical objects "address", "name" and "properties" fields.
+    """
 
-    def __init__(  # pylint: disable=too-many-arguments
+    def __init__(
         self,
         urban_client: UrbanClient,
         *,
-        po_address_mapper: Callable[[dict[str, Any]], tuple[str, Callable[[dict[str, Any]], None]]],
-        po_name_mapper: Callable[[dict[str, Any]], tuple[str, Callable[[dict[str, Any]], None]]],
-        po_properties_mapper: Callable[[dict[str, Any]], tuple[dict[str, Any], Callable[[dict[str, Any]], None]]],
+        mapping: EntityMapping,
         logger: structlog.stdlib.BoundLogger = ...,
     ):
         self._urban_client = urban_client
-        self._po_address_mapper = po_address_mapper
-        self._po_name_mapper = po_name_mapper
-        self._po_properties_mapper = po_properties_mapper
+        self.mapping = mapping
         if logger is ...:
             self._logger = structlog.get_logger("upload_pysical_objects")
         else:
             self._logger = logger
+        self._objects_cache = PhysicalObjectsCache(logger=self._logger)
+        self._duplicates = DuplicatesResolver()
+
+    async def prefetch_objects(
+        self, geometries: gpd.GeoSeries, physical_object_type_id: int, parallel_workers: int = 1
+    ) -> None:
+        """Download existing physical objects of a given type around the given geometries once, so later uploads
+        would match them locally instead of requesting objects around each geometry.
+
+        Uploaded objects are added to the local cache, so duplicates inside the input are also caught.
+        """
+        with measure_stage("match"):
+            await self._objects_cache.prefetch(
+                self._urban_client, geometries, physical_object_type_id, parallel_workers=parallel_workers
+            )
 
     async def upload_physical_objects(
         self,
-        gdf: gpd.GeoDataFrame,
+        gdf: InputData,
         physical_object_type_id: int,
         parallel_workers: int = 1,
-    ) -> tuple[list[UrbanObject], gpd.GeoDataFrame | None]:
+        *,
+        result_sink: ResultSink = ignore_result,
+        skip_indexes: Container[int] | None = None,
+    ) -> tuple[int, gpd.GeoDataFrame | None]:
         """Upload GeoDataFrame of physical objects of the same physical_object_type.
 
-        Return uploaded urban objects and GeoDataFrame with errors
-        """
-        counter = 0
+        Return number of uploaded physical objects and GeoDataFrame with errors.
 
-        def logging_wrapper(func: Awaitable[Callable[..., Any]]):
-            async def wrapped(*args, **kwargs):
-                nonlocal counter
-                counter += 1
-                await self._logger.adebug("Preparing to upload physical object", current=counter, total=gdf.shape[0])
-                return await func(*args, **kwargs)
+        Result of each row is passed to `result_sink` as soon as it is processed, rows with indexes from
+        `skip_indexes` (i.e. uploaded on a previous run) are not processed at all.
+        """
+        progress = ProgressMeter(gdf, "physical_objects", logger=self._logger)
+        result_sink = progress.track(result_sink)
+        upload_func = partial(
+            self.upload_physical_object_if_not_exists, physical_object_type_id=physical_object_type_id
+        )
+        uploaded_physical_objects = 0
+        errors: list[tuple[Any, dict[str, Any]]] = []
 
-            return wrapped
+        async def upload_row(item: tuple[PreparedRow, ObjectsMatch | None]) -> None:
+            nonlocal uploaded_physical_objects
+            (idx, record, matching_geometry, mapped, duplicates_group), batch_match = item
+            po_fields = mapped["physical_object"]
+            try:
+                result = await upload_func(
+                    geometry=record["geometry"],
+                    physical_object_fields=po_fields,
+                    matching_geometry=matching_geometry,
+                    duplicates_group=duplicates_group,
+                    batch_match=batch_match,
+                )
+            except Exception:  # pylint: disable=broad-except
+                await self._logger.aexception("Error on physical object upload", physical_object_data=po_fields)
+                errors.append((idx, record))
+                result_sink(UploadResult.error(idx))
+                return
+            finally:
+                self.release_duplicates_group(duplicates_group)
+            if result is None:
+                await self._logger.awarning(
+                    "Physical object has no territory parent. Skipping...", physical_object_data=po_fields
+                )
+                errors.append((idx, record))
+                result_sink(UploadResult.error(idx))
+            else:
+                uploaded_physical_objects += 1
+                result_sink(UploadResult.from_urban_object(idx, result))
 
-        upload_func = partial(
-            logging_wrapper(self.upload_physical_object_if_not_exists),
-            physical_object_type_id=physical_object_type_id,
+        await process_in_workers(
+            self.iterate_matched_rows(
+                gdf, skip_indexes, {"physical_object": self.mapping}, lambda _: physical_object_type_id
+            ),
+            upload_row,
+            parallel_workers,
         )
-        part_size = math.ceil(gdf.shape[0] / parallel_workers)
-        gdfs = [gdf.iloc[i : i + part_size] for i in range(0, gdf.shape[0], part_size)]
-        workers = [self._upload_physical_objects_batch(part, upload_func) for part in gdfs]
-
-        results = await asyncio.gather(*workers)
-        uploaded_physical_objects = list(itertools.chain.from_iterable(t[0] for t in results))
-        error_gdfs = [t[1] for t in results if t[1] is not None]
-        if len(error_gdfs) > 0:
-            errors = pd.concat(error_gdfs)
-        else:
-            errors = None
+        progress.finish()
+
+        errors_gdf = rows_to_geodataframe(errors)
         await self._logger.ainfo(
-            "Finished buildings uploading", total=gdf.shape[0], successful=len(uploaded_physical_objects)
+            "Finished physical objects upload", total=get_total(gdf), successful=uploaded_physical_objects
         )
-        return uploaded_physical_objects, errors
+        return uploaded_physical_objects, errors_gdf
 
-    async def _upload_physical_objects_batch(
+    async def iterate_matched_rows(
         self,
-        gdf: gpd.GeoDataFrame,
-        upload_physical_object: Callable[..., Awaitable[UrbanObject | None]],
-        max_errors: int | None = None,
-    ) -> tuple[list[UrbanObject], gpd.GeoDataFrame | None]:
-        uploaded_pos = []
-        errors = []
-        for idx, po_series in gdf.iterrows():
-            try:
-                po_data = po_series.dropna().to_dict()
-                del po_data["geometry"]
-                result = await upload_physical_object(geometry=po_series["geometry"], physical_object_data=po_data)
-                if result is None:
-                    self._logger.warning(
-                        "Physical object has no territory parent. Skipping...", physical_object_data=po_data
-                    )
-                    errors.append(idx)
-                else:
-                    uploaded_pos.append(result)
-            except Exception:  # pylint: disable=broad-except
-                self._logger.exception("Error on physical object upload", physical_object_data=po_data)
-                errors.append(idx)
-                if max_errors is not None and len(errors) >= max_errors:
-                    self._logger.error("Finishing uploading worker because or errors rate", errors=len(errors))
-                    break
-            except KeyboardInterrupt:
-                await self._logger.awarning("Got interruption signal, finising")
-                break
-        errors_gdf = gdf.loc[errors] if len(errors) > 0 else None
-        return uploaded_pos, errors_gdf
-
-    async def upload_physical_object_if_not_exists(  # pylint: disable=too-many-locals
+        data: InputData,
+        skip_indexes: Container[int] | None,
+        mappings: dict[str, EntityMapping],
+        get_physical_object_type_id: Callable[[PreparedRow], int | None],
+    ) -> AsyncIterator[tuple[PreparedRow, ObjectsMatch | None]]:
+        """Iterate over the deduplicated prepared input rows (see `iterate_prepared_batches`) along with their
+        matches of prefetched physical objects of the type given by `get_physical_object_type_id` (None if
+        the type is unknown), found for the whole batch at once (see `match_prepared_batch`).
+        """
+        async for batch in iterate_prepared_batches(
+            data, skip_indexes, mappings, deduplicate=True, logger=self._logger
+        ):
+            matches = self.match_prepared_batch(batch, [get_physical_object_type_id(row) for row in batch])
+            for item in zip(batch, matches):
+                yield item
+
+    def match_prepared_batch(
+        self, batch: list[PreparedRow], physical_object_type_ids: list[int | None]
+    ) -> list[ObjectsMatch | None]:
+        """Match prepared rows against prefetched physical objects of the given types by a single spatial index
+        query per type (see `PhysicalObjectsCache.match`). Rows of unknown (None) types and rows without
+        prefetched objects around get None and are matched one by one on upload.
+        """
+        matches: list[ObjectsMatch | None] = [None] * len(batch)
+        with measure_stage("match"):
+            for physical_object_type_id in set(physical_object_type_ids) - {None}:
+                positions = [
+                    i for i, type_id in enumerate(physical_object_type_ids) if type_id == physical_object_type_id
+                ]
+                found = self._objects_cache.match(
+                    physical_object_type_id,
+                    np.array([batch[i].data["geometry"] for i in positions], dtype=object),
+                    np.array([batch[i].matching_geometry for i in positions], dtype=object),
+                )
+                for i, match in zip(positions, found):
+                    matches[i] = match
+        return matches
+
+    async def upload_physical_object_if_not_exists(  # pylint: disable=too-many-arguments
         self,
         geometry: shapely.geometry.base.BaseGeometry,
         physical_object_type_id: int,
-        physical_object_data: dict[str, Any],
+        physical_object_fields: dict[str, Any],
+        matching_geometry: shapely.geometry.base.BaseGeometry | None = None,
+        duplicates_group: DuplicatesGroup | None = None,
+        *,
+        batch_match: ObjectsMatch | None = None,
     ) -> UrbanObject | None:
         """Check if there are suitable physical object and object geometry objects, create them if none found.
 
+        `physical_object_fields` are physical object fields mapped from input row (see `EntityMapping.apply`).
+
         Return full created or found urban object data.
 
         Return None if it impossible to upload a physical object because of unavailable territory_id.
+
+        `matching_geometry` is the already prepared (valid, projected and buffered) geometry, if it is set geometry
+        is considered valid.
+
+        If `duplicates_group` is set, physical object is searched for or created only for the first of the group
+        rows of a given type, other rows get the same result.
+
+        `batch_match` is the match of the prepared geometry found for its whole batch (see `match_prepared_batch`),
+        if it is set existing objects are not searched for one by one.
+        """
+        return await self._duplicates.resolve(
+            duplicates_group,
+            physical_object_type_id,
+            lambda: self._upload_physical_object_if_not_exists(
+                geometry, physical_object_type_id, physical_object_fields, matching_geometry, batch_match
+            ),
+        )
+
+    def release_duplicates_group(self, duplicates_group: DuplicatesGroup | None) -> None:
+        """Mark the input row of the given duplicates group as processed, it must be called for every row passed
+        to `upload_physical_object_if_not_exists` with a group (and the rows of the group failed before), so shared
+        results of the group are dropped after its last row.
         """
-        objects_around = await self._urban_client.get_objects_around(geometry, physical_object_type_id)
-        if not geometry.is_valid:
+        self._duplicates.release(duplicates_group)
+
+    async def _upload_physical_object_if_not_exists(  # pylint: disable=too-many-arguments
+        self,
+        geometry: shapely.geometry.base.BaseGeometry,
+        physical_object_type_id: int,
+        physical_object_fields: dict[str, Any],
+        matching_geometry: shapely.geometry.base.BaseGeometry | None = None,
+        batch_match: ObjectsMatch | None = None,
+    ) -> UrbanObject | None:
+        if matching_geometry is None and not geometry.is_valid:
             self._logger.warning("Invalid geometry in file, fixing", geometry=geometry)
             geometry = geometry.buffer(0)
-        if not all(objects_around["geometry"].is_valid):
-            self._logger.warning("Invalid geometry got from Urban API, fixing", around_geometry=geometry)
-            objects_around["geometry"] = objects_around["geometry"].buffer(0)
-        intersecting = self._get_intersecting_objects(geometry, objects_around)
+        with measure_stage("match"):
+            if batch_match is not None and matching_geometry is not None:
+                physical_object_id = self._objects_cache.get_match(
+                    physical_object_type_id, matching_geometry, batch_match
+                )
+            else:
+                physical_object_id = await self._find_physical_object(
+                    geometry, physical_object_type_id, matching_geometry
+                )
 
-        if intersecting.shape[0] == 0:
-            territory_id = await self._urban_client.get_common_territory_id(geometry)
+        if physical_object_id is None:
+            with measure_stage("territory"):
+                territory_id = await self._urban_client.get_common_territory_id(geometry)
             if territory_id is None:
                 return None
 
-            callbacks = []
-
-            address, cb = self._po_address_mapper(physical_object_data)
-            callbacks.append(cb)
-            name, cb = self._po_name_mapper(physical_object_data)
-            callbacks.append(cb)
-            properties, cb = self._po_properties_mapper(physical_object_data)
-            callbacks.append(cb)
-
-            for cb in callbacks:
-                cb(physical_object_data)
-
-            result = await self._urban_client.upload_physical_object(
-                PostPhysicalObject(
-                    geometry=shapely_to_geometry(geometry),
-                    territory_id=territory_id,
-                    physical_object_type_id=physical_object_type_id,
-                    centre_point=None,
-                    address=address,
-                    name=name,
-                    properties=properties,
+            with measure_stage("upload"):
+                result = await self._urban_client.upload_physical_object(
+                    PostPhysicalObject(
+                        geometry=shapely_to_geometry(geometry),
+                        territory_id=territory_id,
+                        physical_object_type_id=physical_object_type_id,
+                        centre_point=None,
+                        address=physical_object_fields.get("address"),
+                        name=physical_object_fields.get("name"),
+                        properties=physical_object_fields.get("properties", {}),
+                    )
                 )
+            self._objects_cache.add(
+                physical_object_type_id,
+                result.physical_object.physical_object_id,
+                result.object_geometry.object_geometry_id,
+                geometry,
+                matching_geometry,
             )
             return result
 
-        physical_object_id = intersecting.iloc[0]["physical_object_id"]
+        with measure_stage("match"):
+            geometries = await self._urban_client.get_physical_object_geometries(physical_object_id)
+            geometries = self._get_intersecting_objects(geometry, geometries, matching_geometry)
+            geometry_id = geometries.iloc[0]["object_geometry_id"]
+            return await self._urban_client.get_urban_object(physical_object_id, geometry_id, None)
 
-        geometries = await self._urban_client.get_physical_object_geometries(physical_object_id)
-        geometries = self._get_intersecting_objects(geometry, geometries)
-        geometry_id = geometries.iloc[0]["object_geometry_id"]
-        return await self._urban_client.get_urban_object(physical_object_id, geometry_id, None)
+    async def _find_physical_object(
+        self,
+        geometry: shapely.geometry.base.BaseGeometry,
+        physical_object_type_id: int,
+        matching_geometry: shapely.geometry.base.BaseGeometry | None,
+    ) -> int | None:
+        if self._objects_cache.covers(geometry, physical_object_type_id):
+            objects_around = self._objects_cache.get_objects_around(geometry, physical_object_type_id)
+        else:
+            objects_around = await self._urban_client.get_objects_around(geometry, physical_object_type_id)
+        if not all(objects_around["geometry"].is_valid):
+            self._logger.warning("Invalid geometry got from Urban API, fixing", around_geometry=geometry)
+            objects_around["geometry"] = objects_around["geometry"].buffer(0)
+        intersecting = self._get_intersecting_objects(geometry, objects_around, matching_geometry)
+        if intersecting.shape[0] == 0:
+            return None
+        return int(intersecting.iloc[0]["physical_object_id"])
 
     def _get_intersecting_objects(
         self,
         geometry: shapely.geometry.base.BaseGeometry,
         objects_around: gpd.GeoDataFrame,
-        intersection_area_boundary: float = 0.6,
+        matching_geometry: shapely.geometry.base.BaseGeometry | None = None,
+        intersection_area_boundary: float = INTERSECTION_BOUNDARY,
     ) -> gpd.GeoDataFrame:
         if objects_around.shape[0] == 0:
             return objects_around
-        around_3857: gpd.GeoDataFrame = objects_around.to_crs(3857)
-        around_3857["geometry"] = around_3857["geometry"].buffer(5)
-        geometry_3857 = shapely.ops.transform(_crs_transformer.transform, geometry).buffer(5)
-        around_3857 = around_3857[
-            (
-                around_3857.intersects(geometry_3857)
-                | around_3857.contains(geometry_3857)
-                | around_3857.covered_by(geometry_3857)
-            )
-        ]
-        intersection_area: pd.Series = around_3857.intersection(geometry_3857).area
-        around_3857["intersection"] = np.minimum(
-            intersection_area / geometry_3857.area, intersection_area / around_3857.area
-        )
-
+        if matching_geometry is None:
+            matching_geometry = to_matching_geometries(np.array([geometry]))[0]
+        if "matching_geometry" in objects_around.columns:  # prepared by the objects cache
+            candidates = objects_around["matching_geometry"].values
+        else:
+            candidates = to_matching_geometries(objects_around["geometry"].values)
         intersecting = objects_around.copy()
-        intersecting["intersection"] = around_3857["intersection"]
+        intersecting["intersection"] = get_pairs_intersection_ratios(np.array([matching_geometry]), candidates)
         intersecting = intersecting[intersecting["intersection"] > intersection_area_boundary]
 
         return intersecting.sort_values("intersection", ascending=False)
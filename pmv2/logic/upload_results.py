@@ -0,0 +1,130 @@
+"""Compact upload results and journal of them are defined here."""
+
+import datetime
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, TextIO
+
+from pmv2.urban_client.models import FunctionalZone, Service, UrbanObject
+
+
+@dataclass(frozen=True)
+class UploadResult:  # pylint: disable=too-many-instance-attributes
+    """Compact result of a single input row upload."""
+
+    index: int
+    success: bool
+    urban_object_id: int | None = None
+    physical_object_id: int | None = None
+    object_geometry_id: int | None = None
+    service_id: int | None = None
+    functional_zone_id: int | None = None
+
+    @classmethod
+    def error(cls, index: Any) -> "UploadResult":
+        """Get result of a row failed to upload."""
+        return cls(int(index), False)
+
+    @classmethod
+    def from_urban_object(cls, index: Any, urban_object: UrbanObject, service: Service | None = None) -> "UploadResult":
+        """Get result of a row uploaded as a physical object (and optionally a service on it)."""
+        if service is None and urban_object.service is not None:
+            service = urban_object.service
+        return cls(
+            int(index),
+            True,
+            urban_object_id=urban_object.urban_object_id,
+            physical_object_id=urban_object.physical_object.physical_object_id,
+            object_geometry_id=urban_object.object_geometry.object_geometry_id,
+            service_id=service.service_id if service is not None else None,
+        )
+
+    @classmethod
+    def from_functional_zone(cls, index: Any, functional_zone: FunctionalZone) -> "UploadResult":
+        """Get result of a row uploaded as a functional zone."""
+        return cls(int(index), True, functional_zone_id=functional_zone.functional_zone_id)
+
+
+ResultSink = Callable[[UploadResult], None]
+"""Callback receiving result of each input row as soon as it is processed."""
+
+
+def ignore_result(_: UploadResult) -> None:
+    """Result sink which drops all of the results."""
+
+
+class UploadJournal:
+    """Append-only JSON lines journal of upload results.
+
+    Every line contains input file name and the result of a single row. Lines are buffered and written to the disk
+    by batches of `flush_size` lines, or earlier if `flush_interval` seconds have passed since the previous write, so
+    only the last batch can be lost on a crash. Journal of an interrupted run can be used to skip already uploaded
+    rows on the next one.
+    """
+
+    def __init__(self, path: Path, flush_size: int = 100, flush_interval: float = 5.0):
+        self.path = path
+        self._flush_size = flush_size
+        self._flush_interval = flush_interval
+        self._buffer: list[str] = []
+        self._last_flush = time.monotonic()
+        self._file: TextIO | None = None
+
+    def __enter__(self) -> "UploadJournal":
+        self._file = self.path.open("a", encoding="utf-8")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def get_sink(self, filename: str) -> ResultSink:
+        """Get results sink writing results of the given input file rows to the journal."""
+
+        def sink(result: UploadResult) -> None:
+            self.write(filename, result)
+
+        return sink
+
+    def write(self, filename: str, result: UploadResult) -> None:
+        """Add result of a row of the given input file to the journal."""
+        self._buffer.append(
+            json.dumps({"file": filename, "time": datetime.datetime.now().isoformat()} | asdict(result)) + "\n"
+        )
+        if len(self._buffer) >= self._flush_size or time.monotonic() - self._last_flush >= self._flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered lines to the disk."""
+        if self._file is None:
+            raise RuntimeError("Journal is not opened")
+        if len(self._buffer) > 0:
+            self._file.write("".join(self._buffer))
+            self._buffer.clear()
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """Flush buffered lines and close the journal file."""
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def read_uploaded(path: Path) -> dict[str, set[int]]:
+        """Get indexes of successfully uploaded rows for each of the input files from the journal.
+
+        Broken lines (i.e. the last line of a journal written during a crash) are ignored.
+        """
+        uploaded: dict[str, set[int]] = {}
+        with path.open("r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("success"):
+                    uploaded.setdefault(record["file"], set()).add(record["index"])
+        return uploaded
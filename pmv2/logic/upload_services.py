@@ -1,38 +1,41 @@
 """Services upload logic is defined here."""
 
-import asyncio
-import itertools
-import math
-from typing import Any, Awaitable, Callable
+from typing import Any, Container
 
 import geopandas as gpd
-import pandas as pd
-import shapely
 import structlog
 
+from pmv2.logic.geojson_reader import InputData, get_total, rows_to_geodataframe
+from pmv2.logic.geometry_preparation import PreparedRow
+from pmv2.logic.mapping import EntityMapping
+from pmv2.logic.physical_objects_cache import ObjectsMatch
+from pmv2.logic.progress import ProgressMeter
 from pmv2.logic.upload_physical_objects import PhysicalObjectsUploader
+from pmv2.logic.upload_results import ResultSink, UploadResult, ignore_result
+from pmv2.logic.workers import process_in_workers
 from pmv2.urban_client import UrbanClient
+from pmv2.urban_client.metrics import measure_stage
 from pmv2.urban_client.models import PostService, Service
 
 
 class ServicesUploader:
-    """Services uploader."""
+    """Services uploader.
 
-    def __init__(  # pylint: disable=too-many-arguments
+    `mapping` maps input rows to services "name", "capacity_real" and "properties" fields, physical objects are
+    mapped by the mapping of `po_uploader`.
+    """
+
+    def __init__(
         self,
         urban_client: UrbanClient,
         *,
         po_uploader: PhysicalObjectsUploader,
-        service_name_mapper: Callable[[dict[str, Any]], tuple[str, Callable[[dict[str, Any]], None]]],
-        service_properties_mapper: Callable[[dict[str, Any]], tuple[dict[str, Any], Callable[[dict[str, Any]], None]]],
-        service_capacity_mapper: Callable[[dict[str, Any]], tuple[int, Callable[[dict[str, Any]], None]]],
+        mapping: EntityMapping,
         logger: structlog.stdlib.BoundLogger = ...,
     ):
         self._urban_client = urban_client
         self._po_uploader = po_uploader
-        self._service_name_mapper = service_name_mapper
-        self._service_properties_mapper = service_properties_mapper
-        self._service_capacity_mapper = service_capacity_mapper
+        self.mapping = mapping
         if logger is ...:
             self._logger = structlog.get_logger("upload_pysical_objects")
         else:
@@ -40,116 +43,92 @@ class ServicesUploader:
 
     async def upload_services(  # pylint: disable=too-many-arguments
         self,
-        gdf: gpd.GeoDataFrame,
+        gdf: InputData,
         service_type_id: int,
         physical_object_type_id: int,
         parallel_workers: int = 1,
-    ) -> tuple[list[Service], gpd.GeoDataFrame | None]:
-        """Upload GeoDataFrame of services of the same service_type."""
-        counter = 0
-
-        def logging_wrapper(func: Awaitable[Callable[..., Any]]):
-            async def wrapped(*args, **kwargs) -> Any:
-                nonlocal counter
-                counter += 1
-                await self._logger.adebug("Preparing to upload service", current=counter, total=gdf.shape[0])
-                return await func(*args, **kwargs)
-
-            return wrapped
-
-        part_size = math.ceil(gdf.shape[0] / parallel_workers)
-        gdfs = [gdf.iloc[i : i + part_size] for i in range(0, gdf.shape[0], part_size)]
-        workers = [
-            self._upload_services_batch(
-                part,
-                physical_object_type_id=physical_object_type_id,
-                service_type_id=service_type_id,
-                upload_service=logging_wrapper(self.upload_service),
-            )
-            for part in gdfs
-        ]
-
-        results = await asyncio.gather(*workers)
-        uploaded_services = list(itertools.chain.from_iterable(t[0] for t in results))
-        error_gdfs = [t[1] for t in results if t[1] is not None]
-        if len(error_gdfs) > 0:
-            errors = pd.concat(error_gdfs)
-        else:
-            errors = None
-        await self._logger.ainfo("Finished services uploading", total=gdf.shape[0], successful=len(uploaded_services))
-        return uploaded_services, errors
-
-    async def upload_service(
-        self,
-        service_data: dict[str, Any],
-        physical_object_id: int,
-        object_geometry_id: int,
-        service_type_id: int,
-    ) -> Service:
-        """Upload a single service to a given physical object and geometry."""
-        callbacks = []
-
-        name, cb = self._service_name_mapper(service_data)
-        callbacks.append(cb)
-        capacity_real, cb = self._service_capacity_mapper(service_data)
-        callbacks.append(cb)
-        properties, cb = self._service_properties_mapper(service_data)
-        callbacks.append(cb)
-
-        for cb in callbacks:
-            cb(service_data)
-        return await self._urban_client.upload_service(
-            PostService(
-                physical_object_id=physical_object_id,
-                object_geometry_id=object_geometry_id,
-                service_type_id=service_type_id,
-                territory_type_id=None,
-                name=name,
-                capacity_real=capacity_real,
-                properties=properties,
-            )
-        )
-
-    async def _upload_services_batch(  # pylint: disable=too-many-arguments
-        self,
-        gdf: gpd.GeoDataFrame,
         *,
-        physical_object_type_id: int,
-        service_type_id: int,
-        upload_service: Awaitable[Callable[[dict[str, Any], int, int, int], Service]] = ...,
-        max_errors: int | None = None,
-    ) -> tuple[list[Service], gpd.GeoDataFrame | None]:
-        uploaded_services = []
-        if upload_service is ...:
-            upload_service = self.upload_service
-        errors = []
-        for idx, service_series in gdf.iterrows():
+        result_sink: ResultSink = ignore_result,
+        skip_indexes: Container[int] | None = None,
+    ) -> tuple[int, gpd.GeoDataFrame | None]:
+        """Upload GeoDataFrame of services of the same service_type.
+
+        Result of each row is passed to `result_sink` as soon as it is processed, rows with indexes from
+        `skip_indexes` (i.e. uploaded on a previous run) are not processed at all.
+        """
+        progress = ProgressMeter(gdf, "services", logger=self._logger)
+        result_sink = progress.track(result_sink)
+        uploaded_services = 0
+        errors: list[tuple[Any, dict[str, Any]]] = []
+
+        async def upload_row(item: tuple[PreparedRow, ObjectsMatch | None]) -> None:
+            nonlocal uploaded_services
+            (idx, record, matching_geometry, mapped, duplicates_group), batch_match = item
+            service_fields = mapped["service"]
             try:
-                full_data = service_series.dropna().to_dict()
-                geometry: shapely.geometry.base.BaseGeometry = full_data.pop("geometry")
-
                 physical_object = await self._po_uploader.upload_physical_object_if_not_exists(
-                    geometry=geometry,
+                    geometry=record["geometry"],
                     physical_object_type_id=physical_object_type_id,
-                    physical_object_data=full_data,
+                    physical_object_fields=mapped["physical_object"],
+                    matching_geometry=matching_geometry,
+                    duplicates_group=duplicates_group,
+                    batch_match=batch_match,
                 )
                 if physical_object is None:
-                    await self._logger.awarning("Service has no territory parent. Skipping...", data=full_data)
-                    errors.append(idx)
-                    continue
-                uploaded_services.append(
-                    await upload_service(
-                        physical_object_id=physical_object.physical_object.physical_object_id,
-                        object_geometry_id=physical_object.object_geometry.object_geometry_id,
-                        service_type_id=service_type_id,
-                        service_data=full_data,
-                    )
+                    await self._logger.awarning("Service has no territory parent. Skipping...", data=service_fields)
+                    errors.append((idx, record))
+                    result_sink(UploadResult.error(idx))
+                    return
+                service = await self.upload_service(
+                    physical_object_id=physical_object.physical_object.physical_object_id,
+                    object_geometry_id=physical_object.object_geometry.object_geometry_id,
+                    service_type_id=service_type_id,
+                    service_fields=service_fields,
                 )
+                uploaded_services += 1
+                result_sink(UploadResult.from_urban_object(idx, physical_object, service))
             except Exception:  # pylint: disable=broad-except
-                await self._logger.aexception("error on service upload", service_data=full_data)
-                errors.append(idx)
-                if max_errors is not None and len(errors) >= max_errors:
-                    await self._logger.aerror("Finishing uploading worker because or errors rate", errors=len(errors))
-                    break
-        errors_gdf = gdf.loc[errors] if len(errors) > 0 else None
+                await self._logger.aexception("error on service upload", service_data=service_fields)
+                errors.append((idx, record))
+                result_sink(UploadResult.error(idx))
+            finally:
+                self._po_uploader.release_duplicates_group(duplicates_group)
+
+        await process_in_workers(
+            self._po_uploader.iterate_matched_rows(
+                gdf,
+                skip_indexes,
+                {"physical_object": self._po_uploader.mapping, "service": self.mapping},
+                lambda _: physical_object_type_id,
+            ),
+            upload_row,
+            parallel_workers,
+        )
+        progress.finish()
+
+        errors_gdf = rows_to_geodataframe(errors)
+        await self._logger.ainfo("Finished services uploading", total=get_total(gdf), successful=uploaded_services)
         return uploaded_services, errors_gdf
+
+    async def upload_service(
+        self,
+        service_fields: dict[str, Any],
+        physical_object_id: int,
+        object_geometry_id: int,
+        service_type_id: int,
+    ) -> Service:
+        """Upload a single service to a given physical object and geometry, `service_fields` are service fields
+        mapped from input row (see `EntityMapping.apply`).
+        """
+        with measure_stage("upload"):
+            return await self._urban_client.upload_service(
+                PostService(
+                    physical_object_id=physical_object_id,
+                    object_geometry_id=object_geometry_id,
+                    service_type_id=service_type_id,
+                    territory_type_id=None,
+                    name=service_fields.get("name"),
+                    capacity_real=service_fields.get("capacity_real"),
+                    properties=service_fields.get("properties", {}),
+                )
+            )
@@ -0,0 +1,49 @@
+"""Shared work-queue executor for uploaders is defined here."""
+
+import asyncio
+from typing import AsyncIterable, Awaitable, Callable, Iterable, TypeVar
+
+_T = TypeVar("_T")
+
+_STOP = object()
+
+
+async def process_in_workers(
+    items: Iterable[_T] | AsyncIterable[_T],
+    handler: Callable[[_T], Awaitable[None]],
+    parallel_workers: int = 1,
+    queue_size: int | None = None,
+) -> None:
+    """Process items with a given number of workers pulling them one by one from a shared bounded queue.
+
+    Worker takes the next item as soon as it is done with the previous one, so items which take long to process
+    do not hold up the others. Number of items in flight is bounded by `parallel_workers` and the number of items
+    taken from the source in advance is bounded by `queue_size` (twice the workers number by default).
+
+    Handler is expected to deal with its own errors, any exception raised from it stops the whole processing.
+    """
+    parallel_workers = max(parallel_workers, 1)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or parallel_workers * 2)
+
+    async def producer() -> None:
+        if isinstance(items, AsyncIterable):
+            async for item in items:
+                await queue.put(item)
+        else:
+            for item in items:
+                await queue.put(item)
+        for _ in range(parallel_workers):
+            await queue.put(_STOP)
+
+    async def worker() -> None:
+        while (item := await queue.get()) is not _STOP:
+            await handler(item)
+
+    tasks = [asyncio.create_task(producer())] + [asyncio.create_task(worker()) for _ in range(parallel_workers)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -0,0 +1,17 @@
+"""Mock Urban API server for offline testing is located here.
+
+It implements all of the routes used by `HTTPUrbanClient` over in-memory state with configurable latency and
+failures. Run it with `python -m pmv2.mock_api` or embed with `MockUrbanAPI`.
+"""
+
+from ._app import Latency, MockConfig, make_app
+from ._server import MockUrbanAPI
+from ._state import MockState
+
+__all__ = [
+    "Latency",
+    "MockConfig",
+    "MockState",
+    "MockUrbanAPI",
+    "make_app",
+]
@@ -0,0 +1,101 @@
+"""Mock Urban API server executable entrypoint is defined here."""
+
+import click
+from aiohttp import web
+
+from pmv2.mock_api._app import Latency, MockConfig, make_app
+from pmv2.mock_api._state import MockState
+
+
+class _LatencyType(click.ParamType):
+    name = "latency"
+
+    def convert(self, value, param, ctx) -> Latency:
+        if isinstance(value, Latency):
+            return value
+        try:
+            return Latency.parse(value)
+        except (ValueError, IndexError) as exc:
+            self.fail(f"{value!r} is not a valid latency ({exc})", param, ctx)
+
+
+def _split_route_values(values: tuple[str, ...], parse) -> dict:
+    result = {}
+    for value in values:
+        route, sep, route_value = value.partition("=")
+        if sep == "":
+            raise click.BadParameter(f"Expected <route>=<value>, got {value!r}")
+        result[route] = parse(route_value)
+    return result
+
+
+@click.command("pmv2-mock-api")
+@click.option("--host", type=str, default="127.0.0.1", show_default=True, help="Host to listen on")
+@click.option("--port", type=int, default=8000, show_default=True, help="Port to listen on")
+@click.option(
+    "--latency",
+    type=_LatencyType(),
+    default="0",
+    show_default=True,
+    help="Responses latency: seconds or <constant|uniform|lognormal>:<a>[,<b>] distribution",
+)
+@click.option(
+    "--route-latency",
+    multiple=True,
+    help="Latency of a single route as <route>=<latency>, i.e. common_territory=lognormal:0.2,0.5",
+)
+@click.option("--failure-rate", type=click.FloatRange(0, 1), default=0.0, show_default=True)
+@click.option("--route-failure-rate", multiple=True, help="Failure rate of a single route as <route>=<rate>")
+@click.option("--failure-status", type=int, default=500, show_default=True, help="Status code of failed responses")
+@click.option("--timeout-rate", type=click.FloatRange(0, 1), default=0.0, show_default=True)
+@click.option("--timeout-time", type=float, default=60.0, show_default=True, help="Time hanging requests wait")
+@click.option("--capacity", type=int, help="Number of requests processed at the same time, others are waiting")
+@click.option("--max-page-size", type=int, default=100, show_default=True, help="Maximum size of a page")
+@click.option("--grid", type=int, default=4, show_default=True, help="Number of inner territories by each axis")
+@click.option("--depth", type=int, default=3, show_default=True, help="Number of territories levels")
+@click.option(
+    "--existing-objects",
+    type=int,
+    default=0,
+    show_default=True,
+    help="Number of random physical objects of type 1 to create on start",
+)
+@click.option("--seed", type=int, help="Random seed for latency, failures and objects")
+def main(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    host: str,
+    port: int,
+    latency: Latency,
+    route_latency: tuple[str, ...],
+    failure_rate: float,
+    route_failure_rate: tuple[str, ...],
+    failure_status: int,
+    timeout_rate: float,
+    timeout_time: float,
+    capacity: int | None,
+    max_page_size: int,
+    grid: int,
+    depth: int,
+    existing_objects: int,
+    seed: int | None,
+):
+    """Run mock Urban API server with in-memory state."""
+    state = MockState(grid=grid, depth=depth)
+    if existing_objects > 0:
+        state.add_random_objects(existing_objects, 1, seed or 0)
+    config = MockConfig(
+        latency=latency,
+        failure_rate=failure_rate,
+        failure_status=failure_status,
+        timeout_rate=timeout_rate,
+        timeout_time=timeout_time,
+        route_latency=_split_route_values(route_latency, Latency.parse),
+        route_failure_rate=_split_route_values(route_failure_rate, float),
+        capacity=capacity,
+        max_page_size=max_page_size,
+        seed=seed,
+    )
+    web.run_app(make_app(state, config), host=host, port=port, access_log=None)
+
+
+if __name__ in ("__main__", "pmv2.mock_api.__main__"):
+    main()  # pylint: disable=no-value-for-parameter
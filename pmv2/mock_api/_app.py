@@ -0,0 +1,469 @@
+"""Mock Urban API aiohttp application is defined here."""
+
+import asyncio
+import math
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Literal
+
+import shapely
+from aiohttp import web
+from pydantic import ValidationError
+
+from pmv2.mock_api._state import (
+    MockFunctionalZone,
+    MockObjectGeometry,
+    MockService,
+    MockState,
+    MockTerritory,
+    MockUrbanObject,
+)
+from pmv2.urban_client.models import PostFunctionalZone, PostPhysicalObject, PostService
+
+
+@dataclass(frozen=True)
+class Latency:
+    """Latency distribution of mock responses (in seconds).
+
+    "constant" distribution always gives `a`, "uniform" - values between `a` and `b`, "lognormal" - values with median
+    `a` and sigma `b` of the underlying normal distribution.
+    """
+
+    kind: Literal["constant", "uniform", "lognormal"] = "constant"
+    a: float = 0.0
+    b: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        """Get random latency value."""
+        match self.kind:
+            case "uniform":
+                return rng.uniform(self.a, self.b)
+            case "lognormal":
+                return rng.lognormvariate(math.log(self.a), self.b) if self.a > 0 else 0.0
+        return self.a
+
+    @classmethod
+    def parse(cls, value: str) -> "Latency":
+        """Parse latency definition in format "<seconds>" or "<kind>:<a>[,<b>]"."""
+        kind, sep, params = value.partition(":")
+        if sep == "":
+            return cls("constant", float(value))
+        if kind not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind!r}")
+        values = [float(param) for param in params.split(",")]
+        return cls(kind, values[0], values[1] if len(values) > 1 else 0.0)
+
+
+@dataclass
+class MockConfig:  # pylint: disable=too-many-instance-attributes
+    """Mock Urban API behavior.
+
+    Route names are the names of `HTTPUrbanClient` methods without verbs (i.e. "common_territory", "services").
+    Requests failed with `failure_rate` probability get `failure_status` response, requests timed out with
+    `timeout_rate` probability hang for `timeout_time` seconds before the response. With `capacity` set, only that
+    number of requests is processed at the same time and the others are waiting, as they would on a real server.
+    """
+
+    latency: Latency = field(default_factory=Latency)
+    failure_rate: float = 0.0
+    failure_status: int = 500
+    timeout_rate: float = 0.0
+    timeout_time: float = 60.0
+    route_latency: dict[str, Latency] = field(default_factory=dict)
+    route_failure_rate: dict[str, float] = field(default_factory=dict)
+    capacity: int | None = None
+    max_page_size: int = 100
+    seed: int | None = None
+
+
+_Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+STATE_KEY = web.AppKey("state", MockState)
+CONFIG_KEY = web.AppKey("config", MockConfig)
+REQUESTS_KEY = web.AppKey("requests", Counter)
+
+
+def make_app(state: MockState | None = None, config: MockConfig | None = None) -> web.Application:
+    """Construct mock Urban API application. Number of requests of each route is counted in `app[REQUESTS_KEY]`
+    and is available at `/mock/requests`.
+    """
+    state = state if state is not None else MockState()
+    config = config if config is not None else MockConfig()
+    app = web.Application(middlewares=[_make_behavior_middleware(config)], client_max_size=64 * 1024**2)
+    app[STATE_KEY] = state
+    app[CONFIG_KEY] = config
+    app[REQUESTS_KEY] = Counter()
+    routes = [
+        ("GET", "/health_check/ping", _ping, "ping"),
+        ("GET", "/api/openapi", _openapi, "openapi"),
+        ("POST", "/api/v1/physical_objects/around", _objects_around, "objects_around"),
+        ("GET", "/api/v1/urban_objects_by_physical_object", _urban_objects, "urban_objects"),
+        ("GET", "/api/v1/physical_objects/{physical_object_id}/geometries", _geometries, "physical_object_geometries"),
+        ("GET", "/api/v1/physical_object_types", _physical_object_types, "physical_object_types"),
+        ("GET", "/api/v1/service_types", _service_types, "service_types"),
+        ("GET", "/api/v1/functional_zones_types", _functional_zone_types, "functional_zone_types"),
+        ("POST", "/api/v1/physical_objects", _post_physical_object, "physical_objects"),
+        ("POST", "/api/v1/living_buildings", _post_living_building, "living_buildings"),
+        ("POST", "/api/v1/services", _post_service, "services"),
+        ("POST", "/api/v1/functional_zones", _post_functional_zone, "functional_zones"),
+        ("GET", "/api/v2/territories_without_geometry", _territories_without_geometry, "inner_territories"),
+        ("GET", "/api/v1/all_territories", _all_territories, "territories_geometries"),
+        ("POST", "/api/v1/common_territory", _common_territory, "common_territory"),
+        ("GET", "/api/v1/territory/{territory_id}/functional_zones", _functional_zones, "functional_zones_list"),
+    ]
+    app.router.add_get("/mock/requests", _requests_stats, name="mock_requests")
+    for method, path, handler, name in routes:
+        app.router.add_route(method, path, handler, name=name)
+    return app
+
+
+def _make_behavior_middleware(config: MockConfig) -> Callable:
+    rng = random.Random(config.seed)
+    semaphore = asyncio.Semaphore(config.capacity) if config.capacity is not None else None
+
+    @web.middleware
+    async def behavior_middleware(request: web.Request, handler: _Handler) -> web.StreamResponse:
+        route = request.match_info.route.name or "unknown"
+        if route == "mock_requests":
+            return await handler(request)
+        request.app[REQUESTS_KEY][route] += 1
+        latency = config.route_latency.get(route, config.latency).sample(rng)
+        failure_rate = config.route_failure_rate.get(route, config.failure_rate)
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            if rng.random() < config.timeout_rate:
+                await asyncio.sleep(config.timeout_time)
+            elif latency > 0:
+                await asyncio.sleep(latency)
+            if rng.random() < failure_rate:
+                return web.json_response({"detail": "Mock failure"}, status=config.failure_status)
+            return await handler(request)
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    return behavior_middleware
+
+
+async def _requests_stats(request: web.Request) -> web.Response:
+    return web.json_response(dict(request.app[REQUESTS_KEY]))
+
+
+async def _ping(_: web.Request) -> web.Response:
+    return web.json_response({"message": "Pong!"})
+
+
+async def _openapi(_: web.Request) -> web.Response:
+    return web.json_response({"openapi": "3.1.0", "info": {"title": "Mock Urban API", "version": "mock"}, "paths": {}})
+
+
+async def _objects_around(request: web.Request) -> web.Response:
+    state = request.app[STATE_KEY]
+    geometry = await _read_geometry(request)
+    type_id = request.query.get("physical_object_type_id")
+    found = state.get_objects_around(geometry, int(type_id) if type_id is not None else None)
+    return web.json_response([_object_around_json(state, object_geometry) for object_geometry in found])
+
+
+async def _urban_objects(request: web.Request) -> web.Response:
+    state = request.app[STATE_KEY]
+    physical_object_id = int(request.query["physical_object_id"])
+    if physical_object_id not in state.physical_objects:
+        raise web.HTTPNotFound()
+    urban_objects = state.urban_objects_by_physical_object[physical_object_id]
+    return web.json_response([_urban_object_json(state, state.urban_objects[i]) for i in urban_objects])
+
+
+async def _geometries(request: web.Request) -> web.Response:
+    state = request.app[STATE_KEY]
+    physical_object = state.physical_objects.get(int(request.match_info["physical_object_id"]))
+    if physical_object is None:
+        raise web.HTTPNotFound()
+    return web.json_response(
+        [_object_geometry_json(state, state.object_geometries[i]) for i in physical_object.geometry_ids]
+    )
+
+
+async def _physical_object_types(request: web.Request) -> web.Response:
+    types = request.app[STATE_KEY].physical_object_types
+    return web.json_response([{"physical_object_type_id": i, "name": name} for i, name in types.items()])
+
+
+async def _service_types(request: web.Request) -> web.Response:
+    types = request.app[STATE_KEY].service_types
+    return web.json_response([{"service_type_id": i, "name": name} for i, name in types.items()])
+
+
+async def _functional_zone_types(request: web.Request) -> web.Response:
+    types = request.app[STATE_KEY].functional_zone_types
+    return web.json_response(
+        [
+            {"functional_zone_type_id": i, "name": name, "zone_nickname": name, "description": ""}
+            for i, name in types.items()
+        ]
+    )
+
+
+async def _post_physical_object(request: web.Request) -> web.Response:
+    state = request.app[STATE_KEY]
+    body = await _read_model(request, PostPhysicalObject)
+    if body.territory_id not in state.territories:
+        raise web.HTTPNotFound(text="territory not found")
+    if body.physical_object_type_id not in state.physical_object_types:
+        raise web.HTTPNotFound(text="physical object type not found")
+    urban_object = state.add_physical_object(
+        body.physical_object_type_id,
+        body.territory_id,
+        body.shapely_geometry(),
+        body.name,
+        body.address,
+        body.properties,
+    )
+    return web.json_response(_urban_object_json(state, urban_object), status=201)
+
+
+async def _post_living_building(request: web.Request) -> web.Response:
+    state = request.app[STATE_KEY]
+    body = await request.json()
+    physical_object = state.physical_objects.get(body.get("physical_object_id"))
+    if physical_object is None:
+        raise web.HTTPNotFound(text="physical object not found")
+    living_building_id = state.add_living_building(
+        physical_object.physical_object_id,
+        body.get("residents_number"),
+        body.get("living_area"),
+        body.get("properties") or {},
+    )
+    return web.json_response(
+        {
+            "living_building_id": living_building_id,
+            "physical_object": _physical_object_json(state, physical_object.physical_object_id),
+            "residents_number": body.get("residents_number"),
+            "living_area": body.get("living_area"),
+            "properties": body.get("properties") or {},
+        },
+        status=201,
+    )
+
+
+async def _post_service(request: web.Request) -> web.Response:
+    state = request.app[STATE_KEY]
+    body = await _read_model(request, PostService)
+    object_geometry = state.object_geometries.get(body.object_geometry_id)
+    if object_geometry is None or object_geometry.physical_object_id != body.physical_object_id:
+        raise web.HTTPNotFound(text="physical object geometry not found")
+    if body.service_type_id not in state.service_types:
+        raise web.HTTPNotFound(text="service type not found")
+    service = state.add_service(
+        body.physical_object_id,
+        body.object_geometry_id,
+        body.service_type_id,
+        body.territory_type_id,
+        body.name,
+        body.capacity_real,
+        body.properties,
+    )
+    return web.json_response(_service_json(state, service), status=201)
+
+
+async def _post_functional_zone(request: web.Request) -> web.Response:
+    state = request.app[STATE_KEY]
+    body = await _read_model(request, PostFunctionalZone)
+    if body.territory_id not in state.territories:
+        raise web.HTTPNotFound(text="territory not found")
+    if body.functional_zone_type_id not in state.functional_zone_types:
+        raise web.HTTPNotFound(text="functional zone type not found")
+    zone = state.add_functional_zone(
+        body.territory_id, body.functional_zone_type_id, shapely.from_wkt(body.geometry.wkt), body.properties
+    )
+    return web.json_response(_functional_zone_json(state, zone), status=201)
+
+
+async def _territories_without_geometry(request: web.Request) -> web.Response:
+    state = request.app[STATE_KEY]
+    parent_id = request.query.get("parent_id")
+    if parent_id is None:
+        territories = state.get_roots()
+    elif int(parent_id) in state.territories:
+        territories = [state.territories[i] for i in state.territories[int(parent_id)].children]
+    else:
+        raise web.HTTPNotFound(text="territory not found")
+    size = max(1, min(int(request.query.get("size", 10)), request.app[CONFIG_KEY].max_page_size))
+    page = max(1, int(request.query.get("page", 1)))
+    pages = math.ceil(len(territories) / size)
+    return web.json_response(
+        {
+            "count": len(territories),
+            "prev": str(request.url.update_query(page=page - 1, size=size)) if page > 1 else None,
+            "next": str(request.url.update_query(page=page + 1, size=size)) if page < pages else None,
+            "results": [_territory_json(state, t) for t in territories[(page - 1) * size : page * size]],
+        }
+    )
+
+
+async def _all_territories(request: web.Request) -> web.Response:
+    state = request.app[STATE_KEY]
+    parent_id = request.query.get("parent_id")
+    if parent_id is None:
+        territories = list(state.territories.values())
+    elif int(parent_id) in state.territories:
+        territories = [state.territories[i] for i in state.get_descendants(int(parent_id))[1:]]
+    else:
+        raise web.HTTPNotFound(text="territory not found")
+    if request.query.get("get_all_levels") != "true":
+        level = min((t.level for t in territories), default=0)
+        territories = [t for t in territories if t.level == level]
+    return web.json_response(
+        {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": shapely.geometry.mapping(t.geometry),
+                    "properties": _territory_json(state, t) | {"parent": _territory_base_json(state, t.parent_id)},
+                }
+                for t in territories
+            ],
+        }
+    )
+
+
+async def _common_territory(request: web.Request) -> web.Response:
+    territory = request.app[STATE_KEY].get_common_territory(await _read_geometry(request))
+    if territory is None:
+        raise web.HTTPNotFound(text="territory not found")
+    return web.json_response({"territory_id": territory.territory_id, "name": territory.name})
+
+
+async def _functional_zones(request: web.Request) -> web.Response:
+    state = request.app[STATE_KEY]
+    territory_id = int(request.match_info["territory_id"])
+    if territory_id not in state.territories:
+        raise web.HTTPNotFound(text="territory not found")
+    territories = (
+        state.get_descendants(territory_id)
+        if request.query.get("include_child_territories", "false") == "true"
+        else [territory_id]
+    )
+    type_id = request.query.get("functional_zone_type_id")
+    zones = [
+        state.functional_zones[zone_id]
+        for t_id in territories
+        for zone_id in state.functional_zones_by_territory.get(t_id, [])
+    ]
+    if type_id is not None:
+        zones = [zone for zone in zones if zone.functional_zone_type_id == int(type_id)]
+    return web.json_response([_functional_zone_json(state, zone) for zone in zones])
+
+
+async def _read_geometry(request: web.Request) -> shapely.geometry.base.BaseGeometry:
+    try:
+        return shapely.geometry.shape(await request.json())
+    except Exception as exc:  # pylint: disable=broad-except
+        raise web.HTTPUnprocessableEntity(text=f"invalid geometry: {exc!r}") from exc
+
+
+async def _read_model(request: web.Request, model: type[PostPhysicalObject | PostService | PostFunctionalZone]) -> Any:
+    try:
+        return model.model_validate_json(await request.read())
+    except ValidationError as exc:
+        raise web.HTTPUnprocessableEntity(text=exc.json()) from exc
+
+
+def _timestamps(state: MockState) -> dict[str, str]:
+    created_at = state.created_at.isoformat()
+    return {"created_at": created_at, "updated_at": created_at}
+
+
+def _territory_base_json(state: MockState, territory_id: int | None) -> dict[str, Any] | None:
+    if territory_id is None:
+        return None
+    return {"id": territory_id, "name": state.territories[territory_id].name}
+
+
+def _territory_json(state: MockState, territory: MockTerritory) -> dict[str, Any]:
+    return {
+        "territory_id": territory.territory_id,
+        "territory_type": {"territory_type_id": territory.level, "name": f"Level {territory.level}"},
+        "parent_id": territory.parent_id,
+        "name": territory.name,
+        "level": territory.level,
+        "properties": {},
+        "admin_center": None,
+        "okato_code": None,
+    } | _timestamps(state)
+
+
+def _physical_object_json(state: MockState, physical_object_id: int) -> dict[str, Any]:
+    physical_object = state.physical_objects[physical_object_id]
+    return {
+        "physical_object_id": physical_object_id,
+        "physical_object_type": {
+            "physical_object_type_id": physical_object.physical_object_type_id,
+            "name": state.physical_object_types[physical_object.physical_object_type_id],
+        },
+        "name": physical_object.name,
+        "properties": physical_object.properties,
+    } | _timestamps(state)
+
+
+def _object_geometry_json(state: MockState, object_geometry: MockObjectGeometry) -> dict[str, Any]:
+    return {
+        "object_geometry_id": object_geometry.object_geometry_id,
+        "territory": _territory_base_json(state, object_geometry.territory_id),
+        "address": object_geometry.address,
+        "geometry": shapely.geometry.mapping(object_geometry.geometry),
+        "centre_point": shapely.geometry.mapping(object_geometry.geometry.centroid),
+    } | _timestamps(state)
+
+
+def _object_around_json(state: MockState, object_geometry: MockObjectGeometry) -> dict[str, Any]:
+    return _physical_object_json(state, object_geometry.physical_object_id) | _object_geometry_json(
+        state, object_geometry
+    )
+
+
+def _service_json(state: MockState, service: MockService) -> dict[str, Any]:
+    return {
+        "service_id": service.service_id,
+        "service_type": {
+            "service_type_id": service.service_type_id,
+            "name": state.service_types[service.service_type_id],
+        },
+        "territory_type": (
+            {"territory_type_id": service.territory_type_id, "name": f"Territory type {service.territory_type_id}"}
+            if service.territory_type_id is not None
+            else None
+        ),
+        "name": service.name,
+        "capacity_real": service.capacity_real,
+        "properties": service.properties,
+    } | _timestamps(state)
+
+
+def _urban_object_json(state: MockState, urban_object: MockUrbanObject) -> dict[str, Any]:
+    return {
+        "urban_object_id": urban_object.urban_object_id,
+        "physical_object": _physical_object_json(state, urban_object.physical_object_id),
+        "object_geometry": _object_geometry_json(state, state.object_geometries[urban_object.object_geometry_id]),
+        "service": (
+            _service_json(state, state.services[urban_object.service_id])
+            if urban_object.service_id is not None
+            else None
+        ),
+    }
+
+
+def _functional_zone_json(state: MockState, zone: MockFunctionalZone) -> dict[str, Any]:
+    return {
+        "functional_zone_id": zone.functional_zone_id,
+        "geometry": shapely.geometry.mapping(zone.geometry),
+        "territory": _territory_base_json(state, zone.territory_id),
+        "functional_zone_type": {
+            "id": zone.functional_zone_type_id,
+            "name": state.functional_zone_types[zone.functional_zone_type_id],
+        },
+        "properties": zone.properties,
+    } | _timestamps(state)
@@ -0,0 +1,47 @@
+"""Embeddable mock Urban API server is defined here."""
+
+from collections import Counter
+
+from aiohttp import web
+
+from pmv2.mock_api._app import REQUESTS_KEY, MockConfig, make_app
+from pmv2.mock_api._state import MockState
+
+
+class MockUrbanAPI:
+    """Mock Urban API server running in the current event loop, i.e. for benchmarks.
+
+    Can be used as an async context manager, `url` is available after the server is started.
+    """
+
+    def __init__(self, state: MockState | None = None, config: MockConfig | None = None):
+        self.app = make_app(state, config)
+        self.url: str | None = None
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def requests(self) -> Counter:
+        """Number of requests for each of the routes."""
+        return self.app[REQUESTS_KEY]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start server on the given host and port (random free port by default), return its URL."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        self.url = f"http://{bound_host}:{bound_port}"
+        return self.url
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockUrbanAPI":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.stop()
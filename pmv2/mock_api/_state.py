@@ -0,0 +1,301 @@
+"""In-memory spatial state of the mock Urban API is defined here."""
+
+import datetime
+import itertools
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+import numpy as np
+import shapely
+
+BUILDING_TYPES_NAMES = ["Здание", "Жилой дом"]
+"""Names of the first physical object types, as buildings uploading requires them."""
+
+
+@dataclass
+class MockTerritory:
+    """Territory of the regular grid hierarchy."""
+
+    territory_id: int
+    parent_id: int | None
+    level: int
+    name: str
+    geometry: shapely.Polygon
+    children: list[int] = field(default_factory=list)
+
+
+@dataclass
+class MockObjectGeometry:
+    """Geometry of a physical object."""
+
+    object_geometry_id: int
+    physical_object_id: int
+    territory_id: int
+    geometry: shapely.geometry.base.BaseGeometry
+    address: str | None
+
+
+@dataclass
+class MockPhysicalObject:
+    """Physical object with identifiers of its geometries."""
+
+    physical_object_id: int
+    physical_object_type_id: int
+    name: str | None
+    properties: dict[str, Any]
+    geometry_ids: list[int] = field(default_factory=list)
+
+
+@dataclass
+class MockService:
+    """Service located at a physical object geometry."""
+
+    service_id: int
+    service_type_id: int
+    territory_type_id: int | None
+    name: str | None
+    capacity_real: int | None
+    properties: dict[str, Any]
+
+
+@dataclass
+class MockUrbanObject:
+    """Link of a physical object, its geometry and an optional service."""
+
+    urban_object_id: int
+    physical_object_id: int
+    object_geometry_id: int
+    service_id: int | None
+
+
+@dataclass
+class MockFunctionalZone:
+    """Functional zone of a territory."""
+
+    functional_zone_id: int
+    territory_id: int
+    functional_zone_type_id: int
+    geometry: shapely.geometry.base.BaseGeometry
+    properties: dict[str, Any]
+
+
+class _GridIndex:
+    """Incremental spatial index of ids by grid cells of geometries bounding boxes."""
+
+    def __init__(self, cell_size: float):
+        self._cell_size = cell_size
+        self._cells: dict[tuple[int, int], list[int]] = defaultdict(list)
+
+    def add(self, entity_id: int, geometry: shapely.geometry.base.BaseGeometry) -> None:
+        """Add entity with the given geometry to the index."""
+        for cell in self._get_cells(geometry):
+            self._cells[cell].append(entity_id)
+
+    def query(self, geometry: shapely.geometry.base.BaseGeometry) -> set[int]:
+        """Get ids of entities which bounding boxes may intersect with the given geometry."""
+        return {entity_id for cell in self._get_cells(geometry) for entity_id in self._cells.get(cell, ())}
+
+    def _get_cells(self, geometry: shapely.geometry.base.BaseGeometry) -> Iterable[tuple[int, int]]:
+        minx, miny, maxx, maxy = geometry.bounds
+        return itertools.product(
+            range(math.floor(minx / self._cell_size), math.floor(maxx / self._cell_size) + 1),
+            range(math.floor(miny / self._cell_size), math.floor(maxy / self._cell_size) + 1),
+        )
+
+
+class MockState:  # pylint: disable=too-many-instance-attributes
+    """Entities of the mock Urban API.
+
+    Territories hierarchy is a regular grid: the region covering `bbox` is split to `grid` x `grid` territories,
+    each of them is split the same way and so on up to `depth` levels.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        bbox: tuple[float, float, float, float] = (30.0, 59.8, 30.6, 60.1),
+        grid: int = 4,
+        depth: int = 3,
+        physical_object_types: int = 10,
+        service_types: int = 20,
+        functional_zone_types: int = 10,
+    ):
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+        self.territories: dict[int, MockTerritory] = {}
+        self.physical_object_types = {i: f"Physical object type {i}" for i in range(1, physical_object_types + 1)}
+        self.physical_object_types.update(dict(enumerate(BUILDING_TYPES_NAMES[:physical_object_types], start=1)))
+        self.service_types = {i: f"Service type {i}" for i in range(1, service_types + 1)}
+        self.functional_zone_types = {i: f"zone_{i}" for i in range(1, functional_zone_types + 1)}
+        self.physical_objects: dict[int, MockPhysicalObject] = {}
+        self.object_geometries: dict[int, MockObjectGeometry] = {}
+        self.urban_objects: dict[int, MockUrbanObject] = {}
+        self.urban_objects_by_physical_object: dict[int, list[int]] = defaultdict(list)
+        self.services: dict[int, MockService] = {}
+        self.living_buildings: dict[int, dict[str, Any]] = {}
+        self.functional_zones: dict[int, MockFunctionalZone] = {}
+        self.functional_zones_by_territory: dict[int, list[int]] = defaultdict(list)
+        self._geometries_index = _GridIndex(0.01)
+        self._ids = defaultdict(itertools.count)
+        for counter in (
+            "territory",
+            "physical_object",
+            "object_geometry",
+            "urban_object",
+            "service",
+            "living_building",
+            "zone",
+        ):
+            next(self._ids[counter])  # identifiers start from 1
+        self._add_territories(shapely.box(*bbox), None, 1, grid, depth)
+
+    def next_id(self, entity: str) -> int:
+        """Get identifier for a new entity of the given kind."""
+        return next(self._ids[entity])
+
+    def _add_territories(
+        self, geometry: shapely.Polygon, parent_id: int | None, level: int, grid: int, depth: int
+    ) -> None:
+        territory_id = self.next_id("territory")
+        self.territories[territory_id] = MockTerritory(
+            territory_id, parent_id, level, f"Territory {territory_id}", geometry
+        )
+        if parent_id is not None:
+            self.territories[parent_id].children.append(territory_id)
+        if level >= depth:
+            return
+        minx, miny, maxx, maxy = geometry.bounds
+        xs = np.linspace(minx, maxx, grid + 1)
+        ys = np.linspace(miny, maxy, grid + 1)
+        for i, j in itertools.product(range(grid), range(grid)):
+            self._add_territories(shapely.box(xs[i], ys[j], xs[i + 1], ys[j + 1]), territory_id, level + 1, grid, depth)
+
+    def get_roots(self) -> list[MockTerritory]:
+        """Get territories of the top level."""
+        return [territory for territory in self.territories.values() if territory.parent_id is None]
+
+    def get_descendants(self, territory_id: int) -> list[int]:
+        """Get identifiers of the given territory and all of its inner territories."""
+        result = [territory_id]
+        for child_id in self.territories[territory_id].children:
+            result += self.get_descendants(child_id)
+        return result
+
+    def get_common_territory(self, geometry: shapely.geometry.base.BaseGeometry) -> MockTerritory | None:
+        """Get the deepest territory covering the given geometry."""
+        candidates = self.get_roots()
+        result = None
+        while True:
+            covering = next((t for t in candidates if t.geometry.covers(geometry)), None)
+            if covering is None:
+                return result
+            result = covering
+            candidates = [self.territories[child_id] for child_id in covering.children]
+
+    def get_objects_around(
+        self, geometry: shapely.geometry.base.BaseGeometry, physical_object_type_id: int | None
+    ) -> list[MockObjectGeometry]:
+        """Get object geometries (of physical objects of the given type if set) intersecting with geometry."""
+        result = []
+        for object_geometry_id in sorted(self._geometries_index.query(geometry)):
+            object_geometry = self.object_geometries[object_geometry_id]
+            physical_object = self.physical_objects[object_geometry.physical_object_id]
+            if (
+                physical_object_type_id is not None
+                and physical_object.physical_object_type_id != physical_object_type_id
+            ):
+                continue
+            if object_geometry.geometry.intersects(geometry):
+                result.append(object_geometry)
+        return result
+
+    def add_physical_object(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        physical_object_type_id: int,
+        territory_id: int,
+        geometry: shapely.geometry.base.BaseGeometry,
+        name: str | None = None,
+        address: str | None = None,
+        properties: dict[str, Any] | None = None,
+    ) -> MockUrbanObject:
+        """Add physical object with a single geometry and return its urban object."""
+        physical_object = MockPhysicalObject(
+            self.next_id("physical_object"), physical_object_type_id, name, properties or {}
+        )
+        object_geometry = MockObjectGeometry(
+            self.next_id("object_geometry"), physical_object.physical_object_id, territory_id, geometry, address
+        )
+        physical_object.geometry_ids.append(object_geometry.object_geometry_id)
+        self.physical_objects[physical_object.physical_object_id] = physical_object
+        self.object_geometries[object_geometry.object_geometry_id] = object_geometry
+        self._geometries_index.add(object_geometry.object_geometry_id, geometry)
+        return self.add_urban_object(physical_object.physical_object_id, object_geometry.object_geometry_id, None)
+
+    def add_urban_object(
+        self, physical_object_id: int, object_geometry_id: int, service_id: int | None
+    ) -> MockUrbanObject:
+        """Link physical object, its geometry and (optionally) service."""
+        urban_object = MockUrbanObject(self.next_id("urban_object"), physical_object_id, object_geometry_id, service_id)
+        self.urban_objects[urban_object.urban_object_id] = urban_object
+        self.urban_objects_by_physical_object[physical_object_id].append(urban_object.urban_object_id)
+        return urban_object
+
+    def add_service(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        physical_object_id: int,
+        object_geometry_id: int,
+        service_type_id: int,
+        territory_type_id: int | None,
+        name: str | None,
+        capacity_real: int | None,
+        properties: dict[str, Any],
+    ) -> MockService:
+        """Add service to the existing physical object geometry."""
+        service = MockService(
+            self.next_id("service"), service_type_id, territory_type_id, name, capacity_real, properties
+        )
+        self.services[service.service_id] = service
+        self.add_urban_object(physical_object_id, object_geometry_id, service.service_id)
+        return service
+
+    def add_living_building(
+        self, physical_object_id: int, residents_number: int | None, living_area: float | None, properties: dict
+    ) -> int:
+        """Add living building data to the existing physical object, return living building identifier."""
+        living_building_id = self.next_id("living_building")
+        self.living_buildings[living_building_id] = {
+            "physical_object_id": physical_object_id,
+            "residents_number": residents_number,
+            "living_area": living_area,
+            "properties": properties,
+        }
+        return living_building_id
+
+    def add_functional_zone(
+        self,
+        territory_id: int,
+        functional_zone_type_id: int,
+        geometry: shapely.geometry.base.BaseGeometry,
+        properties: dict[str, Any],
+    ) -> MockFunctionalZone:
+        """Add functional zone to the territory."""
+        zone = MockFunctionalZone(self.next_id("zone"), territory_id, functional_zone_type_id, geometry, properties)
+        self.functional_zones[zone.functional_zone_id] = zone
+        self.functional_zones_by_territory[territory_id].append(zone.functional_zone_id)
+        return zone
+
+    def add_random_objects(self, count: int, physical_object_type_id: int, seed: int = 0, size: float = 0.0003) -> int:
+        """Add `count` square physical objects of the given type at random places of the territory, return number
+        of objects added (objects which do not fit in the territory are skipped).
+        """
+        rng = np.random.default_rng(seed)
+        minx, miny, maxx, maxy = shapely.union_all([t.geometry for t in self.get_roots()]).bounds
+        added = 0
+        for x, y in zip(rng.uniform(minx, maxx - size, count), rng.uniform(miny, maxy - size, count)):
+            geometry = shapely.box(x, y, x + size, y + size)
+            territory = self.get_common_territory(geometry)
+            if territory is None:
+                continue
+            self.add_physical_object(physical_object_type_id, territory.territory_id, geometry)
+            added += 1
+        return added
@@ -1,16 +1,68 @@
 """Urban_api client is located here. There is a possibility it will move to an individual package."""
 
+from typing import Iterable
+
 import structlog.stdlib
 
 from ._abstract import UrbanClient
+from ._wrapper import UrbanClientWrapper
+from .cached_types import CachedTypesUrbanClient
 from .http import HTTPUrbanClient
+from .http.codecs import get_json_codec
+from .http.rate_limits import RouteRateLimiter
+from .http.retries import CircuitBreaker, RetryPolicy
+from .instrumented import InstrumentedUrbanClient
+from .local_territories import LocalTerritoriesUrbanClient
+from .metrics import Metrics
 
 __all__ = [
+    "CachedTypesUrbanClient",
+    "InstrumentedUrbanClient",
+    "LocalTerritoriesUrbanClient",
+    "Metrics",
     "UrbanClient",
+    "UrbanClientWrapper",
     "make_http_client",
 ]
 
 
-def make_http_client(host: str, logger: structlog.stdlib.BoundLogger = ...) -> UrbanClient:
-    """Get HTTP Urban API client."""
-    return HTTPUrbanClient(host, logger)
+def make_http_client(  # pylint: disable=too-many-arguments
+    host: str,
+    logger: structlog.stdlib.BoundLogger = ...,
+    *,
+    max_connections: int = 100,
+    max_retries: int = 3,
+    circuit_breaker_threshold: int = 10,
+    circuit_breaker_pause: float = 30.0,
+    rate_limits: Iterable[tuple[str, float, float | None]] = (),
+    log_bodies_every: int = 100,
+    log_body_max_length: int = 1000,
+    json_codec: str | None = None,
+) -> UrbanClient:
+    """Get HTTP Urban API client.
+
+    Failed requests are repeated up to `max_retries` times (creating requests - only if it is safe), all requests
+    are paused for `circuit_breaker_pause` seconds after `circuit_breaker_threshold` consecutive failures
+    (0 disables the pause). `rate_limits` are (route, requests per second, burst) limits shared by all requests
+    of the client. Bodies of every `log_bodies_every` request are logged at debug level, truncated to
+    `log_body_max_length` characters. `json_codec` is a name of JSON library to use ("orjson", "msgspec" or "json"),
+    the fastest installed one by default.
+    """
+    circuit_breaker = None
+    if circuit_breaker_threshold > 0:
+        circuit_breaker = CircuitBreaker(circuit_breaker_threshold, circuit_breaker_pause, logger)
+    rate_limiter = RouteRateLimiter(rate_limits)
+    return HTTPUrbanClient(
+        host,
+        logger,
+        max_connections=max_connections,
+        retry_policies={
+            "read": RetryPolicy.default("read", max_retries),
+            "create": RetryPolicy.default("create", max_retries),
+        },
+        circuit_breaker=circuit_breaker,
+        rate_limiter=rate_limiter if len(rate_limiter) > 0 else None,
+        log_bodies_every=log_bodies_every,
+        log_body_max_length=log_body_max_length,
+        json_codec=get_json_codec(json_codec),
+    )
@@ -6,6 +6,7 @@ from typing import Any
 import geopandas as gpd
 import shapely
 
+from pmv2.urban_client.metrics import Metrics
 from pmv2.urban_client.models import (
     FunctionalZone,
     FunctionalZoneType,
@@ -21,8 +22,36 @@ from pmv2.urban_client.models import (
 )
 
 
-class UrbanClient(abc.ABC):
-    """Urban API client"""
+class UrbanClient(abc.ABC):  # pylint: disable=too-many-public-methods
+    """Urban API client.
+
+    Client can be used as an async context manager to open and release its resources (like connections pool)
+    once per run.
+    """
+
+    async def __aenter__(self) -> "UrbanClient":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        """Prepare client resources (connections pool and so on) if appliable."""
+
+    async def close(self) -> None:
+        """Release client resources if appliable."""
+
+    def set_concurrency_limit(self, limit: int) -> None:
+        """Set expected number of concurrent requests if appliable. Should be called before opening the client."""
+
+    def set_adaptive_concurrency(self, max_limit: int) -> None:
+        """Let client adjust number of concurrent requests (up to `max_limit`) by the API responsiveness if appliable.
+        Should be called before opening the client.
+        """
+
+    def set_metrics(self, metrics: Metrics) -> None:
+        """Record transport-level metrics (HTTP statuses, payload sizes, retries) to `metrics` if appliable."""
 
     @abc.abstractmethod
     async def is_alive(self) -> bool:
@@ -76,6 +105,13 @@ class UrbanClient(abc.ABC):
     async def get_inner_territories(self, territory_id: int | None) -> list[TerritoryWithoutGeometry]:
         """Get a list of territories inside a given territory on the next level. Pass None to get top-level territory"""
 
+    @abc.abstractmethod
+    async def get_territories_geometries(self, parent_id: int | None) -> gpd.GeoDataFrame:
+        """Get territories of all levels inside a given territory with their geometries.
+
+        Resulting GeoDataFrame contains at least `territory_id`, `parent_id`, `level` and `geometry` columns.
+        """
+
     @abc.abstractmethod
     async def get_common_territory_id(self, geom: shapely.geometry.base.BaseGeometry) -> int | None:
         """Get the most deep territory id which fully covers given geometry."""
@@ -0,0 +1,108 @@
+"""Base for Urban API client wrappers is defined here."""
+
+from typing import Any
+
+import geopandas as gpd
+import shapely
+
+from pmv2.urban_client._abstract import UrbanClient
+from pmv2.urban_client.metrics import Metrics
+from pmv2.urban_client.models import (
+    FunctionalZone,
+    FunctionalZoneType,
+    LivingBuilding,
+    PhysicalObjectType,
+    PostFunctionalZone,
+    PostPhysicalObject,
+    PostService,
+    Service,
+    ServiceType,
+    TerritoryWithoutGeometry,
+    UrbanObject,
+)
+
+
+class UrbanClientWrapper(UrbanClient):  # pylint: disable=too-many-public-methods
+    """Urban API client which passes all of the calls to the wrapped client.
+
+    Subclasses override only the methods they change behavior of.
+    """
+
+    def __init__(self, client: UrbanClient):
+        self._client = client
+
+    @property
+    def wrapped(self) -> UrbanClient:
+        """Get wrapped client."""
+        return self._client
+
+    async def open(self) -> None:
+        await self._client.open()
+
+    async def close(self) -> None:
+        await self._client.close()
+
+    def set_concurrency_limit(self, limit: int) -> None:
+        self._client.set_concurrency_limit(limit)
+
+    def set_adaptive_concurrency(self, max_limit: int) -> None:
+        self._client.set_adaptive_concurrency(max_limit)
+
+    def set_metrics(self, metrics: Metrics) -> None:
+        self._client.set_metrics(metrics)
+
+    async def is_alive(self) -> bool:
+        return await self._client.is_alive()
+
+    async def get_version(self) -> str | None:
+        return await self._client.get_version()
+
+    async def get_objects_around(
+        self, geom: shapely.geometry.base.BaseGeometry, physical_object_type_id: int | None = None
+    ) -> gpd.GeoDataFrame:
+        return await self._client.get_objects_around(geom, physical_object_type_id)
+
+    async def get_urban_object(
+        self, physical_object_id: int, object_geometry_id: int, service_id: int | None
+    ) -> UrbanObject | None:
+        return await self._client.get_urban_object(physical_object_id, object_geometry_id, service_id)
+
+    async def get_physical_object_geometries(self, physical_object_id: int) -> gpd.GeoDataFrame:
+        return await self._client.get_physical_object_geometries(physical_object_id)
+
+    async def get_physical_object_types(self) -> list[PhysicalObjectType]:
+        return await self._client.get_physical_object_types()
+
+    async def upload_physical_object(self, physycal_object: PostPhysicalObject) -> UrbanObject:
+        return await self._client.upload_physical_object(physycal_object)
+
+    async def add_living_building(
+        self, physical_object_id: int, residents_number: int, living_area: float, properties: dict[str, Any]
+    ) -> LivingBuilding:
+        return await self._client.add_living_building(physical_object_id, residents_number, living_area, properties)
+
+    async def get_service_types(self) -> list[ServiceType]:
+        return await self._client.get_service_types()
+
+    async def upload_service(self, service: PostService) -> Service:
+        return await self._client.upload_service(service)
+
+    async def get_inner_territories(self, territory_id: int | None) -> list[TerritoryWithoutGeometry]:
+        return await self._client.get_inner_territories(territory_id)
+
+    async def get_territories_geometries(self, parent_id: int | None) -> gpd.GeoDataFrame:
+        return await self._client.get_territories_geometries(parent_id)
+
+    async def get_common_territory_id(self, geom: shapely.geometry.base.BaseGeometry) -> int | None:
+        return await self._client.get_common_territory_id(geom)
+
+    async def get_functional_zone_types(self) -> list[FunctionalZoneType]:
+        return await self._client.get_functional_zone_types()
+
+    async def get_functional_zones(
+        self, territory_id: int, functional_zone_type_id: int | None = None, include_child_territories: bool = True
+    ) -> list[FunctionalZone]:
+        return await self._client.get_functional_zones(territory_id, functional_zone_type_id, include_child_territories)
+
+    async def upload_functional_zone(self, functional_zone: PostFunctionalZone) -> FunctionalZone:
+        return await self._client.upload_functional_zone(functional_zone)
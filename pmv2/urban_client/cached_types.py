@@ -0,0 +1,118 @@
+"""Urban API client wrapper with cached types dictionaries is defined here."""
+
+import asyncio
+import json
+import re
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, TypeVar
+
+import structlog
+from pydantic import BaseModel
+
+from pmv2.urban_client._abstract import UrbanClient
+from pmv2.urban_client._wrapper import UrbanClientWrapper
+from pmv2.urban_client.models import FunctionalZoneType, PhysicalObjectType, ServiceType
+
+_Model = TypeVar("_Model", bound=BaseModel)
+
+
+class CachedTypesUrbanClient(UrbanClientWrapper):  # pylint: disable=too-many-instance-attributes
+    """Urban API client wrapper which memoizes service, physical object and functional zone types lists.
+
+    Lists are kept in memory for the client lifetime and, if `cache_dir` is set, in json files under the directory
+    named after the host and Urban API version, so the following program launches can skip the requests.
+    Entries older than `ttl` seconds are requested again, `refresh` makes wrapper ignore the existing disk cache.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        client: UrbanClient,
+        host: str,
+        cache_dir: Path | None = None,
+        *,
+        ttl: float = 24 * 60 * 60,
+        refresh: bool = False,
+        logger: structlog.stdlib.BoundLogger = ...,
+    ):
+        super().__init__(client)
+        self._host = host
+        self._cache_dir = cache_dir
+        self._ttl = ttl
+        self._refresh = refresh
+        self._memory: dict[str, tuple[float, list[BaseModel]]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._version_dir: Path | None = None
+        if logger is ...:
+            self._logger = structlog.get_logger("cached_types")
+        else:
+            self._logger = logger
+
+    async def get_physical_object_types(self) -> list[PhysicalObjectType]:
+        return await self._get_cached(
+            "physical_object_types", PhysicalObjectType, self._client.get_physical_object_types
+        )
+
+    async def get_service_types(self) -> list[ServiceType]:
+        return await self._get_cached("service_types", ServiceType, self._client.get_service_types)
+
+    async def get_functional_zone_types(self) -> list[FunctionalZoneType]:
+        return await self._get_cached(
+            "functional_zone_types", FunctionalZoneType, self._client.get_functional_zone_types
+        )
+
+    async def _get_cached(
+        self, name: str, model: type[_Model], fetch: Callable[[], Awaitable[list[_Model]]]
+    ) -> list[_Model]:
+        async with self._locks.setdefault(name, asyncio.Lock()):
+            if name in self._memory:
+                created_at, values = self._memory[name]
+                if time.time() - created_at < self._ttl:
+                    return list(values)
+
+            cache_file = await self._get_cache_file(name)
+            if cache_file is not None and not self._refresh:
+                values = await self._read_cache_file(cache_file, model)
+                if values is not None:
+                    self._memory[name] = (cache_file.stat().st_mtime, values)
+                    return list(values)
+
+            values = await fetch()
+            self._memory[name] = (time.time(), values)
+            if cache_file is not None:
+                await self._write_cache_file(cache_file, values)
+            return list(values)
+
+    async def _get_cache_file(self, name: str) -> Path | None:
+        if self._cache_dir is None:
+            return None
+        if self._version_dir is None:
+            try:
+                version = await self._client.get_version()
+            except Exception:  # pylint: disable=broad-except
+                await self._logger.aexception("Could not get Urban API version, disk cache is not used")
+                return None
+            self._version_dir = self._cache_dir / re.sub(r"[^\w.-]+", "_", f"{self._host}_{version}")
+        return self._version_dir / f"{name}.json"
+
+    async def _read_cache_file(self, cache_file: Path, model: type[_Model]) -> list[_Model] | None:
+        if not cache_file.exists() or time.time() - cache_file.stat().st_mtime >= self._ttl:
+            return None
+        try:
+            with cache_file.open("r", encoding="utf-8") as file:
+                values = [model.model_validate(entry) for entry in json.load(file)]
+        except Exception:  # pylint: disable=broad-except
+            await self._logger.awarning("Could not read cache file, ignoring it", filename=str(cache_file))
+            return None
+        await self._logger.adebug("Loaded cached values", filename=str(cache_file), count=len(values))
+        return values
+
+    async def _write_cache_file(self, cache_file: Path, values: list[BaseModel]) -> None:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(".tmp")
+            with tmp_file.open("w", encoding="utf-8") as file:
+                json.dump([value.model_dump(mode="json") for value in values], file, ensure_ascii=False)
+            tmp_file.replace(cache_file)
+        except Exception:  # pylint: disable=broad-except
+            await self._logger.aexception("Could not save cache file", filename=str(cache_file))
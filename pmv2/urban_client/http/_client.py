@@ -1,19 +1,30 @@
 """Urban API HTTP Client is defined here."""
 
 import asyncio
-from functools import wraps
-from typing import Any, Callable
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from functools import partial, wraps
+from typing import Any, AsyncIterator, Callable
 
 import geopandas as gpd
 import pandas as pd
 import shapely
 import structlog.stdlib
-from aiohttp import ClientConnectionError, ClientSession, ClientTimeout
+from aiohttp import ClientConnectionError, ClientResponse, ClientSession, ClientTimeout, TCPConnector
+from pydantic import TypeAdapter
+from yarl import URL
 
 from pmv2.urban_client._abstract import UrbanClient
 from pmv2.urban_client.exceptions import APIConnectionError, APITimeoutError
+from pmv2.urban_client.http.codecs import JsonCodec, get_json_codec
+from pmv2.urban_client.http.concurrency import AdaptiveConcurrencyLimiter
 from pmv2.urban_client.http.exceptions import InvalidStatusCode
 from pmv2.urban_client.http.models import Paginated
+from pmv2.urban_client.http.rate_limits import RouteRateLimiter
+from pmv2.urban_client.http.retries import NO_RETRIES, CircuitBreaker, RequestKind, RetryPolicy
+from pmv2.urban_client.metrics import Metrics
 from pmv2.urban_client.models import (
     FunctionalZone,
     FunctionalZoneType,
@@ -28,6 +39,12 @@ from pmv2.urban_client.models import (
     UrbanObject,
 )
 
+_URBAN_OBJECTS = TypeAdapter(list[UrbanObject])
+_PHYSICAL_OBJECT_TYPES = TypeAdapter(list[PhysicalObjectType])
+_SERVICE_TYPES = TypeAdapter(list[ServiceType])
+_FUNCTIONAL_ZONE_TYPES = TypeAdapter(list[FunctionalZoneType])
+_FUNCTIONAL_ZONES = TypeAdapter(list[FunctionalZone])
+
 
 def _handle_exceptions(func: Callable) -> Callable:
     @wraps(func)
@@ -42,10 +59,73 @@ def _handle_exceptions(func: Callable) -> Callable:
     return _wrapper
 
 
-class HTTPUrbanClient(UrbanClient):
-    """Urban API client that uses HTTP/HTTPS as transport."""
+async def _close_session(session: ClientSession, loop: asyncio.AbstractEventLoop | None) -> None:
+    """Close session created in the given event loop from the current one."""
+    if session.closed:
+        return
+    if loop is None or loop is asyncio.get_running_loop() or loop.is_closed():
+        await session.close()  # connections of a closed loop are dropped without any I/O
+    elif loop.is_running():
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), loop))
+    else:
+        await asyncio.to_thread(loop.run_until_complete, session.close())
+
+
+def _is_overloaded(status: int) -> bool:
+    return status >= 500 or status == 429
+
+
+def _is_debug_enabled(logger: structlog.stdlib.BoundLogger) -> bool:
+    """Check if debug level is enabled for either structlog level-filtering logger (default `get_logger` result)
+    or logger wrapping the stdlib one.
+    """
+    for name in ("is_enabled_for", "isEnabledFor"):
+        if (is_enabled_for := getattr(logger, name, None)) is not None:
+            return is_enabled_for(logging.DEBUG)
+    return True
+
+
+class _TruncatedBody:  # pylint: disable=too-few-public-methods
+    """Request body which is serialized and truncated only if the log line containing it is rendered."""
+
+    __slots__ = ("_body", "_max_length")
+
+    def __init__(self, body: Any, max_length: int):
+        self._body = body
+        self._max_length = max_length
+
+    def __repr__(self) -> str:
+        text = json.dumps(self._body, ensure_ascii=False)
+        if len(text) <= self._max_length:
+            return text
+        return f"{text[:self._max_length]}... ({len(text)} characters)"
+
+    __structlog__ = __repr__
 
-    def __init__(self, host: str, logger: structlog.stdlib.BoundLogger = ...):
+
+class HTTPUrbanClient(UrbanClient):  # pylint: disable=too-many-instance-attributes,too-many-public-methods
+    """Urban API client that uses HTTP/HTTPS as transport.
+
+    Requests are logged at debug level, bodies are attached to every `log_bodies_every` line only (0 to never log
+    them) and truncated to `log_body_max_length` characters.
+
+    Request bodies are serialized by `json_codec` (the fastest installed one by default, see `get_json_codec`),
+    response bodies are read as bytes once and validated by pydantic models straight from them.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        host: str,
+        logger: structlog.stdlib.BoundLogger = ...,
+        *,
+        max_connections: int = 100,
+        retry_policies: dict[RequestKind, RetryPolicy] | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        rate_limiter: RouteRateLimiter | None = None,
+        log_bodies_every: int = 100,
+        log_body_max_length: int = 1000,
+        json_codec: JsonCodec | None = None,
+    ):
         if logger is ...:
             logger = structlog.get_logger()
         if not host.startswith("http"):
@@ -53,30 +133,93 @@ class HTTPUrbanClient(UrbanClient):
             host = f"http://{host}"
         self._host = host
         self._logger = logger.bind(host=self._host)
+        self._max_connections = max_connections
+        self._session: ClientSession | None = None
+        self._session_loop: asyncio.AbstractEventLoop | None = None
+        self._limiter: AdaptiveConcurrencyLimiter | None = None
+        self._retry_policies: dict[RequestKind, RetryPolicy] = {
+            "read": RetryPolicy.default("read"),
+            "create": RetryPolicy.default("create"),
+        } | (retry_policies or {})
+        self._circuit_breaker = circuit_breaker
+        self._rate_limiter = rate_limiter
+        self._metrics: Metrics | None = None
+        self._log_bodies_every = log_bodies_every
+        self._log_body_max_length = log_body_max_length
+        self._requests_with_body = 0
+        self._json_codec = json_codec if json_codec is not None else get_json_codec()
+
+    def set_concurrency_limit(self, limit: int) -> None:
+        """Set connections pool size. Already opened session is not affected until it is reopened."""
+        if self._session is not None:
+            self._logger.warning("connections limit is set for an already opened session", limit=limit)
+        self._max_connections = max(limit, 1)
+        self._limiter = None
+
+    def set_adaptive_concurrency(self, max_limit: int) -> None:
+        """Limit number of requests in flight adaptively by the observed latency, server errors and timeouts.
+        Connections pool is sized for `max_limit` connections.
+        """
+        self.set_concurrency_limit(max_limit)
+        self._limiter = AdaptiveConcurrencyLimiter(max_limit=self._max_connections, logger=self._logger)
+
+    def set_metrics(self, metrics: Metrics) -> None:
+        """Record status code (or exception), latency and body sizes of every request attempt and retries to
+        `metrics`.
+        """
+        self._metrics = metrics
+
+    async def open(self) -> None:
+        """Open a session with a connections pool to be used by all of the requests."""
+        await self._get_session()
+
+    async def close(self) -> None:
+        """Close the session and its connections pool."""
+        if self._limiter is not None:
+            limits = [limit for _, limit in self._limiter.history]
+            await self._logger.ainfo(
+                "Adaptive concurrency limits summary",
+                final=limits[-1],
+                min=min(limits),
+                max=max(limits),
+                changes=len(limits) - 1,
+            )
+            await self._logger.adebug(
+                "Adaptive concurrency limits history",
+                history=[(round(seconds, 1), limit) for seconds, limit in self._limiter.history],
+            )
+        if self._rate_limiter is not None:
+            await self._logger.ainfo(
+                "Rate limits waiting time",
+                seconds={route: round(wait, 1) for route, wait in self._rate_limiter.get_total_waits().items()},
+            )
+        if self._session is not None:
+            session, session_loop = self._session, self._session_loop
+            self._session = None
+            self._session_loop = None
+            await _close_session(session, session_loop)
 
     async def is_alive(self) -> bool:
         """Check if Urban API instance is responding."""
-        async with self._get_session() as session:
-            try:
-                resp = await session.get("/health_check/ping", timeout=10)
-            except ClientConnectionError as exc:
-                await self._logger.awarning("error on ping", error=repr(exc))
-                return False
-            except asyncio.exceptions.TimeoutError:
-                await self._logger.awarning("timeout on ping")
-                return False
-            if resp.status == 200 and (await resp.json()) == {"message": "Pong!"}:
-                return True
-            await self._logger.awarning("error on ping", resp_code=resp.status, resp_text=await resp.text())
+        try:
+            async with self._request(
+                "GET", "/health_check/ping", retry_policy=NO_RETRIES, timeout=ClientTimeout(10)
+            ) as resp:
+                if resp.status == 200 and await self._read_json(resp) == {"message": "Pong!"}:
+                    return True
+                await self._logger.awarning("error on ping", resp_code=resp.status, resp_text=await resp.text())
+        except ClientConnectionError as exc:
+            await self._logger.awarning("error on ping", error=repr(exc))
+        except asyncio.exceptions.TimeoutError:
+            await self._logger.awarning("timeout on ping")
         return False
 
     @_handle_exceptions
     async def get_version(self) -> str:
         """Get Urban API version from OpenAPI specification."""
-        async with self._get_session() as session:
-            resp = await session.get("/api/openapi")
+        async with self._request("GET", "/api/openapi") as resp:
             if resp.status == 200:
-                return (await resp.json())["info"]["version"]
+                return (await self._read_json(resp))["info"]["version"]
             raise APIConnectionError("invalid response from /api/openapi")
 
     @_handle_exceptions
@@ -89,15 +232,14 @@ class HTTPUrbanClient(UrbanClient):
         if physical_object_type_id is not None:
             clause = f"?physical_object_type_id={physical_object_type_id}"
         uri = f"/api/v1/physical_objects/around{clause}"
-        await self._logger.adebug("executing get_objects_around", body=body, uri=uri)
-        async with self._get_session() as session:
-            resp = await session.post(uri, json=body)
+        self._log_request("get_objects_around", body=body, uri=uri)
+        async with self._request("POST", uri, kind="read", json=body) as resp:
             if resp.status != 200:
                 await self._logger.aerror(
                     "error on get_objects_around", resp_code=resp.status, resp_text=await resp.text()
                 )
                 raise InvalidStatusCode(f"Unexpected status code on get_objects_around: got {resp.status}")
-            df = pd.DataFrame(await resp.json())
+            df = pd.DataFrame(await self._read_json(resp))
             if df.shape[0] == 0:
                 return gpd.GeoDataFrame(columns=["geometry"], geometry="geometry", crs=4326)
             df["geometry"] = df["geometry"].apply(shapely.geometry.shape)
@@ -109,9 +251,8 @@ class HTTPUrbanClient(UrbanClient):
         self, physical_object_id: int, object_geometry_id: int, service_id: int | None
     ) -> UrbanObject | None:
         path = f"/api/v1/urban_objects_by_physical_object?physical_object_id={physical_object_id}"
-        await self._logger.adebug("executing get_urban_object", path=path)
-        async with self._get_session() as session:
-            resp = await session.get(path)
+        self._log_request("get_urban_object", path=path)
+        async with self._request("GET", path) as resp:
             if resp.status == 404:
                 return None
             if resp.status != 200:
@@ -119,7 +260,7 @@ class HTTPUrbanClient(UrbanClient):
                     "error on get_physical_object_geometries", resp_code=resp.status, resp_text=await resp.text()
                 )
                 raise InvalidStatusCode(f"Unexpected status code on get_physical_object_geometries: got {resp.status}")
-            urban_objects = [UrbanObject.model_validate(entry) for entry in await resp.json()]
+            urban_objects = _URBAN_OBJECTS.validate_json(await resp.read())
         potential: UrbanObject | None = None
         for ub in urban_objects:
             if (
@@ -140,55 +281,51 @@ class HTTPUrbanClient(UrbanClient):
     @_handle_exceptions
     async def get_physical_object_geometries(self, physical_object_id: int) -> gpd.GeoDataFrame:
         path = f"/api/v1/physical_objects/{physical_object_id}/geometries"
-        await self._logger.adebug("executing get_physical_object_geometries", path=path)
-        async with self._get_session() as session:
-            resp = await session.get(path)
+        self._log_request("get_physical_object_geometries", path=path)
+        async with self._request("GET", path) as resp:
             if resp.status != 200:
                 await self._logger.aerror(
                     "error on get_physical_object_geometries", resp_code=resp.status, resp_text=await resp.text()
                 )
                 raise InvalidStatusCode(f"Unexpected status code on get_physical_object_geometries: got {resp.status}")
-            df = pd.DataFrame(await resp.json())
+            df = pd.DataFrame(await self._read_json(resp))
             df["geometry"] = df["geometry"].apply(shapely.geometry.shape)
             gdf = gpd.GeoDataFrame(df, geometry="geometry", crs=4326)
         return gdf
 
     @_handle_exceptions
     async def get_physical_object_types(self) -> list[PhysicalObjectType]:
-        async with self._get_session() as session:
-            resp = await session.get("/api/v1/physical_object_types")
+        async with self._request("GET", "/api/v1/physical_object_types") as resp:
             if resp.status != 200:
                 await self._logger.aerror(
                     "error on get_physical_object_types", resp_code=resp.status, resp_text=await resp.text()
                 )
                 raise InvalidStatusCode(f"Unexpected status code on get_physical_object_types: got {resp.status}")
-            result = [PhysicalObjectType.model_validate(entry) for entry in await resp.json()]
+            result = _PHYSICAL_OBJECT_TYPES.validate_json(await resp.read())
         return result
 
     @_handle_exceptions
     async def get_service_types(self) -> list[ServiceType]:
-        async with self._get_session() as session:
-            resp = await session.get("/api/v1/service_types")
+        async with self._request("GET", "/api/v1/service_types") as resp:
             if resp.status != 200:
                 await self._logger.aerror(
                     "error on get_service_types", resp_code=resp.status, resp_text=await resp.text()
                 )
                 raise InvalidStatusCode(f"Unexpected status code on get_service_types: got {resp.status}")
-            result = [ServiceType.model_validate(entry) for entry in await resp.json()]
+            result = _SERVICE_TYPES.validate_json(await resp.read())
         return result
 
     @_handle_exceptions
     async def upload_physical_object(self, physycal_object: PostPhysicalObject) -> UrbanObject:
         body = physycal_object.model_dump(mode="json")
-        await self._logger.adebug("executing upload_physical_object", body=body)
-        async with self._get_session() as session:
-            resp = await session.post("/api/v1/physical_objects", json=body)
+        self._log_request("upload_physical_object", body=body)
+        async with self._request("POST", "/api/v1/physical_objects", json=body) as resp:
             if resp.status != 201:
                 await self._logger.aerror(
                     "error on upload_physical_object", resp_code=resp.status, resp_text=await resp.text()
                 )
                 raise InvalidStatusCode(f"Unexpected status code on upload_physical_object: got {resp.status}")
-            result = UrbanObject.model_validate_json(await resp.text())
+            result = UrbanObject.model_validate_json(await resp.read())
         return result
 
     @_handle_exceptions
@@ -201,55 +338,74 @@ class HTTPUrbanClient(UrbanClient):
             "living_area": living_area,
             "properties": properties,
         }
-        await self._logger.adebug("executing add_living_building", body=body)
-        async with self._get_session() as session:
-            resp = await session.post("/api/v1/living_buildings", json=body)
+        self._log_request("add_living_building", body=body)
+        async with self._request("POST", "/api/v1/living_buildings", json=body) as resp:
             if resp.status != 201:
                 await self._logger.aerror(
                     "error on add_living_building", resp_code=resp.status, resp_text=await resp.text()
                 )
                 raise InvalidStatusCode(f"Unexpected status code on add_living_building: {resp.status}")
-            result = LivingBuilding.model_validate_json(await resp.text())
+            result = LivingBuilding.model_validate_json(await resp.read())
         return result
 
     @_handle_exceptions
     async def upload_service(self, service: PostService) -> Service:
         body = service.model_dump(mode="json")
-        await self._logger.adebug("executing upload_service", body=body)
-        async with self._get_session() as session:
-            resp = await session.post("/api/v1/services", json=body)
+        self._log_request("upload_service", body=body)
+        async with self._request("POST", "/api/v1/services", json=body) as resp:
             if resp.status != 201:
                 await self._logger.aerror("error on upload_service", resp_code=resp.status, resp_text=await resp.text())
                 raise InvalidStatusCode(f"Unexpected status code on upload_service: {resp.status}")
-            result = Service.model_validate_json(await resp.text())
+            result = Service.model_validate_json(await resp.read())
         return result
 
     @_handle_exceptions
     async def get_inner_territories(self, territory_id: int | None) -> list[TerritoryWithoutGeometry]:
         clause = f"parent_id={territory_id}&" if territory_id is not None else ""
         path = f"/api/v2/territories_without_geometry?{clause}size=100"
-        await self._logger.adebug("executing get_inner_territories", path=path)
-        async with self._get_session() as session:
-            resp = await session.get(path)
+        self._log_request("get_inner_territories", path=path)
+        async with self._request("GET", path) as resp:
             if resp.status != 200:
                 await self._logger.aerror(
                     "error on get_inner_territories", resp_code=resp.status, resp_text=await resp.text()
                 )
                 raise InvalidStatusCode(f"Unexpected status code on get_inner_territories: {resp.status}")
-            result = Paginated[TerritoryWithoutGeometry].model_validate_json(await resp.text())
-            return await result.get_all_pages(session)
+            result = Paginated[TerritoryWithoutGeometry].model_validate_json(await resp.read())
+        return await result.get_all_pages(partial(self._request, "GET"))
+
+    @_handle_exceptions
+    async def get_territories_geometries(self, parent_id: int | None) -> gpd.GeoDataFrame:
+        path = "/api/v1/all_territories"
+        params = {"get_all_levels": "true"}
+        if parent_id is not None:
+            params["parent_id"] = parent_id
+        self._log_request("get_territories_geometries", path=path, params=params)
+        async with self._request("GET", path, params=params) as resp:
+            if resp.status != 200:
+                await self._logger.aerror(
+                    "error on get_territories_geometries", resp_code=resp.status, resp_text=await resp.text()
+                )
+                raise InvalidStatusCode(f"Unexpected status code on get_territories_geometries: {resp.status}")
+            features = (await self._read_json(resp))["features"]
+        if len(features) == 0:
+            return gpd.GeoDataFrame(
+                columns=["territory_id", "parent_id", "level", "geometry"], geometry="geometry", crs=4326
+            )
+        gdf = gpd.GeoDataFrame.from_features(features, crs=4326)
+        if "parent_id" not in gdf.columns:
+            gdf["parent_id"] = gdf["parent"].apply(lambda parent: parent["id"] if isinstance(parent, dict) else None)
+        return gdf
 
     @_handle_exceptions
     async def get_common_territory_id(self, geom: shapely.geometry.base.BaseGeometry) -> int | None:
         body = shapely.geometry.mapping(geom)
 
-        await self._logger.adebug("executing get_common_territory", body=body)
+        self._log_request("get_common_territory", body=body)
 
-        async with self._get_session() as session:
-            resp = await session.post("/api/v1/common_territory", json=body)
+        async with self._request("POST", "/api/v1/common_territory", kind="read", json=body) as resp:
             match resp.status:
                 case 200:
-                    result = await resp.json()
+                    result = await self._read_json(resp)
                     return result.get("territory_id")
                 case 404:
                     return None
@@ -262,15 +418,14 @@ class HTTPUrbanClient(UrbanClient):
     @_handle_exceptions
     async def get_functional_zone_types(self) -> list[FunctionalZoneType]:
         path = "/api/v1/functional_zones_types"
-        await self._logger.adebug("executing get_functional_zone_types", path=path)
-        async with self._get_session() as session:
-            resp = await session.get(path)
+        self._log_request("get_functional_zone_types", path=path)
+        async with self._request("GET", path) as resp:
             if resp.status != 200:
                 await self._logger.aerror(
                     "error on get_functional_zone_types", resp_code=resp.status, resp_text=await resp.text()
                 )
                 raise InvalidStatusCode(f"Unexpected status code on get_functional_zone_types: {resp.status}")
-            return [FunctionalZoneType.model_validate(entry) for entry in await resp.json()]
+            return _FUNCTIONAL_ZONE_TYPES.validate_json(await resp.read())
 
     @_handle_exceptions
     async def get_functional_zones(
@@ -281,29 +436,160 @@ class HTTPUrbanClient(UrbanClient):
             "functional_zone_type_id": functional_zone_type_id,
             "include_child_territories": "true" if include_child_territories else "false",
         }
-        await self._logger.adebug("executing get_functional_zones", path=path, params=params)
-        async with self._get_session() as session:
-            resp = await session.get(path, params=params)
+        self._log_request("get_functional_zones", path=path, params=params)
+        async with self._request("GET", path, params=params) as resp:
             if resp.status != 200:
                 await self._logger.aerror(
                     "error on get_functional_zones", resp_code=resp.status, resp_text=await resp.text()
                 )
                 raise InvalidStatusCode(f"Unexpected status code on get_functional_zones: {resp.status}")
-            return [FunctionalZone.model_validate(entry) for entry in await resp.json()]
+            return _FUNCTIONAL_ZONES.validate_json(await resp.read())
 
     @_handle_exceptions
     async def upload_functional_zone(self, functional_zone: PostFunctionalZone) -> FunctionalZone:
         body = functional_zone.model_dump(mode="json")
-        await self._logger.adebug("executing upload_functional_zone", body=body)
-        async with self._get_session() as session:
-            resp = await session.post("/api/v1/functional_zones", json=body)
+        self._log_request("upload_functional_zone", body=body)
+        async with self._request("POST", "/api/v1/functional_zones", json=body) as resp:
             if resp.status != 201:
                 await self._logger.aerror(
                     "error on upload_functional_zone", resp_code=resp.status, resp_text=await resp.text()
                 )
                 raise InvalidStatusCode(f"Unexpected status code on upload_functional_zone: {resp.status}")
-            result = FunctionalZone.model_validate_json(await resp.text())
+            result = FunctionalZone.model_validate_json(await resp.read())
         return result
 
-    def _get_session(self) -> ClientSession:
-        return ClientSession(self._host, timeout=ClientTimeout(20))
+    async def _read_json(self, resp: ClientResponse) -> Any:
+        """Read response body and parse it with the client JSON codec."""
+        return self._json_codec.loads(await resp.read())
+
+    def _log_request(self, method_name: str, body: Any = None, **kwargs) -> None:
+        """Log request execution at debug level, attaching sampled and truncated body if it is set."""
+        if not _is_debug_enabled(self._logger):
+            return
+        if body is not None and self._log_bodies_every > 0:
+            if self._requests_with_body % self._log_bodies_every == 0:
+                kwargs["body"] = _TruncatedBody(body, self._log_body_max_length)
+            self._requests_with_body += 1
+        self._logger.debug(f"executing {method_name}", **kwargs)
+
+    @asynccontextmanager
+    async def _request(
+        self,
+        method: str,
+        url: str | URL,
+        *,
+        kind: RequestKind | None = None,
+        retry_policy: RetryPolicy | None = None,
+        **kwargs,
+    ) -> AsyncIterator[ClientResponse]:
+        """Execute request in the shared session, repeating it on failures by the retry policy of the given kind
+        of requests ("read" for GET and "create" for other methods by default) and waiting for the circuit breaker.
+
+        Response body is read before it is given to the caller, so connection errors and timeouts while reading it are
+        retried and counted by the circuit breaker as well.
+        """
+        if retry_policy is None:
+            retry_policy = self._retry_policies[kind or ("read" if method == "GET" else "create")]
+        if "json" in kwargs:  # serialized once for all of the attempts
+            kwargs["data"] = self._json_codec.dumps(kwargs.pop("json"))
+            kwargs["headers"] = {"Content-Type": "application/json"} | kwargs.get("headers", {})
+        attempt = 0
+        while True:
+            probe = await self._circuit_breaker.wait() if self._circuit_breaker is not None else False
+            if not probe:  # probes fail because Urban API is down, so they do not spend request attempts
+                attempt += 1
+            success: bool | None = None
+            yielded = False
+            try:
+                async with self._send(method, url, **kwargs) as resp:
+                    if not retry_policy.should_retry_status(resp.status, attempt):
+                        await resp.read()  # body transport errors are retried, callers get the buffered body
+                        success = not _is_overloaded(resp.status)
+                        yielded = True
+                        yield resp
+                        return
+                    success = not _is_overloaded(resp.status)
+                    await self._logger.awarning(
+                        "retrying request", method=method, url=str(url), resp_code=resp.status, attempt=attempt
+                    )
+                    if self._metrics is not None:
+                        self._metrics.observe_retry(method, url)
+            except Exception as exc:  # pylint: disable=broad-except
+                if yielded:
+                    raise
+                success = False
+                if not retry_policy.should_retry_exception(exc, attempt):
+                    raise
+                await self._logger.awarning(
+                    "retrying request", method=method, url=str(url), error=repr(exc), attempt=attempt
+                )
+                if self._metrics is not None:
+                    self._metrics.observe_retry(method, url)
+            finally:
+                if self._circuit_breaker is not None:
+                    self._circuit_breaker.record(success, probe)
+            await asyncio.sleep(retry_policy.get_delay(max(attempt, 1)))
+
+    @asynccontextmanager
+    async def _send(self, method: str, url: str | URL, **kwargs) -> AsyncIterator[ClientResponse]:
+        """Send a single request, waiting for the route rate limits and adaptive concurrency limiter if they are set.
+
+        Latency is measured up to the response headers.
+        """
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire(url)
+        if self._limiter is not None:
+            await self._limiter.acquire()
+        start = time.monotonic()
+        latency: float | None = None
+        status: int | str | None = None
+        response_size: int | None = None
+        overloaded = False
+        try:
+            async with (await self._get_session()).request(method, url, **kwargs) as resp:
+                latency = time.monotonic() - start
+                status = resp.status
+                response_size = resp.content_length
+                overloaded = _is_overloaded(resp.status)
+                yield resp
+        except (ClientConnectionError, asyncio.exceptions.TimeoutError) as exc:
+            overloaded = True
+            if status is None:
+                status = type(exc).__name__
+            raise
+        finally:
+            if self._limiter is not None:
+                await self._limiter.release(latency, overloaded)
+            if self._metrics is not None and status is not None:
+                data = kwargs.get("data")
+                self._metrics.observe_request(
+                    method,
+                    url,
+                    status,
+                    latency if latency is not None else time.monotonic() - start,
+                    request_size=len(data) if isinstance(data, bytes) else None,
+                    response_size=response_size,
+                )
+
+    async def _get_session(self) -> ClientSession:
+        """Return shared session, creating it if needed.
+
+        Session is bound to the event loop it was created in, so it is closed and recreated when used from another
+        one.
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is not None and self._session_loop is not loop:
+            session, session_loop = self._session, self._session_loop
+            self._session = None
+            self._session_loop = None
+            await _close_session(session, session_loop)
+        if self._session is None or self._session.closed:
+            connector = TCPConnector(
+                limit=self._max_connections,
+                limit_per_host=self._max_connections,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            )
+            self._session = ClientSession(self._host, timeout=ClientTimeout(20), connector=connector)
+            self._session_loop = loop
+        return self._session
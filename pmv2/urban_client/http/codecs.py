@@ -0,0 +1,101 @@
+"""JSON codecs used for Urban API request and response bodies are defined here.
+
+orjson and msgspec are optional, the fastest of the installed libraries is used by default.
+"""
+
+import abc
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None
+
+
+class JsonCodec(abc.ABC):
+    """JSON serializer to bytes and parser from bytes."""
+
+    name: str
+
+    @abc.abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        """Serialize value to UTF-8 JSON."""
+
+    @abc.abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """Parse UTF-8 JSON."""
+
+
+class StdlibJsonCodec(JsonCodec):
+    """Codec using Python standard library `json` module."""
+
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """Codec using orjson library."""
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgspecJsonCodec(JsonCodec):
+    """Codec using msgspec library."""
+
+    name = "msgspec"
+
+    def __init__(self):
+        if msgspec is None:
+            raise ImportError("msgspec is not installed")
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, value: Any) -> bytes:
+        return self._encoder.encode(value)
+
+    def loads(self, data: bytes) -> Any:
+        return self._decoder.decode(data)
+
+
+JSON_CODECS: dict[str, type[JsonCodec]] = {
+    OrjsonCodec.name: OrjsonCodec,
+    MsgspecJsonCodec.name: MsgspecJsonCodec,
+    StdlibJsonCodec.name: StdlibJsonCodec,
+}
+"""Codecs by name in order of preference."""
+
+
+def get_available_codecs() -> list[str]:
+    """Get names of codecs which libraries are installed, in order of preference."""
+    installed = {OrjsonCodec.name: orjson is not None, MsgspecJsonCodec.name: msgspec is not None}
+    return [name for name in JSON_CODECS if installed.get(name, True)]
+
+
+def get_json_codec(name: str | None = None) -> JsonCodec:
+    """Get codec by name or the most preferred of installed ones if name is not set or "auto"."""
+    if name is None or name == "auto":
+        name = get_available_codecs()[0]
+    if name not in JSON_CODECS:
+        raise ValueError(f"Unknown JSON codec: {name}, expected one of {list(JSON_CODECS)}")
+    return JSON_CODECS[name]()
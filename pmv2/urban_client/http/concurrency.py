@@ -0,0 +1,106 @@
+"""Adaptive concurrency limiter for Urban API requests is defined here."""
+
+import asyncio
+import time
+
+import numpy as np
+import structlog
+
+
+class AdaptiveConcurrencyLimiter:  # pylint: disable=too-many-instance-attributes
+    """Limiter of requests in flight which adjusts the limit by observed latency and errors (AIMD).
+
+    Results of requests are gathered in windows of `limit` requests. After each window without errors the limit is
+    increased by one if the 90th latency percentile is within `latency_tolerance` of the baseline latency (the lowest
+    median latency observed so far), and decreased by 10% if it is not. Server errors (5xx, 429) and timeouts lead to
+    a multiplicative decrease by `backoff_ratio`, at most once per window.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        initial_limit: int | None = None,
+        *,
+        latency_tolerance: float = 2.0,
+        backoff_ratio: float = 0.7,
+        logger: structlog.stdlib.BoundLogger = ...,
+    ):
+        self._min_limit = max(min_limit, 1)
+        self._max_limit = max(max_limit, self._min_limit)
+        self._limit = float(initial_limit if initial_limit is not None else min(4, self._max_limit))
+        self._latency_tolerance = latency_tolerance
+        self._backoff_ratio = backoff_ratio
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+        self._latencies: list[float] = []
+        self._errors = 0
+        self._baseline: float | None = None
+        self._last_decrease = 0.0
+        self._started = time.monotonic()
+        self.history: list[tuple[float, int]] = [(0.0, self.limit)]
+        """Limit changes as pairs of seconds from the limiter creation and the new limit."""
+        if logger is ...:
+            self._logger = structlog.get_logger("concurrency")
+        else:
+            self._logger = logger
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed to be in flight."""
+        return max(self._min_limit, min(self._max_limit, int(self._limit)))
+
+    @property
+    def max_limit(self) -> int:
+        """Upper bound of the limit."""
+        return self._max_limit
+
+    async def acquire(self) -> None:
+        """Wait for a free slot for a request."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def release(self, latency: float | None, overloaded: bool) -> None:
+        """Free a slot and record the request result.
+
+        `latency` is None for requests which failed without a response, `overloaded` marks server errors and timeouts.
+        """
+        async with self._condition:
+            self._in_flight -= 1
+            if overloaded:
+                self._errors += 1
+            elif latency is not None:
+                self._latencies.append(latency)
+            if overloaded and time.monotonic() - self._last_decrease > self._get_window_time():
+                self._set_limit(self._limit * self._backoff_ratio, "errors")
+                self._last_decrease = time.monotonic()
+            elif len(self._latencies) + self._errors >= self.limit:
+                self._finish_window()
+            self._condition.notify_all()
+
+    def _finish_window(self) -> None:
+        latencies = np.array(self._latencies)
+        errors = self._errors
+        self._latencies = []
+        self._errors = 0
+        if len(latencies) == 0 or errors > 0:
+            return
+        p50, p90 = (float(value) for value in np.percentile(latencies, [50, 90]))
+        if self._baseline is None or p50 < self._baseline:
+            self._baseline = p50
+        if p90 <= self._baseline * self._latency_tolerance:
+            self._set_limit(self._limit + 1, "latency is stable", p50=round(p50, 3), p90=round(p90, 3))
+        else:
+            self._set_limit(self._limit * 0.9, "latency is growing", p50=round(p50, 3), p90=round(p90, 3))
+
+    def _get_window_time(self) -> float:
+        """Approximate time of a window of requests to avoid decreasing the limit on every error of a burst."""
+        return (self._baseline or 0.1) * 2
+
+    def _set_limit(self, limit: float, reason: str, **kwargs) -> None:
+        old_limit = self.limit
+        self._limit = max(float(self._min_limit), min(float(self._max_limit), limit))
+        if self.limit != old_limit:
+            self.history.append((time.monotonic() - self._started, self.limit))
+            self._logger.debug("Concurrency limit changed", limit=self.limit, reason=reason, **kwargs)
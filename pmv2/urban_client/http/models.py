@@ -1,9 +1,12 @@
 """HTTP-specific datatypes are defined here."""
 
-from typing import Generic, TypeVar
+import asyncio
+import math
+from typing import AsyncContextManager, Callable, Generic, TypeVar
 
-from aiohttp import ClientSession
+from aiohttp import ClientResponse
 from pydantic import BaseModel
+from yarl import URL
 
 from pmv2.urban_client.http.exceptions import InvalidStatusCode
 
@@ -18,15 +21,65 @@ class Paginated(BaseModel, Generic[_T]):
     next: str | None
     results: list[_T]
 
-    async def get_all_pages(self, session: ClientSession) -> list[_T]:
-        """Get all pages if there are more than one and return a whole list."""
+    async def get_all_pages(
+        self, request: Callable[[str | URL], AsyncContextManager[ClientResponse]], parallel_requests: int = 4
+    ) -> list[_T]:
+        """Get all pages if there are more than one with a given GET request function and return a whole list.
+
+        If the server uses page number pagination, URLs of the remaining pages are computed from `count` and page
+        size and requested concurrently, `parallel_requests` at a time. Otherwise (i.e. for cursor pagination)
+        `next` links are followed one by one.
+        """
+        if self.next is None:
+            return list(self.results)
+        urls = self._get_pages_urls()
+        if urls is None or parallel_requests <= 1:
+            return await self._follow_links(request)
+
+        semaphore = asyncio.Semaphore(parallel_requests)
+
+        async def get_page(url: URL) -> "Paginated[_T]":
+            async with semaphore:
+                return await self._get_page(request, url)
+
+        tasks = [asyncio.create_task(get_page(url)) for url in urls]
+        try:
+            pages = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        results: list[_T] = list(self.results)
+        for page in pages:
+            results += page.results
+        return results
+
+    def _get_pages_urls(self) -> list[URL] | None:
+        """Get URLs of all of the pages starting from the next one, or None if pagination is not page-numbered."""
+        url = URL(self.next)
+        try:
+            next_page = int(url.query["page"])
+            size = int(url.query.get("size", len(self.results)))
+        except (KeyError, ValueError):
+            return None
+        if size <= 0:
+            return None
+        return [url.update_query(page=page) for page in range(next_page, math.ceil(self.count / size) + 1)]
+
+    async def _follow_links(self, request: Callable[[str | URL], AsyncContextManager[ClientResponse]]) -> list[_T]:
         results: list[_T] = list(self.results)
         url = self.next
         while url is not None:
-            resp = await session.get(url)
-            if resp.status != 200:
-                raise InvalidStatusCode(f"Expected code 200, got {resp.status}")
-            result = Paginated[_T].model_validate_json(await resp.text())
+            result = await self._get_page(request, url)
             url = result.next
             results += result.results
         return results
+
+    async def _get_page(
+        self, request: Callable[[str | URL], AsyncContextManager[ClientResponse]], url: str | URL
+    ) -> "Paginated[_T]":
+        async with request(url) as resp:
+            if resp.status != 200:
+                raise InvalidStatusCode(f"Expected code 200, got {resp.status}")
+            return self.__class__.model_validate_json(await resp.read())
@@ -0,0 +1,85 @@
+"""Client-side per-route requests rate limits are defined here."""
+
+import asyncio
+import re
+import time
+from typing import Iterable
+
+from yarl import URL
+
+
+class TokenBucket:  # pylint: disable=too-few-public-methods
+    """Token bucket allowing `rate` requests per second on average with bursts of up to `burst` requests.
+
+    Waiting requests are let through in order of arrival.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        self.rate = rate
+        self.burst = max(burst if burst is not None else rate, 1.0)
+        self.total_wait = 0.0
+        """Total time (in seconds) requests have waited for tokens."""
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait for a token to be available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+                self.total_wait += delay
+                await asyncio.sleep(delay)
+
+
+class RouteRateLimiter:
+    """Rate limiter with separate token buckets for Urban API routes.
+
+    Route is either a path (i.e. "/api/v1/common_territory"), a path template with placeholders in braces
+    (i.e. "/api/v1/physical_objects/{id}/geometries") or "*" to limit all of the requests together. Request waits
+    for tokens of every route matching its path.
+    """
+
+    def __init__(self, limits: Iterable[tuple[str, float, float | None]]):
+        self._buckets: list[tuple[str, re.Pattern, TokenBucket]] = [
+            (route, _route_to_pattern(route), TokenBucket(rate, burst)) for route, rate, burst in limits
+        ]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def acquire(self, url: str | URL) -> None:
+        """Wait for tokens of all of the routes matching the given request URL."""
+        path = URL(str(url)).path
+        for _, pattern, bucket in self._buckets:
+            if pattern.fullmatch(path) is not None:
+                await bucket.acquire()
+
+    def get_total_waits(self) -> dict[str, float]:
+        """Get total time (in seconds) requests waited for each of the routes."""
+        return {route: bucket.total_wait for route, _, bucket in self._buckets}
+
+
+def parse_rate_limit(value: str) -> tuple[str, float, float | None]:
+    """Parse rate limit definition in format "<route>=<requests per second>[:<burst>]"."""
+    route, sep, limit = value.rpartition("=")
+    if sep == "" or route == "":
+        raise ValueError(f"Rate limit should be set as <route>=<rate>[:<burst>], got {value!r}")
+    rate, _, burst = limit.partition(":")
+    if float(rate) <= 0:
+        raise ValueError(f"Rate limit should be positive, got {value!r}")
+    return route, float(rate), float(burst) if burst != "" else None
+
+
+def _route_to_pattern(route: str) -> re.Pattern:
+    if route == "*":
+        return re.compile(".*")
+    return re.compile("[^/]+".join(re.escape(part) for part in re.split(r"\{[^/}]*\}", route.rstrip("/"))) + "/?")
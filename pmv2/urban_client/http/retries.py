@@ -0,0 +1,124 @@
+"""Requests retry policies and circuit breaker are defined here."""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Literal
+
+import structlog
+from aiohttp import ClientConnectionError, ClientConnectorError, ClientPayloadError
+
+RequestKind = Literal["read", "create"]
+"""Kind of Urban API endpoint: "read" requests have no side effects (GETs, objects around and common territory
+queries), "create" requests add entities and must not be repeated if the server could have processed them.
+"""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Policy of repeating failed requests with jittered exponential backoff.
+
+    Request is attempted at most `max_attempts` times. Delay before the n-th retry is chosen uniformly between zero
+    and `min(max_delay, base_delay * 2 ** (n - 1))` ("full jitter"), so workers failed at the same time do not
+    retry all at once.
+    """
+
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    retry_statuses: frozenset[int] = field(default_factory=lambda: frozenset((429, 500, 502, 503, 504)))
+    retry_exceptions: tuple[type[BaseException], ...] = (
+        ClientConnectionError,
+        ClientPayloadError,
+        asyncio.exceptions.TimeoutError,
+    )
+
+    def get_delay(self, attempt: int) -> float:
+        """Get delay before the next attempt after the given (counting from 1) one has failed."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def should_retry_status(self, status: int, attempt: int) -> bool:
+        """Check if request finished with the given status on the given attempt should be repeated."""
+        return attempt < self.max_attempts and status in self.retry_statuses
+
+    def should_retry_exception(self, exc: BaseException, attempt: int) -> bool:
+        """Check if request failed with the given exception on the given attempt should be repeated."""
+        return attempt < self.max_attempts and isinstance(exc, self.retry_exceptions)
+
+    @classmethod
+    def default(cls, kind: RequestKind, max_retries: int = 3) -> "RetryPolicy":
+        """Get default policy for the given kind of requests.
+
+        Create requests are repeated only when it is known that the server has not processed them: connection
+        could not be established, or the request was rejected with 429 or 503 status code.
+        """
+        if kind == "read":
+            return cls(max_attempts=max_retries + 1)
+        return cls(
+            max_attempts=max_retries + 1,
+            retry_statuses=frozenset((429, 503)),
+            retry_exceptions=(ClientConnectorError,),
+        )
+
+
+NO_RETRIES = RetryPolicy(max_attempts=1)
+
+
+class CircuitBreaker:
+    """Circuit breaker pausing all of the requests while Urban API is down.
+
+    After `failure_threshold` consecutive failures (server errors, timeouts or connection errors) circuit is opened
+    and requests wait for `recovery_time` seconds. Then a single probe request is let through: circuit is closed
+    if it succeeds and opened again otherwise.
+    """
+
+    def __init__(
+        self, failure_threshold: int = 10, recovery_time: float = 30.0, logger: structlog.stdlib.BoundLogger = ...
+    ):
+        self._failure_threshold = max(failure_threshold, 1)
+        self._recovery_time = recovery_time
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probe_in_flight = False
+        if logger is ...:
+            self._logger = structlog.get_logger("circuit_breaker")
+        else:
+            self._logger = logger
+
+    @property
+    def is_open(self) -> bool:
+        """Check if requests are paused now."""
+        return self._opened_at is not None
+
+    async def wait(self) -> bool:
+        """Wait until the request can be sent, return True if the request is a probe one."""
+        while self._opened_at is not None:
+            remaining = self._opened_at + self._recovery_time - time.monotonic()
+            if remaining <= 0 and not self._probe_in_flight:
+                self._probe_in_flight = True
+                await self._logger.ainfo("Sending probe request to check if Urban API is back")
+                return True
+            await asyncio.sleep(min(max(remaining, 0.1), 1.0))
+        return False
+
+    def record(self, success: bool | None, probe: bool = False) -> None:
+        """Record the request result, None meaning that the request was cancelled and its result is unknown."""
+        if probe:
+            self._probe_in_flight = False
+        if success is None:
+            return
+        if success:
+            self._failures = 0
+            if self._opened_at is not None:
+                self._opened_at = None
+                self._logger.info("Urban API is responding again, resuming requests")
+            return
+        self._failures += 1
+        if probe or (self._opened_at is None and self._failures >= self._failure_threshold):
+            self._opened_at = time.monotonic()
+            self._logger.warning(
+                "Urban API seems to be down, pausing requests",
+                consecutive_failures=self._failures,
+                pause_seconds=self._recovery_time,
+            )
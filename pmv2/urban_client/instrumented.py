@@ -0,0 +1,167 @@
+"""Urban API client wrapper collecting calls metrics is defined here."""
+
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Awaitable, TypeVar
+
+import geopandas as gpd
+import shapely
+import structlog
+
+from pmv2.urban_client._abstract import UrbanClient
+from pmv2.urban_client._wrapper import UrbanClientWrapper
+from pmv2.urban_client.metrics import Metrics
+from pmv2.urban_client.models import (
+    FunctionalZone,
+    FunctionalZoneType,
+    LivingBuilding,
+    PhysicalObjectType,
+    PostFunctionalZone,
+    PostPhysicalObject,
+    PostService,
+    Service,
+    ServiceType,
+    TerritoryWithoutGeometry,
+    UrbanObject,
+)
+
+_T = TypeVar("_T")
+
+
+class InstrumentedUrbanClient(UrbanClientWrapper):  # pylint: disable=too-many-public-methods
+    """Urban API client wrapper which records number, latency and errors of each of the methods calls to `metrics`.
+
+    Wrapped client is also asked to record its transport-level metrics (HTTP statuses, payload sizes and retries),
+    if it is able to. If `export_path` is set, metrics are written to it every `export_interval` seconds while
+    the client is open (0 disables periodic export) and on closing.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        client: UrbanClient,
+        metrics: Metrics,
+        export_path: Path | None = None,
+        export_interval: float = 30.0,
+        logger: structlog.stdlib.BoundLogger = ...,
+    ):
+        super().__init__(client)
+        self.metrics = metrics
+        self._export_path = export_path
+        self._export_interval = export_interval
+        self._export_task: asyncio.Task | None = None
+        if logger is ...:
+            self._logger = structlog.get_logger("instrumented_client")
+        else:
+            self._logger = logger
+        client.set_metrics(metrics)
+
+    def set_metrics(self, metrics: Metrics) -> None:
+        self.metrics = metrics
+        self._client.set_metrics(metrics)
+
+    async def open(self) -> None:
+        await self._client.open()
+        if self._export_path is not None and self._export_interval > 0 and self._export_task is None:
+            self._export_task = asyncio.create_task(self._export_periodically())
+
+    async def close(self) -> None:
+        if self._export_task is not None:
+            self._export_task.cancel()
+            await asyncio.gather(self._export_task, return_exceptions=True)
+            self._export_task = None
+        try:
+            await self._client.close()
+        finally:
+            self._export()
+            if self._export_path is not None:
+                await self._logger.ainfo("Saved metrics", filename=str(self._export_path))
+
+    async def _export_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._export_interval)
+            self._export()
+
+    def _export(self) -> None:
+        if self._export_path is None:
+            return
+        try:
+            self.metrics.export(self._export_path)
+        except Exception:  # pylint: disable=broad-except
+            self._logger.exception("Could not save metrics", filename=str(self._export_path))
+
+    async def _observe(self, method: str, call: Awaitable[_T]) -> _T:
+        start = time.monotonic()
+        try:
+            result = await call
+        except Exception as exc:
+            self.metrics.observe_call(method, time.monotonic() - start, exc)
+            raise
+        self.metrics.observe_call(method, time.monotonic() - start)
+        return result
+
+    async def is_alive(self) -> bool:
+        return await self._observe("is_alive", self._client.is_alive())
+
+    async def get_version(self) -> str | None:
+        return await self._observe("get_version", self._client.get_version())
+
+    async def get_objects_around(
+        self, geom: shapely.geometry.base.BaseGeometry, physical_object_type_id: int | None = None
+    ) -> gpd.GeoDataFrame:
+        return await self._observe("get_objects_around", self._client.get_objects_around(geom, physical_object_type_id))
+
+    async def get_urban_object(
+        self, physical_object_id: int, object_geometry_id: int, service_id: int | None
+    ) -> UrbanObject | None:
+        return await self._observe(
+            "get_urban_object", self._client.get_urban_object(physical_object_id, object_geometry_id, service_id)
+        )
+
+    async def get_physical_object_geometries(self, physical_object_id: int) -> gpd.GeoDataFrame:
+        return await self._observe(
+            "get_physical_object_geometries", self._client.get_physical_object_geometries(physical_object_id)
+        )
+
+    async def get_physical_object_types(self) -> list[PhysicalObjectType]:
+        return await self._observe("get_physical_object_types", self._client.get_physical_object_types())
+
+    async def upload_physical_object(self, physycal_object: PostPhysicalObject) -> UrbanObject:
+        return await self._observe("upload_physical_object", self._client.upload_physical_object(physycal_object))
+
+    async def add_living_building(
+        self, physical_object_id: int, residents_number: int, living_area: float, properties: dict[str, Any]
+    ) -> LivingBuilding:
+        return await self._observe(
+            "add_living_building",
+            self._client.add_living_building(physical_object_id, residents_number, living_area, properties),
+        )
+
+    async def get_service_types(self) -> list[ServiceType]:
+        return await self._observe("get_service_types", self._client.get_service_types())
+
+    async def upload_service(self, service: PostService) -> Service:
+        return await self._observe("upload_service", self._client.upload_service(service))
+
+    async def get_inner_territories(self, territory_id: int | None) -> list[TerritoryWithoutGeometry]:
+        return await self._observe("get_inner_territories", self._client.get_inner_territories(territory_id))
+
+    async def get_territories_geometries(self, parent_id: int | None) -> gpd.GeoDataFrame:
+        return await self._observe("get_territories_geometries", self._client.get_territories_geometries(parent_id))
+
+    async def get_common_territory_id(self, geom: shapely.geometry.base.BaseGeometry) -> int | None:
+        return await self._observe("get_common_territory_id", self._client.get_common_territory_id(geom))
+
+    async def get_functional_zone_types(self) -> list[FunctionalZoneType]:
+        return await self._observe("get_functional_zone_types", self._client.get_functional_zone_types())
+
+    async def get_functional_zones(
+        self, territory_id: int, functional_zone_type_id: int | None = None, include_child_territories: bool = True
+    ) -> list[FunctionalZone]:
+        return await self._observe(
+            "get_functional_zones",
+            self._client.get_functional_zones(territory_id, functional_zone_type_id, include_child_territories),
+        )
+
+    async def upload_functional_zone(self, functional_zone: PostFunctionalZone) -> FunctionalZone:
+        return await self._observe("upload_functional_zone", self._client.upload_functional_zone(functional_zone))
@@ -0,0 +1,86 @@
+"""Urban API client wrapper with local territories resolution is defined here."""
+
+import asyncio
+
+import geopandas as gpd
+import numpy as np
+import shapely
+import structlog
+
+from pmv2.urban_client._abstract import UrbanClient
+from pmv2.urban_client._wrapper import UrbanClientWrapper
+
+
+class TerritoriesIndex:
+    """Spatial index over territories hierarchy to find the deepest territory covering a geometry."""
+
+    def __init__(self, territories: gpd.GeoDataFrame):
+        territories = territories[~territories["geometry"].isna()]
+        geometries = np.array(territories["geometry"], dtype=object)
+        invalid = ~shapely.is_valid(geometries)
+        geometries[invalid] = shapely.make_valid(geometries[invalid])
+        self._territory_ids = territories["territory_id"].to_numpy(dtype=int)
+        self._levels = territories["level"].to_numpy(dtype=int)
+        self._tree = shapely.STRtree(geometries)
+
+    def __len__(self) -> int:
+        return len(self._territory_ids)
+
+    def get_common_territory_id(self, geom: shapely.geometry.base.BaseGeometry) -> int | None:
+        """Get the deepest territory fully covering the given geometry.
+
+        Return None if the geometry is not inside any of the territories or if it touches the boundary of one of
+        them, as the result could differ from the one Urban API would give because of precision issues.
+        """
+        intersecting = self._tree.query(geom, predicate="intersects")
+        if len(intersecting) == 0:
+            return None
+        covering = self._tree.query(geom, predicate="covered_by")
+        if len(covering) != len(intersecting):
+            return None
+        return int(self._territory_ids[covering[np.argmax(self._levels[covering])]])
+
+
+class LocalTerritoriesUrbanClient(UrbanClientWrapper):
+    """Urban API client wrapper which resolves common territories of geometries locally.
+
+    Territories geometries of the given region are downloaded once on the first request. Geometries which are
+    outside of the region or are crossing territories boundaries are resolved by the wrapped client.
+    """
+
+    def __init__(self, client: UrbanClient, region_id: int, logger: structlog.stdlib.BoundLogger = ...):
+        super().__init__(client)
+        self._region_id = region_id
+        self._index: TerritoriesIndex | None = None
+        self._lock = asyncio.Lock()
+        if logger is ...:
+            self._logger = structlog.get_logger("local_territories")
+        else:
+            self._logger = logger
+
+    async def get_common_territory_id(self, geom: shapely.geometry.base.BaseGeometry) -> int | None:
+        """Get the most deep territory id which fully covers given geometry, asking Urban API only if geometry
+        can not be resolved locally.
+        """
+        index = await self._get_index()
+        territory_id = index.get_common_territory_id(geom)
+        if territory_id is not None:
+            return territory_id
+        return await self._client.get_common_territory_id(geom)
+
+    async def _get_index(self) -> TerritoriesIndex:
+        if self._index is not None:
+            return self._index
+        async with self._lock:
+            if self._index is None:
+                await self._logger.ainfo("Loading territories geometries", region_id=self._region_id)
+                try:
+                    territories = await self._client.get_territories_geometries(self._region_id)
+                except Exception:  # pylint: disable=broad-except
+                    await self._logger.aexception("Could not load territories, all of them will be resolved by API")
+                    territories = gpd.GeoDataFrame(
+                        columns=["territory_id", "level", "geometry"], geometry="geometry", crs=4326
+                    )
+                self._index = TerritoriesIndex(territories)
+                await self._logger.ainfo("Loaded territories geometries", territories=len(self._index))
+        return self._index
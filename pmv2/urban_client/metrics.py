@@ -0,0 +1,277 @@
+"""Run metrics (Urban API client calls, HTTP requests and uploading stages durations) are defined here."""
+
+import bisect
+import contextvars
+import json
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+from yarl import URL
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+"""Upper bounds (in seconds) of latency histograms buckets."""
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+"""Upper bounds (in bytes) of payload size histograms buckets."""
+
+
+class Histogram:
+    """Histogram of observed values with fixed upper bounds of buckets, as Prometheus histograms are."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        """Number of values of each bucket (not cumulative), the last one is for values above all bounds."""
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add value to the histogram."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate quantile by linear interpolation inside the bucket containing it, None if there are no values.
+
+        Values above the last bucket bound are estimated with that bound.
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count > 0 and cumulative + count >= rank:
+                if i == len(self.buckets):
+                    return float(self.buckets[-1])
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return float(self.buckets[-1])
+
+    def get_cumulative_counts(self) -> list[tuple[str, int]]:
+        """Get (upper bound, number of values less or equal to it) pairs including "+Inf" bound."""
+        result = []
+        cumulative = 0
+        for bound, count in zip([*map(_format_number, self.buckets), "+Inf"], self.counts):
+            cumulative += count
+            result.append((bound, cumulative))
+        return result
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get histogram summary."""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count > 0 else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": dict(self.get_cumulative_counts()),
+        }
+
+
+class Metrics:  # pylint: disable=too-many-instance-attributes
+    """Metrics of a single program run.
+
+    Contains Urban API client methods calls latencies and errors, HTTP requests statuses, latencies, payload sizes
+    and retries by route, and durations of uploading stages ("read", "match", "territory" and "upload").
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.calls: dict[str, Histogram] = defaultdict(Histogram)
+        self.call_errors: Counter[tuple[str, str]] = Counter()
+        self.requests: Counter[tuple[str, str, str]] = Counter()
+        self.request_latencies: dict[tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.request_sizes: dict[tuple[str, str], Histogram] = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.response_sizes: dict[tuple[str, str], Histogram] = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.retries: Counter[tuple[str, str]] = Counter()
+        self.stages: dict[str, Histogram] = defaultdict(Histogram)
+
+    def observe_call(self, method: str, seconds: float, error: BaseException | None = None) -> None:
+        """Record Urban API client method call."""
+        self.calls[method].observe(seconds)
+        if error is not None:
+            self.call_errors[(method, type(error).__name__)] += 1
+
+    def observe_request(  # pylint: disable=too-many-arguments
+        self,
+        method: str,
+        url: str | URL,
+        status: int | str,
+        seconds: float,
+        *,
+        request_size: int | None = None,
+        response_size: int | None = None,
+    ) -> None:
+        """Record a single HTTP request attempt, `status` is either response status code or exception name."""
+        key = (method, get_route(url))
+        self.requests[(*key, str(status))] += 1
+        self.request_latencies[key].observe(seconds)
+        if request_size is not None:
+            self.request_sizes[key].observe(request_size)
+        if response_size is not None:
+            self.response_sizes[key].observe(response_size)
+
+    def observe_retry(self, method: str, url: str | URL) -> None:
+        """Record HTTP request retry."""
+        self.retries[(method, get_route(url))] += 1
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        """Record duration of an uploading stage of a single row."""
+        self.stages[stage].observe(seconds)
+
+    def to_json(self) -> dict[str, Any]:
+        """Get metrics summary as a JSON-serializable dictionary."""
+        requests: dict[str, dict[str, Any]] = {}
+        for (method, route, status), count in sorted(self.requests.items()):
+            requests.setdefault(f"{method} {route}", {"statuses": {}})["statuses"][status] = count
+        for key, entry in requests.items():
+            method_route = tuple(key.split(" ", 1))
+            entry["retries"] = self.retries.get(method_route, 0)
+            entry["latency"] = self.request_latencies[method_route].to_dict()
+            if method_route in self.request_sizes:
+                entry["request_size"] = self.request_sizes[method_route].to_dict()
+            if method_route in self.response_sizes:
+                entry["response_size"] = self.response_sizes[method_route].to_dict()
+        return {
+            "started_at": self.started_at,
+            "updated_at": time.time(),
+            "calls": {
+                method: histogram.to_dict()
+                | {"errors": {error: n for (m, error), n in self.call_errors.items() if m == method}}
+                for method, histogram in sorted(self.calls.items())
+            },
+            "requests": requests,
+            "stages": {stage: histogram.to_dict() for stage, histogram in sorted(self.stages.items())},
+        }
+
+    def to_prometheus(self) -> str:
+        """Get metrics in Prometheus text exposition format (i.e. for node_exporter textfile collector)."""
+        lines: list[str] = []
+        _add_histograms(
+            lines,
+            "pmv2_client_call_duration_seconds",
+            "Urban API client methods calls duration",
+            {(("method", method),): histogram for method, histogram in self.calls.items()},
+        )
+        _add_counters(
+            lines,
+            "pmv2_client_call_errors_total",
+            "Urban API client methods calls failed with exception",
+            {(("method", method), ("error", error)): count for (method, error), count in self.call_errors.items()},
+        )
+        _add_counters(
+            lines,
+            "pmv2_http_requests_total",
+            "HTTP requests attempts by response status code or exception name",
+            {
+                (("method", method), ("route", route), ("status", status)): count
+                for (method, route, status), count in self.requests.items()
+            },
+        )
+        _add_counters(
+            lines,
+            "pmv2_http_retries_total",
+            "HTTP requests retries",
+            {(("method", method), ("route", route)): count for (method, route), count in self.retries.items()},
+        )
+        for name, description, histograms in (
+            ("pmv2_http_request_duration_seconds", "HTTP requests attempts duration", self.request_latencies),
+            ("pmv2_http_request_size_bytes", "HTTP requests body size", self.request_sizes),
+            ("pmv2_http_response_size_bytes", "HTTP responses body size", self.response_sizes),
+        ):
+            _add_histograms(
+                lines,
+                name,
+                description,
+                {
+                    (("method", method), ("route", route)): histogram
+                    for (method, route), histogram in histograms.items()
+                },
+            )
+        _add_histograms(
+            lines,
+            "pmv2_upload_stage_duration_seconds",
+            "Uploading stages duration per row",
+            {(("stage", stage),): histogram for stage, histogram in self.stages.items()},
+        )
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: Path) -> None:
+        """Write metrics to the given file, in Prometheus text format for ".prom" files and as JSON otherwise.
+
+        File is replaced atomically, so it can be read at any moment.
+        """
+        if path.suffix == ".prom":
+            data = self.to_prometheus()
+        else:
+            data = json.dumps(self.to_json(), indent=2)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(data, encoding="utf-8")
+        tmp_path.replace(path)
+
+
+_ID_SEGMENT_RE = re.compile(r"(?<=/)\d+(?=/|$)")
+
+_current_metrics: contextvars.ContextVar[Metrics | None] = contextvars.ContextVar("pmv2_metrics", default=None)
+
+
+def get_route(url: str | URL) -> str:
+    """Get URL path with numeric identifiers replaced by "{id}" placeholder to group requests of the same route."""
+    return _ID_SEGMENT_RE.sub("{id}", URL(str(url)).path)
+
+
+def set_current_metrics(metrics: Metrics | None) -> None:
+    """Set metrics to record uploading stages to in the current context (and tasks started from it)."""
+    _current_metrics.set(metrics)
+
+
+@contextmanager
+def measure_stage(stage: str) -> Iterator[None]:
+    """Measure duration of the uploading stage if metrics are set for the current context."""
+    metrics = _current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        metrics.observe_stage(stage, time.monotonic() - start)
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for name, value in labels
+    )
+    return ",".join(f'{name}="{value}"' for name, value in escaped)
+
+
+def _add_counters(
+    lines: list[str], name: str, description: str, values: dict[tuple[tuple[str, str], ...], int]
+) -> None:
+    lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+    for labels, value in sorted(values.items()):
+        lines.append(f"{name}{{{_format_labels(labels)}}} {value}")
+
+
+def _add_histograms(
+    lines: list[str], name: str, description: str, histograms: dict[tuple[tuple[str, str], ...], Histogram]
+) -> None:
+    lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+    for labels, histogram in sorted(histograms.items()):
+        for bound, count in histogram.get_cumulative_counts():
+            lines.append(f"{name}_bucket{{{_format_labels(labels + (('le', bound),))}}} {count}")
+        lines.append(f"{name}_sum{{{_format_labels(labels)}}} {_format_number(histogram.sum)}")
+        lines.append(f"{name}_count{{{_format_labels(labels)}}} {histogram.count}")